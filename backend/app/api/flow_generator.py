@@ -2,10 +2,11 @@
 FastAPI routes for flow generation
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 import os
 import time
+from typing import Any, Optional
 
 from app.models.flow_models import (
     FlowGenerationRequest, 
@@ -13,24 +14,14 @@ from app.models.flow_models import (
     ErrorResponse,
     HealthResponse
 )
-from app.services.flow_service import flow_service
-
-# Import the new Real AxieStudio AI Chat system
-import sys
-from pathlib import Path
-sys.path.append(str(Path(__file__).parent.parent / "axiestudio_core"))
-
-try:
-    from ai.real_axiestudio_ai_chat import real_axiestudio_ai_chat
-    REAL_AI_AVAILABLE = True
-except ImportError as e:
-    print(f"⚠️ Real AxieStudio AI not available: {e}")
-    REAL_AI_AVAILABLE = False
+from app.core.container import ServiceContainer, ready_services
+from app.core.responses import ORJSONResponse, dumps, flow_encoder
+from ai.intent_classifier import get_intent_classifier
 
 router = APIRouter()
 
 @router.post("/generate", response_model=FlowGenerationResponse)
-async def generate_flow(request: FlowGenerationRequest):
+async def generate_flow(request: FlowGenerationRequest, services: ServiceContainer = Depends(ready_services)):
     """Generate an AxieStudio flow based on natural language description."""
 
     # Validate OpenAI API key if AI is requested
@@ -42,20 +33,36 @@ async def generate_flow(request: FlowGenerationRequest):
 
     try:
         # Use Real AxieStudio AI Chat if available and AI is requested
-        if request.use_ai and REAL_AI_AVAILABLE:
-            result = real_axiestudio_ai_chat.chat(request.description)
+        if request.use_ai and services.chat:
+            start_time = time.time()
+            result = await services.chat.achat(request.description, request.conversation_id,
+                                               use_cache=not request.bypass_cache)
 
             if result["success"]:
-                return FlowGenerationResponse(
-                    success=True,
-                    message=result["message"],
-                    flow=result["flow"],
-                    metadata={
+                flow_data = result.get("flow")
+                if flow_data is None and result.get("flow_ref"):
+                    # A follow-up edited the conversation's flow; this endpoint returns it in full
+                    flow_data = services.chat.get_flow(result["conversation_id"], result["flow_ref"])
+                flow_data = flow_data or {}
+                # Flows are encoded directly (no model round trip) so that
+                # cached template subtrees are spliced in as bytes
+                return ORJSONResponse({
+                    "success": True,
+                    "flow_data": flow_encoder.encode(flow_data),
+                    "metadata": {
                         "generator": "Real AxieStudio AI Chat",
                         "conversation_id": result.get("conversation_id"),
-                        "intent": result.get("intent", {})
-                    }
-                )
+                        "intent": result.get("intent", {}),
+                        "cached": result.get("cached", False),
+                        # Set for edits: the JSON patch from base_flow_ref to flow_ref
+                        "patch": result.get("patch"),
+                        "flow_ref": result.get("flow_ref"),
+                        "base_flow_ref": result.get("base_flow_ref")
+                    },
+                    "components": services.flow_service._extract_components_info(flow_data),
+                    "generation_time": time.time() - start_time,
+                    "message": result["message"]
+                })
             else:
                 raise HTTPException(
                     status_code=500,
@@ -63,14 +70,15 @@ async def generate_flow(request: FlowGenerationRequest):
                 )
         else:
             # Fallback to original service
-            result = await flow_service.generate_flow(
+            result = await services.flow_service.generate_flow(
                 description=request.description,
                 flow_type=request.flow_type,
-                use_ai=request.use_ai
+                use_ai=request.use_ai,
+                use_cache=not request.bypass_cache
             )
 
             if result["success"]:
-                return FlowGenerationResponse(**result)
+                return ORJSONResponse(dict(result, flow_data=flow_encoder.encode(result["flow_data"])))
             else:
                 raise HTTPException(
                     status_code=500,
@@ -83,8 +91,65 @@ async def generate_flow(request: FlowGenerationRequest):
             detail=f"Internal server error: {str(e)}"
         )
 
+def _sse_event(event: str, data: Any) -> bytes:
+    """Format a Server-Sent Event."""
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+@router.post("/generate/stream")
+async def generate_flow_stream(request: FlowGenerationRequest,
+                               services: ServiceContainer = Depends(ready_services)):
+    """Generate an AxieStudio flow, streaming progress as Server-Sent Events.
+
+    Events: ``conversation``, ``intent``, ``template``, ``token`` (chat text),
+    ``node`` (one per flow node), ``flow`` (final flow JSON), ``patch``
+    (JSON patch to the conversation's previous flow, instead of ``flow``
+    when a follow-up edits it), ``done`` and ``error``.
+    """
+
+    if request.use_ai and not os.getenv("OPENAI_API_KEY"):
+        raise HTTPException(
+            status_code=400,
+            detail="OpenAI API key not configured. Set OPENAI_API_KEY environment variable."
+        )
+
+    async def event_stream():
+        start_time = time.time()
+        try:
+            if request.use_ai and services.chat:
+                async for event in services.chat.astream_chat(request.description, request.conversation_id,
+                                                              use_cache=not request.bypass_cache):
+                    data = event["data"]
+                    if event["event"] == "flow" and isinstance(data, dict):
+                        data = flow_encoder.encode(data)
+                    yield _sse_event(event["event"], data)
+            else:
+                result = await services.flow_service.generate_flow(
+                    description=request.description,
+                    flow_type=request.flow_type,
+                    use_ai=request.use_ai,
+                    use_cache=not request.bypass_cache
+                )
+
+                if not result["success"]:
+                    yield _sse_event("error", {"detail": result.get("error", "Flow generation failed")})
+                    return
+
+                for index, component in enumerate(result["components"]):
+                    yield _sse_event("node", dict(component, index=index))
+                yield _sse_event("flow", flow_encoder.encode(result["flow_data"]))
+                yield _sse_event("done", {"success": True, "generation_time": time.time() - start_time})
+
+        except Exception as e:
+            yield _sse_event("error", {"detail": f"Internal server error: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/chat")
-async def chat_with_ai(request: dict):
+async def chat_with_ai(request: dict, services: ServiceContainer = Depends(ready_services)):
     """Chat with the Real AxieStudio AI system."""
 
     if not os.getenv("OPENAI_API_KEY"):
@@ -93,7 +158,7 @@ async def chat_with_ai(request: dict):
             detail="OpenAI API key not configured. Set OPENAI_API_KEY environment variable."
         )
 
-    if not REAL_AI_AVAILABLE:
+    if not services.chat:
         raise HTTPException(
             status_code=503,
             detail="Real AxieStudio AI system not available."
@@ -107,17 +172,22 @@ async def chat_with_ai(request: dict):
                 detail="Message cannot be empty."
             )
 
-        # Chat with the AI
-        result = real_axiestudio_ai_chat.chat(message)
+        # Chat with the AI within the caller's conversation (a new one if not given)
+        result = await services.chat.achat(message, request.get("conversation_id"))
 
-        return {
+        flow = result.get("flow")
+        return ORJSONResponse({
             "success": result["success"],
             "message": result["message"],
-            "flow": result.get("flow"),
+            "flow": flow_encoder.encode(flow) if isinstance(flow, dict) else flow,
+            # Follow-ups that edit the current flow return a JSON patch against base_flow_ref
+            "patch": result.get("patch"),
+            "flow_ref": result.get("flow_ref"),
+            "base_flow_ref": result.get("base_flow_ref"),
             "intent": result.get("intent", {}),
             "conversation_id": result.get("conversation_id"),
             "timestamp": time.time()
-        }
+        })
 
     except Exception as e:
         raise HTTPException(
@@ -126,19 +196,21 @@ async def chat_with_ai(request: dict):
         )
 
 @router.get("/chat/history")
-async def get_chat_history():
-    """Get the current chat conversation history."""
+async def get_chat_history(conversation_id: Optional[str] = None,
+                           services: ServiceContainer = Depends(ready_services)):
+    """Get the history of a chat conversation."""
 
-    if not REAL_AI_AVAILABLE:
+    if not services.chat:
         raise HTTPException(
             status_code=503,
             detail="Real AxieStudio AI system not available."
         )
 
     try:
-        history = real_axiestudio_ai_chat.get_conversation_history()
+        history = services.chat.get_conversation_history(conversation_id) if conversation_id else []
         return {
             "success": True,
+            "conversation_id": conversation_id,
             "history": history,
             "count": len(history)
         }
@@ -149,18 +221,45 @@ async def get_chat_history():
             detail=f"Error retrieving chat history: {str(e)}"
         )
 
+@router.get("/chat/flow")
+async def get_chat_flow(conversation_id: str, flow_ref: str,
+                        services: ServiceContainer = Depends(ready_services)):
+    """Get a flow generated in a chat conversation, for clients that cannot apply a patch."""
+
+    if not services.chat:
+        raise HTTPException(
+            status_code=503,
+            detail="Real AxieStudio AI system not available."
+        )
+
+    flow = services.chat.get_flow(conversation_id, flow_ref)
+    if flow is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Flow not found."
+        )
+
+    return ORJSONResponse({
+        "success": True,
+        "conversation_id": conversation_id,
+        "flow_ref": flow_ref,
+        "flow": flow_encoder.encode(flow)
+    })
+
 @router.post("/chat/clear")
-async def clear_chat_history():
-    """Clear the chat conversation history."""
+async def clear_chat_history(conversation_id: Optional[str] = None,
+                             services: ServiceContainer = Depends(ready_services)):
+    """Clear the history of a chat conversation."""
 
-    if not REAL_AI_AVAILABLE:
+    if not services.chat:
         raise HTTPException(
             status_code=503,
             detail="Real AxieStudio AI system not available."
         )
 
     try:
-        real_axiestudio_ai_chat.clear_conversation()
+        if conversation_id:
+            services.chat.clear_conversation(conversation_id)
         return {
             "success": True,
             "message": "Chat history cleared successfully."
@@ -173,17 +272,11 @@ async def clear_chat_history():
         )
 
 @router.get("/templates")
-async def get_available_templates():
+async def get_available_templates(request: Request, services: ServiceContainer = Depends(ready_services)):
     """Get list of available flow templates."""
     
-    try:
-        # Import here to avoid circular imports
-        import sys
-        from pathlib import Path
-        sys.path.append(str(Path(__file__).parent.parent / "axiestudio_core"))
-        
-        from ai.template_flow_generator import template_generator
-        
+    def build():
+        template_generator = services.template_generator
         templates = template_generator.get_available_templates()
         template_info = {}
         
@@ -196,6 +289,10 @@ async def get_available_templates():
             "templates": template_info,
             "count": len(templates)
         }
+    
+    try:
+        # Encoded and compressed once; revalidations are answered with 304
+        return services.responses.get("templates", build).response(request)
         
     except Exception as e:
         return {
@@ -206,19 +303,12 @@ async def get_available_templates():
         }
 
 @router.get("/components")
-async def get_available_components():
+async def get_available_components(request: Request, services: ServiceContainer = Depends(ready_services)):
     """Get list of available AxieStudio components."""
     
-    try:
-        # Import here to avoid circular imports
-        import sys
-        from pathlib import Path
-        sys.path.append(str(Path(__file__).parent.parent / "axiestudio_core"))
-        
-        from ai.flow_indexer import flow_indexer
-        
+    def build():
         components = {}
-        for comp_name, comp_info in flow_indexer.components.items():
+        for comp_name, comp_info in services.flow_indexer.components.items():
             components[comp_name] = {
                 "name": comp_name,
                 "category": comp_info.category,
@@ -231,6 +321,9 @@ async def get_available_components():
             "components": components,
             "count": len(components)
         }
+    
+    try:
+        return services.responses.get("components", build).response(request)
         
     except Exception as e:
         return {
@@ -240,11 +333,46 @@ async def get_available_components():
             "count": 0
         }
 
+@router.get("/components/{component_name}/connections")
+async def get_component_connections(component_name: str, limit: int = 10,
+                                    services: ServiceContainer = Depends(ready_services)):
+    """Suggest what a component can be wired to, from the type-compatibility graph."""
+
+    if not services.flow_indexer:
+        raise HTTPException(
+            status_code=503,
+            detail="Component index not available."
+        )
+
+    suggestions = services.flow_indexer.index.wiring().suggest(component_name, limit=max(1, min(limit, 50)))
+    return ORJSONResponse({"success": True, **suggestions})
+
+@router.get("/cache/stats")
+async def get_cache_stats(services: ServiceContainer = Depends(ready_services)):
+    """Get generation cache hit/miss metrics."""
+    
+    stats = services.generation_cache.stats()
+    stats["single_flight"] = {"flow_service": services.flow_service.single_flight.stats()}
+    if services.chat:
+        stats["single_flight"]["chat"] = services.chat.single_flight.stats()
+    stats["responses"] = {"payloads": services.responses.stats(), "flow_encoder": flow_encoder.stats()}
+    if services.model_policy:
+        stats["models"] = services.model_policy.stats()
+        stats["llm"] = services.model_policy.llm.stats()
+    intent_classifier = get_intent_classifier()
+    if intent_classifier:
+        stats["intent_classifier"] = intent_classifier.stats()
+    
+    return {
+        "success": True,
+        "stats": stats
+    }
+
 @router.get("/status", response_model=HealthResponse)
-async def get_service_status():
+async def get_service_status(services: ServiceContainer = Depends(ready_services)):
     """Get detailed service status."""
     
-    status = flow_service.get_status()
+    status = services.flow_service.get_status()
     
     return HealthResponse(
         status="healthy" if status["initialized"] else "unhealthy",
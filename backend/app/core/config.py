@@ -29,11 +29,57 @@ class Settings(BaseSettings):
     # AxieStudio Configuration
     AXIESTUDIO_DATA_PATH: str = "axiestudio_core/axiestudio"
     AI_SERVICES_PATH: str = "axiestudio_core/ai"
+    KNOWLEDGE_INDEX_PATH: str = ""  # Defaults to <AXIESTUDIO_DATA_PATH>/knowledge_index.pickle
+    KNOWLEDGE_INDEX_WORKERS: int = 1  # Parser processes for changed modules (0 = one per core)
     
     # Generation Settings
     DEFAULT_MODEL: str = "gpt-4"
     MAX_COMPONENTS: int = 20
-    GENERATION_TIMEOUT: int = 30
+    GENERATION_TIMEOUT: int = 30  # Deadline (seconds) of each LLM call and of a whole flow generation
+    CHAT_PIPELINED: bool = True
+    CHAT_SPECULATIVE: bool = False
+    PROMPT_KNOWLEDGE_TOKENS: int = 400  # Token budget for packed component/flow knowledge
+    PROMPT_TEMPLATE_TOKENS: int = 1500  # Token budget for the template skeleton in customisation prompts
+    STRUCTURED_OUTPUT: bool = True  # Request flows and component lists through function calling
+    
+    # Model policy per pipeline stage: model (empty = DEFAULT_MODEL), latency budget in seconds and
+    # cost budget in completion tokens. A call over its latency budget is retried once on FALLBACK_MODEL.
+    INTENT_MODEL: str = "gpt-4o-mini"
+    INTENT_LATENCY_BUDGET: float = 5.0
+    INTENT_MAX_TOKENS: int = 500
+    CHAT_REPLY_MODEL: str = "gpt-4o-mini"
+    CHAT_REPLY_LATENCY_BUDGET: float = 10.0
+    CHAT_REPLY_MAX_TOKENS: int = 300
+    COMPONENT_SELECTION_MODEL: str = ""
+    COMPONENT_SELECTION_LATENCY_BUDGET: float = 15.0
+    COMPONENT_SELECTION_MAX_TOKENS: int = 1500
+    FLOW_CUSTOMIZATION_MODEL: str = ""
+    FLOW_CUSTOMIZATION_LATENCY_BUDGET: float = 25.0
+    FLOW_CUSTOMIZATION_MAX_TOKENS: int = 3000
+    FALLBACK_MODEL: str = "gpt-4o-mini"  # Empty disables the fallback
+    
+    # LLM call resilience
+    LLM_MAX_CONCURRENCY: int = 8  # In-flight calls per model; further calls wait for a slot
+    LLM_HEDGE_PERCENTILE: float = 0.95  # Duplicate async calls slower than this latency percentile (0 disables)
+    LLM_CIRCUIT_FAILURES: int = 5  # Consecutive provider failures that open a model's circuit (its calls go to fallbacks)
+    LLM_CIRCUIT_RESET_SECONDS: float = 30.0  # Time before an open circuit lets a probe call through
+    INTENT_CONFIDENCE_THRESHOLD: float = 0.8  # Local intent classifier confidence that skips the LLM (above 1 disables)
+    
+    # Startup (services warm in the background; requests wait this long before a 503)
+    STARTUP_WAIT_TIMEOUT: float = 30.0
+    
+    # Conversation Store ("memory" or "sqlite:///path/to/conversations.db")
+    CONVERSATION_STORE_URL: str = "memory"
+    CONVERSATION_MAX_SESSIONS: int = 10000
+    CONVERSATION_TTL_SECONDS: int = 3600
+    CONVERSATION_MAX_MESSAGES: int = 50
+    CONVERSATION_CONTEXT_TOKENS: int = 600  # Token cap for conversation summary + recent turns in prompts
+    CHAT_EDIT_MODE: bool = True  # Follow-ups patch the current flow instead of regenerating it
+    
+    # Generation Cache (GENERATION_CACHE_PATH enables the on-disk SQLite tier)
+    GENERATION_CACHE_SIZE: int = 1024
+    GENERATION_CACHE_TTL_SECONDS: int = 3600
+    GENERATION_CACHE_PATH: str = ""
     
     class Config:
         case_sensitive = True
@@ -0,0 +1,217 @@
+"""
+Service container - builds the AI services once, off the import path
+
+Indexing the component tree and loading the starter projects takes seconds,
+so the container builds everything in a worker thread after the app starts
+accepting health checks. ``/ready`` reports when the indexes are warm, and
+request handlers wait for readiness (up to ``STARTUP_WAIT_TIMEOUT``) through
+the ``ready_services`` dependency.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+# Add axiestudio_core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "axiestudio_core"))
+
+from ai.conversation_store import create_conversation_store
+from app.core.config import Settings, settings
+from app.core.responses import ResponseCache
+from app.services.flow_service import FlowGenerationService
+
+
+class ServiceContainer:
+    """Owns the process-wide AI services and their warm-up."""
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.flow_indexer = None
+        self.template_generator = None
+        self.super_ai_generator = None
+        self.chat = None
+        self.model_policy = None
+        self.generation_cache = None
+        self.flow_service: Optional[FlowGenerationService] = None
+        # Pre-encoded bodies of the read-only endpoints (templates, components)
+        self.responses = ResponseCache()
+        self.errors: Dict[str, str] = {}
+        self.warmup_time: Optional[float] = None
+        self.ready = False
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> "asyncio.Task":
+        """Start warming the services in the background (idempotent)."""
+        if self._task is None:
+            self._ready = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._warm())
+        return self._task
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the services are built; False if the timeout expires first."""
+        self.start()
+        if self.ready:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(self._ready.wait()), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def stop(self):
+        """Wait for an in-progress warm-up so shutdown never races the worker thread."""
+        if self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)
+
+    async def _warm(self):
+        start_time = time.time()
+        try:
+            await asyncio.to_thread(self._build)
+        except Exception as e:
+            self.errors["container"] = str(e)
+            print(f"⚠️ Service warm-up failed: {e}")
+        self.warmup_time = time.time() - start_time
+        self.ready = True
+        self._ready.set()
+        print(f"✅ Services ready in {self.warmup_time:.2f}s")
+
+    def _build(self):
+        """Build every service; a failing service is recorded, not fatal."""
+        from ai.ai_knowledge_processor import get_ai_knowledge_processor
+        from ai.generation_cache import GenerationCache, get_generation_cache
+        from ai.flow_indexer import get_flow_indexer
+        from ai.knowledge_index import configure_knowledge_index
+        from ai.real_axiestudio_ai_chat import RealAxieStudioAIChat
+        from ai.super_ai_generator import SuperAIFlowGenerator
+        from ai.template_flow_generator import get_template_generator
+
+        api_key = self.settings.OPENAI_API_KEY or None
+        configure_knowledge_index(
+            cache_path=self.settings.KNOWLEDGE_INDEX_PATH or None,
+            workers=self.settings.KNOWLEDGE_INDEX_WORKERS
+        )
+        # One policy for every generator, so per-stage stats cover all of them
+        self.model_policy = self._try_build("model_policy", self._build_model_policy)
+        # Memory-only if the on-disk tier cannot be opened
+        self.generation_cache = self._try_build(
+            "generation_cache",
+            lambda: GenerationCache(
+                max_entries=self.settings.GENERATION_CACHE_SIZE,
+                ttl_seconds=self.settings.GENERATION_CACHE_TTL_SECONDS,
+                disk_path=self.settings.GENERATION_CACHE_PATH or None
+            )
+        ) or get_generation_cache()
+
+        self.flow_indexer = self._try_build("flow_indexer", get_flow_indexer)
+        self.template_generator = self._try_build("template_generator", get_template_generator)
+
+        if api_key:
+            self.super_ai_generator = self._try_build(
+                "super_ai_generator",
+                lambda: SuperAIFlowGenerator(
+                    api_key=api_key,
+                    processor=get_ai_knowledge_processor(),
+                    template_generator=self.template_generator,
+                    structured_output=self.settings.STRUCTURED_OUTPUT,
+                    intent_threshold=self.settings.INTENT_CONFIDENCE_THRESHOLD,
+                    model_policy=self.model_policy,
+                    generation_cache=self.generation_cache
+                )
+            )
+            self.chat = self._try_build(
+                "chat",
+                lambda: RealAxieStudioAIChat(
+                    api_key=api_key,
+                    pipelined=self.settings.CHAT_PIPELINED,
+                    speculative=self.settings.CHAT_SPECULATIVE,
+                    knowledge_budget=self.settings.PROMPT_KNOWLEDGE_TOKENS,
+                    template_budget=self.settings.PROMPT_TEMPLATE_TOKENS,
+                    structured_output=self.settings.STRUCTURED_OUTPUT,
+                    memory_tokens=self.settings.CONVERSATION_CONTEXT_TOKENS,
+                    edit_mode=self.settings.CHAT_EDIT_MODE,
+                    intent_threshold=self.settings.INTENT_CONFIDENCE_THRESHOLD,
+                    model_policy=self.model_policy,
+                    generation_cache=self.generation_cache,
+                    conversation_store=create_conversation_store(
+                        self.settings.CONVERSATION_STORE_URL,
+                        max_sessions=self.settings.CONVERSATION_MAX_SESSIONS,
+                        ttl_seconds=self.settings.CONVERSATION_TTL_SECONDS,
+                        max_messages=self.settings.CONVERSATION_MAX_MESSAGES
+                    )
+                )
+            )
+        else:
+            self.errors["ai"] = "OpenAI API key not configured"
+
+        self.flow_service = FlowGenerationService(
+            template_generator=self.template_generator,
+            super_ai_generator=self.super_ai_generator,
+            flow_indexer=self.flow_indexer,
+            generation_timeout=self.settings.GENERATION_TIMEOUT
+        )
+
+    def _build_model_policy(self):
+        """Per-stage models and budgets from the ``<STAGE>_MODEL/_LATENCY_BUDGET/_MAX_TOKENS`` settings."""
+        from ai.llm_client import ResilientLLM
+        from ai.model_policy import STAGES, ModelPolicy, StagePolicy
+
+        llm = ResilientLLM(
+            deadline=self.settings.GENERATION_TIMEOUT,
+            max_concurrency=self.settings.LLM_MAX_CONCURRENCY,
+            hedge_percentile=self.settings.LLM_HEDGE_PERCENTILE or None,
+            failure_threshold=self.settings.LLM_CIRCUIT_FAILURES,
+            reset_timeout=self.settings.LLM_CIRCUIT_RESET_SECONDS
+        )
+        return ModelPolicy({
+            stage: StagePolicy(
+                getattr(self.settings, f"{stage.upper()}_MODEL") or self.settings.DEFAULT_MODEL,
+                latency_budget=getattr(self.settings, f"{stage.upper()}_LATENCY_BUDGET"),
+                max_tokens=getattr(self.settings, f"{stage.upper()}_MAX_TOKENS"),
+                fallback=self.settings.FALLBACK_MODEL or None
+            )
+            for stage in STAGES
+        }, llm=llm)
+
+    def _try_build(self, name: str, factory: Callable[[], Any]) -> Any:
+        try:
+            return factory()
+        except Exception as e:
+            self.errors[name] = str(e)
+            print(f"⚠️ Could not build {name}: {e}")
+            return None
+
+    def status(self) -> Dict[str, Any]:
+        """Get readiness details for ``/ready``."""
+        return {
+            "ready": self.ready,
+            "warmup_time": self.warmup_time,
+            "services": {
+                "flow_indexer": self.flow_indexer is not None,
+                "template_generator": self.template_generator is not None,
+                "super_ai_generator": self.super_ai_generator is not None,
+                "chat": self.chat is not None
+            },
+            "components_count": len(self.flow_indexer.components) if self.flow_indexer else 0,
+            "templates_count": self.flow_service.templates_count if self.flow_service else 0,
+            "errors": self.errors
+        }
+
+
+# Global container
+container = ServiceContainer(settings)
+
+
+async def ready_services() -> ServiceContainer:
+    """FastAPI dependency: the container once warm, or a 503 while it warms up."""
+    if not await container.wait_ready(settings.STARTUP_WAIT_TIMEOUT):
+        raise HTTPException(
+            status_code=503,
+            detail="Services are warming up. Retry shortly.",
+            headers={"Retry-After": "5"}
+        )
+    return container
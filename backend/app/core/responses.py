@@ -0,0 +1,205 @@
+"""
+Fast JSON responses
+
+- ``ORJSONResponse`` encodes with orjson (the app's default response class).
+  ``RawJSON`` values inside the content are spliced in verbatim, so large
+  documents that are already encoded are not encoded again.
+- ``ResponseCache`` keeps pre-encoded, pre-compressed bodies for read-mostly
+  endpoints (gzip with the settings of ``axiestudio_utils.compression``,
+  plus brotli when installed) and serves them with a weak ETag, answering
+  ``If-None-Match`` revalidations with 304.
+- ``FlowEncoder`` encodes generated flows, reusing the bytes of large
+  subtrees it has encoded before. Template graphs are shared copy-on-write
+  and cached generations are returned as the same objects, so most flows
+  are assembled from cached bytes.
+"""
+
+import gzip
+import hashlib
+import secrets
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+GZIP_LEVEL = 6
+# Bodies below this size are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+_RAW_MARKER = f"__raw_json_{secrets.token_hex(8)}_"
+
+
+class RawJSON:
+    """Already-encoded JSON, spliced verbatim by :func:`dumps`."""
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def dumps(content: Any) -> bytes:
+    """Encode with orjson; sets become lists, unknown objects strings, ``RawJSON`` is inlined."""
+    fragments = []
+
+    def default(obj: Any) -> Any:
+        if isinstance(obj, RawJSON):
+            fragments.append(obj.data)
+            return f"{_RAW_MARKER}{len(fragments) - 1}"
+        if isinstance(obj, (set, frozenset)):
+            return list(obj)
+        return str(obj)
+
+    body = orjson.dumps(content, default=default, option=orjson.OPT_NON_STR_KEYS)
+    for index, fragment in enumerate(fragments):
+        body = body.replace(f'"{_RAW_MARKER}{index}"'.encode(), fragment, 1)
+    return body
+
+
+class ORJSONResponse(Response):
+    """JSON response encoded with orjson."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@dataclass(frozen=True)
+class EncodedPayload:
+    """A JSON body encoded once, with its compressed variants and ETag."""
+    body: bytes
+    encodings: Dict[str, bytes]  # Content-Encoding -> compressed body
+    etag: str
+
+    @classmethod
+    def encode(cls, content: Any) -> "EncodedPayload":
+        body = dumps(content)
+        encodings = {}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            if brotli is not None:
+                encodings["br"] = brotli.compress(body)
+            encodings["gzip"] = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        # Weak: the compressed variants are the same resource, not the same bytes
+        etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        return cls(body, encodings, etag)
+
+    def response(self, request: Request) -> Response:
+        """Serve the payload: 304 for a matching If-None-Match, else the best accepted encoding."""
+        headers = {"ETag": self.etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), self.etag):
+            return Response(status_code=304, headers=headers)
+
+        coding = _negotiate(request.headers.get("accept-encoding", ""), self.encodings)
+        if coding:
+            headers["Content-Encoding"] = coding
+            return Response(self.encodings[coding], media_type="application/json", headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """Encoded payloads by key, built on first request.
+
+    Owned by the service container: the data behind these endpoints does not
+    change once the services are warm.
+    """
+
+    def __init__(self):
+        self._payloads: Dict[str, EncodedPayload] = {}
+
+    def get(self, key: str, build: Callable[[], Any]) -> EncodedPayload:
+        payload = self._payloads.get(key)
+        if payload is None:
+            payload = self._payloads[key] = EncodedPayload.encode(build())
+        return payload
+
+    def stats(self) -> Dict[str, Any]:
+        return {key: {"bytes": len(payload.body),
+                      **{coding: len(body) for coding, body in payload.encodings.items()}}
+                for key, payload in self._payloads.items()}
+
+
+class FlowEncoder:
+    """Encodes flows to ``RawJSON``, reusing the bytes of large top-level subtrees by identity.
+
+    Identity is safe because the encoder holds a reference to every cached
+    subtree (its id cannot be reused while cached) and flows are read-only
+    once generated.
+    """
+
+    def __init__(self, max_entries: int = 64, min_size: int = 4096):
+        self.max_entries = max_entries
+        self.min_size = min_size
+        self._entries: "OrderedDict[int, Tuple[Any, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, flow: Dict[str, Any]) -> RawJSON:
+        # Top-level dicts are usually new (copy-on-write instances, rehydrated
+        # flows), so only their subtrees are cached
+        parts = []
+        for key, value in flow.items():
+            encoded = self._lookup(value) if isinstance(value, (dict, list)) else None
+            if encoded is None:
+                encoded = dumps(value)
+                if isinstance(value, (dict, list)):
+                    self._remember(value, encoded)
+            parts.append(dumps(str(key)) + b":" + encoded)
+        return RawJSON(b"{" + b",".join(parts) + b"}")
+
+    def _lookup(self, value: Any) -> Optional[bytes]:
+        entry = self._entries.get(id(value))
+        if entry is not None and entry[0] is value:
+            self._entries.move_to_end(id(value))
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def _remember(self, value: Any, encoded: bytes):
+        if len(encoded) >= self.min_size:
+            self._entries[id(value)] = (value, encoded)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Global flow encoder
+flow_encoder = FlowEncoder()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+
+def _negotiate(accept_encoding: str, encodings: Dict[str, bytes]) -> Optional[str]:
+    """Pick the best available content coding the client accepts (br over gzip)."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for coding in ("br", "gzip"):
+        if coding in encodings and accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
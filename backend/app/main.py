@@ -3,6 +3,8 @@ AxieStudio AI Flow Generator - FastAPI Backend
 Production-ready API for generating AxieStudio flows
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -11,17 +13,32 @@ from dotenv import load_dotenv
 
 from app.api.flow_generator import router as flow_router
 from app.core.config import settings
+from app.core.container import container
+from app.core.responses import ORJSONResponse
+from ai.llm_client import close_async_clients
 
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown."""
+    # Build the AI services in the background; /health answers immediately
+    container.start()
+    yield
+    await container.stop()
+    # Release the pooled OpenAI HTTP connections
+    await close_async_clients()
+
 # Create FastAPI app
 app = FastAPI(
     title="AxieStudio AI Flow Generator API",
     description="Production API for generating AxieStudio flows using AI",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS for frontend
@@ -57,9 +74,15 @@ async def health_check():
     return {
         "status": "healthy",
         "openai_configured": bool(os.getenv("OPENAI_API_KEY")),
-        "components_loaded": True  # Will be dynamic later
+        "components_loaded": container.ready and bool(container.flow_indexer)
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint - 200 once the AI services and indexes are warm, 503 before."""
+    status = container.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
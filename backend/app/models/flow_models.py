@@ -22,6 +22,8 @@ class FlowGenerationRequest(BaseModel):
     flow_type: Optional[FlowType] = Field(None, description="Specific flow type (auto-detected if not provided)")
     use_ai: bool = Field(True, description="Use AI for intelligent generation")
     model: str = Field("gpt-4", description="AI model to use")
+    bypass_cache: bool = Field(False, description="Skip the generation cache and always call the AI")
+    conversation_id: Optional[str] = Field(None, description="Chat conversation to continue (a new one if not given)")
     
     class Config:
         json_schema_extra = {
@@ -29,7 +31,8 @@ class FlowGenerationRequest(BaseModel):
                 "description": "Create a chatbot that answers questions about PDF documents",
                 "flow_type": "document_qa",
                 "use_ai": True,
-                "model": "gpt-4"
+                "model": "gpt-4",
+                "bypass_cache": False
             }
         }
 
@@ -2,46 +2,49 @@
 Flow generation service - Core business logic
 """
 
+import asyncio
 import sys
 import os
 import time
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 # Add axiestudio_core to path
 axiestudio_core_path = str(Path(__file__).parent.parent.parent / "axiestudio_core")
 sys.path.insert(0, axiestudio_core_path)
 print(f"DEBUG: Added to path: {axiestudio_core_path}")
 
-try:
-    from ai.template_flow_generator import template_generator
-    from ai.super_ai_generator import super_ai_generator
-    from ai.flow_indexer import flow_indexer
-except ImportError as e:
-    print(f"Warning: Could not import AI modules: {e}")
-    template_generator = None
-    super_ai_generator = None
-    flow_indexer = None
+from ai.generation_cache import make_cache_key
+from ai.single_flight import SingleFlight
 
 class FlowGenerationService:
-    """Service for generating AxieStudio flows."""
+    """Service for generating AxieStudio flows.
     
-    def __init__(self):
+    Generators are injected by the service container once they are built,
+    so importing this module never triggers indexing.
+    """
+    
+    def __init__(self, template_generator=None, super_ai_generator=None, flow_indexer=None,
+                 generation_timeout: Optional[float] = None):
+        self.template_generator = template_generator
+        self.super_ai_generator = super_ai_generator
+        self.flow_indexer = flow_indexer
+        # AI generations running longer fall back to templates (None = no limit)
+        self.generation_timeout = generation_timeout
         self.initialized = False
+        self.single_flight = SingleFlight()
         self._initialize()
     
     def _initialize(self):
         """Initialize the service."""
         try:
-            if template_generator:
-                # Template generator initializes automatically
-                self.templates_count = len(template_generator.get_available_templates())
+            if self.template_generator:
+                self.templates_count = len(self.template_generator.get_available_templates())
             else:
                 self.templates_count = 0
                 
-            if flow_indexer:
-                # Flow indexer initializes automatically
-                self.components_count = len(flow_indexer.components)
+            if self.flow_indexer:
+                self.components_count = len(self.flow_indexer.components)
             else:
                 self.components_count = 0
                 
@@ -52,8 +55,26 @@ class FlowGenerationService:
             print(f"⚠️ Flow service initialization failed: {e}")
             self.initialized = False
     
-    async def generate_flow(self, description: str, flow_type: str = None, use_ai: bool = True) -> Dict[str, Any]:
-        """Generate a flow based on description."""
+    async def generate_flow(self, description: str, flow_type: str = None, use_ai: bool = True,
+                            use_cache: bool = True) -> Dict[str, Any]:
+        """Generate a flow based on description.
+        
+        Concurrent cacheable requests for the same description share one
+        in-flight generation.
+        """
+        
+        if not use_cache:
+            return await self._generate_flow(description, flow_type, use_ai, use_cache)
+        
+        key = make_cache_key("flow_service", description, flow_type, "ai" if use_ai else "template")
+        result, _ = await self.single_flight.do(
+            key, lambda: self._generate_flow(description, flow_type, use_ai, use_cache)
+        )
+        return result
+    
+    async def _generate_flow(self, description: str, flow_type: str, use_ai: bool,
+                             use_cache: bool) -> Dict[str, Any]:
+        """Generate a flow without request coalescing."""
         
         start_time = time.time()
         
@@ -62,18 +83,27 @@ class FlowGenerationService:
                 raise Exception("Flow service not initialized")
             
             # Use super AI generator if available
-            if super_ai_generator and use_ai:
+            flow_data = None
+            if self.super_ai_generator and use_ai:
                 print(f"🚀 Generating flow with AI: {description}")
-                flow_data = super_ai_generator.generate_flow_super_fast(description)
+                try:
+                    flow_data = await asyncio.wait_for(
+                        self.super_ai_generator.agenerate_flow_super_fast(description, use_cache=use_cache),
+                        self.generation_timeout
+                    )
+                except asyncio.TimeoutError:
+                    if not self.template_generator:
+                        raise Exception(f"Flow generation exceeded {self.generation_timeout}s")
+                    print(f"⏱️ AI generation exceeded {self.generation_timeout}s, falling back to templates")
+                    use_ai = False
             
             # Fallback to template generator
-            elif template_generator:
+            if flow_data is None:
+                if not self.template_generator:
+                    raise Exception("No flow generators available")
                 print(f"📋 Generating flow with templates: {description}")
                 use_case = flow_type or "basic_chat"
-                flow_data = template_generator.generate_flow(description, use_case)
-            
-            else:
-                raise Exception("No flow generators available")
+                flow_data = self.template_generator.generate_flow(description, use_case)
             
             # Extract components info
             components = self._extract_components_info(flow_data)
@@ -131,9 +161,7 @@ class FlowGenerationService:
             "initialized": self.initialized,
             "components_count": self.components_count,
             "templates_count": self.templates_count,
-            "ai_available": super_ai_generator is not None,
-            "templates_available": template_generator is not None
+            "ai_available": self.super_ai_generator is not None,
+            "single_flight": self.single_flight.stats(),
+            "templates_available": self.template_generator is not None
         }
-
-# Global service instance
-flow_service = FlowGenerationService()
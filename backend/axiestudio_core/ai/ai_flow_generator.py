@@ -9,23 +9,45 @@ import json
 import os
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
-from openai import OpenAI
 from pathlib import Path
 
-from .component_kb import component_kb
-from .flow_indexer import flow_indexer
+from .component_kb import AxieStudioComponentKB, get_component_kb
+from .flow_indexer import FlowIndexer, get_flow_indexer
+from .intent_classifier import DEFAULT_THRESHOLD, USE_CASES, get_intent_classifier
+from .json_repair import parse_json
+from .llm_client import get_async_openai_client, get_openai_client
+from .model_policy import COMPONENT_SELECTION, FLOW_CUSTOMIZATION, INTENT, ModelPolicy
+
+# Capabilities reported for use cases recognised by the local intent classifier
+USE_CASE_CAPABILITIES = {
+    "basic_chat": ["conversation"],
+    "document_qa": ["file_processing", "embeddings"],
+    "agent_tools": ["tools", "reasoning"],
+    "rag_system": ["embeddings", "retrieval"],
+    "data_processing": ["file_processing", "data_transformation"],
+}
 
 class AIFlowGenerator:
     """Production AI-powered flow generator using OpenAI for intelligent flow creation."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None,
+                 component_kb: Optional[AxieStudioComponentKB] = None,
+                 flow_indexer: Optional[FlowIndexer] = None,
+                 intent_threshold: float = DEFAULT_THRESHOLD,
+                 model_policy: Optional[ModelPolicy] = None):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key required. Set OPENAI_API_KEY environment variable.")
 
-        self.client = OpenAI(api_key=self.api_key)
-        self.component_kb = component_kb
-        self.flow_indexer = flow_indexer
+        self.client = get_openai_client(self.api_key)
+        self.async_client = get_async_openai_client(self.api_key)
+        # Model, latency and token budgets per pipeline stage
+        self.models = model_policy or ModelPolicy()
+        self.component_kb = component_kb or get_component_kb()
+        self.flow_indexer = flow_indexer or get_flow_indexer()
+        # Use cases the local classifier is sure about skip the LLM round trip
+        self.intent_classifier = get_intent_classifier()
+        self.intent_threshold = intent_threshold
 
     
     def generate_flow_with_ai(self, user_description: str) -> Dict[str, Any]:
@@ -35,10 +57,7 @@ class AIFlowGenerator:
         intent_analysis = self._analyze_intent_with_ai(user_description)
 
         # Step 2: Find similar flows from index
-        similar_flows_raw = self.flow_indexer.find_similar_flows(user_description, limit=3)
-        similar_flows = [{"name": sf["flow"].name, "description": sf["flow"].description,
-                         "components": sf["flow"].components, "flow_type": sf["flow"].flow_type}
-                        for sf in similar_flows_raw]
+        similar_flows = self._find_similar_flows(user_description)
 
         # Step 3: Select optimal components with AI
         component_selection = self._select_components_with_ai(
@@ -55,8 +74,92 @@ class AIFlowGenerator:
         
         return flow_json
     
+    async def agenerate_flow_with_ai(self, user_description: str) -> Dict[str, Any]:
+        """Async variant of :meth:`generate_flow_with_ai` for use inside the event loop."""
+        
+        intent_analysis = await self._aanalyze_intent_with_ai(user_description)
+        similar_flows = self._find_similar_flows(user_description)
+        component_selection = await self._aselect_components_with_ai(
+            user_description, intent_analysis, similar_flows
+        )
+        flow_structure = await self._agenerate_flow_structure_with_ai(
+            user_description, component_selection, similar_flows
+        )
+        
+        return self._create_flow_json(flow_structure, user_description)
+    
+    def _find_similar_flows(self, user_description: str) -> List[Dict]:
+        """Find similar flows from index in prompt-ready form."""
+        similar_flows_raw = self.flow_indexer.find_similar_flows(user_description, limit=3)
+        return [{"name": sf["flow"].name, "description": sf["flow"].description,
+                 "components": sf["flow"].components, "flow_type": sf["flow"].flow_type}
+                for sf in similar_flows_raw]
+    
+    def _complete(self, stage: str, system_prompt: str, user_prompt: str, **params: Any) -> str:
+        """Run a system + user chat completion on the stage's model and return the content."""
+        response = self.models.complete(
+            self.client, stage,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            **params
+        )
+        return response.choices[0].message.content
+    
+    async def _acomplete(self, stage: str, system_prompt: str, user_prompt: str, **params: Any) -> str:
+        """Async variant of :meth:`_complete` on the shared pooled client."""
+        response = await self.models.acomplete(
+            self.async_client, stage,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            **params
+        )
+        return response.choices[0].message.content
+    
     def _analyze_intent_with_ai(self, user_description: str) -> Dict[str, Any]:
-        """Use AI to analyze user intent and extract requirements."""
+        """Use AI to analyze user intent and extract requirements, unless the local classifier is confident."""
+        
+        intent = self._local_intent(user_description)
+        if intent:
+            return intent
+        
+        try:
+            content = self._complete(INTENT, *self._intent_prompts(user_description), temperature=0.3, max_tokens=1000)
+            return parse_json(content)
+
+        except Exception:
+            # Fallback to rule-based analysis
+            return self._fallback_intent_analysis(user_description)
+    
+    async def _aanalyze_intent_with_ai(self, user_description: str) -> Dict[str, Any]:
+        """Async variant of :meth:`_analyze_intent_with_ai`."""
+        
+        intent = self._local_intent(user_description)
+        if intent:
+            return intent
+        
+        try:
+            content = await self._acomplete(INTENT, *self._intent_prompts(user_description), temperature=0.3, max_tokens=1000)
+            return parse_json(content)
+
+        except Exception:
+            return self._fallback_intent_analysis(user_description)
+    
+    def _local_intent(self, user_description: str) -> Optional[Dict[str, Any]]:
+        """Use case from the local classifier, or None if it is not confident enough."""
+        
+        if self.intent_classifier is None:
+            return None
+        use_case = self.intent_classifier.classify(user_description, self.intent_threshold, labels=USE_CASES)
+        if use_case is None:
+            return None
+        return {"primary_use_case": use_case, "capabilities": USE_CASE_CAPABILITIES[use_case], "source": "local"}
+    
+    def _intent_prompts(self, user_description: str) -> Tuple[str, str]:
+        """Build system and user prompts for intent analysis."""
         
         system_prompt = """You are an expert AxieStudio flow architect. Analyze user requirements and extract:
 1. Primary use case (document_qa, agent_tools, basic_chat, data_processing, etc.)
@@ -82,29 +185,40 @@ Available AxieStudio component categories:
 
 Provide detailed analysis in JSON format."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=1000
-            )
-
-            content = response.choices[0].message.content
-            return json.loads(content)
-
-        except Exception:
-            # Fallback to rule-based analysis
-            return self._fallback_intent_analysis(user_description)
+        return system_prompt, user_prompt
     
     def _select_components_with_ai(self, user_description: str,
                                        intent_analysis: Dict[str, Any],
                                        similar_flows: List[Dict]) -> List[str]:
         """Use AI to select optimal components based on requirements."""
         
+        try:
+            prompts = self._component_selection_prompts(user_description, intent_analysis, similar_flows)
+            components = parse_json(self._complete(COMPONENT_SELECTION, *prompts, temperature=0.2, max_tokens=1500))
+            return components if isinstance(components, list) else []
+
+        except Exception:
+            # Fallback to rule-based selection
+            return self._fallback_component_selection(intent_analysis)
+    
+    async def _aselect_components_with_ai(self, user_description: str,
+                                          intent_analysis: Dict[str, Any],
+                                          similar_flows: List[Dict]) -> List[str]:
+        """Async variant of :meth:`_select_components_with_ai`."""
+        
+        try:
+            prompts = self._component_selection_prompts(user_description, intent_analysis, similar_flows)
+            components = parse_json(await self._acomplete(COMPONENT_SELECTION, *prompts, temperature=0.2, max_tokens=1500))
+            return components if isinstance(components, list) else []
+
+        except Exception:
+            return self._fallback_component_selection(intent_analysis)
+    
+    def _component_selection_prompts(self, user_description: str,
+                                     intent_analysis: Dict[str, Any],
+                                     similar_flows: List[Dict]) -> Tuple[str, str]:
+        """Build system and user prompts for component selection."""
+        
         # Get all available components
         available_components = []
         for comp in self.component_kb.components.values():
@@ -143,30 +257,38 @@ Available Components: {json.dumps(available_components, indent=2)}
 
 Return JSON array of component names in optimal execution order."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.2,
-                max_tokens=1500
-            )
-
-            content = response.choices[0].message.content
-            components = json.loads(content)
-            return components if isinstance(components, list) else []
-
-        except Exception:
-            # Fallback to rule-based selection
-            return self._fallback_component_selection(intent_analysis)
+        return system_prompt, user_prompt
     
     def _generate_flow_structure_with_ai(self, user_description: str,
                                              components: List[str],
                                              similar_flows: List[Dict]) -> Dict[str, Any]:
         """Use AI to generate the complete flow structure with connections."""
         
+        try:
+            prompts = self._flow_structure_prompts(user_description, components, similar_flows)
+            return parse_json(self._complete(FLOW_CUSTOMIZATION, *prompts, temperature=0.1, max_tokens=3000))
+
+        except Exception:
+            # Fallback to template-based generation
+            return self._fallback_flow_structure(components, user_description)
+    
+    async def _agenerate_flow_structure_with_ai(self, user_description: str,
+                                                components: List[str],
+                                                similar_flows: List[Dict]) -> Dict[str, Any]:
+        """Async variant of :meth:`_generate_flow_structure_with_ai`."""
+        
+        try:
+            prompts = self._flow_structure_prompts(user_description, components, similar_flows)
+            return parse_json(await self._acomplete(FLOW_CUSTOMIZATION, *prompts, temperature=0.1, max_tokens=3000))
+
+        except Exception:
+            return self._fallback_flow_structure(components, user_description)
+    
+    def _flow_structure_prompts(self, user_description: str,
+                                components: List[str],
+                                similar_flows: List[Dict]) -> Tuple[str, str]:
+        """Build system and user prompts for flow structure generation."""
+        
         system_prompt = """You are an expert AxieStudio flow designer. Create a complete flow structure 
 with nodes and edges (connections) based on selected components.
 
@@ -203,23 +325,7 @@ Similar Flow Examples: {json.dumps(similar_flows, indent=2)}
 
 Create complete AxieStudio flow JSON with nodes, edges, and proper connections."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1,
-                max_tokens=3000
-            )
-
-            content = response.choices[0].message.content
-            return json.loads(content)
-
-        except Exception:
-            # Fallback to template-based generation
-            return self._fallback_flow_structure(components, user_description)
+        return system_prompt, user_prompt
     
     def _create_flow_json(self, flow_structure: Dict[str, Any], 
                          user_description: str) -> Dict[str, Any]:
@@ -236,7 +342,7 @@ Create complete AxieStudio flow JSON with nodes, edges, and proper connections."
             "last_tested_version": "1.0.0",
             "metadata": {
                 "generated_by": "AI Flow Generator",
-                "generation_method": "OpenAI GPT-4",
+                "generation_method": f"OpenAI {self.models.model(FLOW_CUSTOMIZATION)}",
                 "user_description": user_description
             }
         }
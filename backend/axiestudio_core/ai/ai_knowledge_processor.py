@@ -7,11 +7,12 @@ Creates "spoon-fed" data that AI can consume instantly without processing overhe
 
 import json
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from pathlib import Path
 from dataclasses import dataclass, asdict
 
-from .flow_indexer import flow_indexer
+from .flow_indexer import FlowIndexer, get_flow_indexer
+from .lazy_instance import LazyInstance
 
 @dataclass
 class AIOptimizedComponent:
@@ -23,9 +24,10 @@ class AIOptimizedComponent:
     primary_use_cases: List[str]
     input_types: List[str]
     output_types: List[str]
-    common_connections: List[str]
+    common_connections: List[str]  # Component names, from the wiring index
     ai_selection_keywords: List[str]
     complexity_score: int  # 1-5 scale
+    connection_categories: List[str]  # Likely categories, for components without typed handles
 
 @dataclass
 class AIOptimizedFlow:
@@ -42,7 +44,10 @@ class AIOptimizedFlow:
 class AIKnowledgeProcessor:
     """Processes raw AxieStudio data into AI-optimized format."""
     
-    def __init__(self):
+    def __init__(self, indexer: Optional[FlowIndexer] = None, export_dir: Optional[str] = None):
+        self.indexer = indexer or get_flow_indexer()
+        self.wiring = self.indexer.index.wiring()
+        self.export_dir = export_dir
         self.optimized_components: Dict[str, AIOptimizedComponent] = {}
         self.optimized_flows: Dict[str, AIOptimizedFlow] = {}
         self.ai_prompt_templates = {}
@@ -67,14 +72,15 @@ class AIKnowledgeProcessor:
         # Create selection rules
         self._create_selection_rules()
         
-        # Save optimized data
-        self._save_optimized_data()
+        # Save optimized data (opt-in: the flows export duplicates every starter project)
+        if self.export_dir:
+            self._save_optimized_data(self.export_dir)
         
         print(f"✅ AI optimization complete: {len(self.optimized_components)} components, {len(self.optimized_flows)} flows")
     
     def _optimize_components(self):
         """Convert raw components to AI-optimized format."""
-        for comp_name, comp_info in flow_indexer.components.items():
+        for comp_name, comp_info in self.indexer.components.items():
             # Extract AI-relevant keywords
             ai_keywords = self._extract_ai_keywords(comp_info.description, comp_info.use_cases)
             
@@ -83,6 +89,7 @@ class AIKnowledgeProcessor:
             
             # Determine common connections
             connections = self._determine_connections(comp_info)
+            connection_categories = [] if connections else self._connection_categories(comp_info)
             
             optimized = AIOptimizedComponent(
                 name=comp_info.name,
@@ -94,14 +101,15 @@ class AIKnowledgeProcessor:
                 output_types=[out.get("type", "unknown") for out in comp_info.outputs],
                 common_connections=connections,
                 ai_selection_keywords=ai_keywords,
-                complexity_score=complexity
+                complexity_score=complexity,
+                connection_categories=connection_categories
             )
             
             self.optimized_components[comp_name] = optimized
     
     def _optimize_flows(self):
         """Convert raw flows to AI-optimized format."""
-        for flow_name, flow_info in flow_indexer.flows.items():
+        for flow_name, flow_info in self.indexer.flows.items():
             # Extract AI pattern keywords
             pattern_keywords = self._extract_flow_patterns(flow_info)
             
@@ -164,10 +172,12 @@ class AIKnowledgeProcessor:
         return min(score, 5)
     
     def _determine_connections(self, comp_info) -> List[str]:
-        """Determine common component connections."""
-        connections = []
+        """Components this one can be wired to, from the type-compatibility graph."""
+        return self.wiring.connectable(comp_info.name)
+    
+    def _connection_categories(self, comp_info) -> List[str]:
+        """Likely categories to connect to, for components that never appear in a starter project."""
         
-        # Based on category, determine likely connections
         connection_patterns = {
             'INPUT_OUTPUT': ['MODELS', 'PROCESSING'],
             'MODELS': ['INPUT_OUTPUT', 'AGENTS', 'PROCESSING'],
@@ -263,20 +273,22 @@ Generate complete flow JSON structure.
             'data_processing': ['FileComponent', 'DataProcessor', 'TextSplitter', 'OutputComponent']
         }
     
-    def _save_optimized_data(self):
-        """Save optimized data to files for fast loading."""
+    def _save_optimized_data(self, export_dir: str):
+        """Save optimized data to files for inspection."""
+        export_path = Path(export_dir)
+        
         # Save components
         components_data = {name: asdict(comp) for name, comp in self.optimized_components.items()}
-        with open('ai_optimized_components.json', 'w', encoding='utf-8') as f:
+        with open(export_path / 'ai_optimized_components.json', 'w', encoding='utf-8') as f:
             json.dump(components_data, f, indent=2, ensure_ascii=False)
         
         # Save flows
         flows_data = {name: asdict(flow) for name, flow in self.optimized_flows.items()}
-        with open('ai_optimized_flows.json', 'w', encoding='utf-8') as f:
+        with open(export_path / 'ai_optimized_flows.json', 'w', encoding='utf-8') as f:
             json.dump(flows_data, f, indent=2, ensure_ascii=False)
         
         # Save prompts and rules
-        with open('ai_prompts_and_rules.json', 'w', encoding='utf-8') as f:
+        with open(export_path / 'ai_prompts_and_rules.json', 'w', encoding='utf-8') as f:
             json.dump({
                 'prompts': self.ai_prompt_templates,
                 'selection_rules': self.component_selection_rules
@@ -300,7 +312,8 @@ Generate complete flow JSON structure.
                 'category': comp.category,
                 'keywords': comp.ai_selection_keywords,
                 'complexity': comp.complexity_score,
-                'connections': comp.common_connections
+                'connections': comp.common_connections,
+                'connection_categories': comp.connection_categories
             }
             for name, comp in self.optimized_components.items()
         }
@@ -319,5 +332,17 @@ Generate complete flow JSON structure.
             for name, flow in self.optimized_flows.items()
         }
 
-# Global instance
-ai_knowledge_processor = AIKnowledgeProcessor()
+# Global instance (built on first use, not at import)
+_ai_knowledge_processor = LazyInstance(AIKnowledgeProcessor)
+
+
+def get_ai_knowledge_processor() -> AIKnowledgeProcessor:
+    """Get the shared AIKnowledgeProcessor, building it on first use."""
+    return _ai_knowledge_processor.get()
+
+
+def __getattr__(name):
+    # Keeps ``from .ai_knowledge_processor import ai_knowledge_processor`` working for existing callers
+    if name == "ai_knowledge_processor":
+        return get_ai_knowledge_processor()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -11,6 +11,8 @@ from enum import Enum
 from pathlib import Path
 import json
 
+from .lazy_instance import LazyInstance
+
 class ComponentCategory(Enum):
     INPUT_OUTPUT = "input_output"
     MODELS = "models"
@@ -308,7 +310,8 @@ class AxieStudioComponentKB:
         """Load components from indexed AxieStudio files."""
         try:
             # Load from flow indexer if available
-            from .flow_indexer import flow_indexer
+            from .flow_indexer import get_flow_indexer
+            flow_indexer = get_flow_indexer()
 
             # Add indexed components to our knowledge base
             for comp_name, comp_info in flow_indexer.components.items():
@@ -332,5 +335,17 @@ class AxieStudioComponentKB:
             print(f"⚠️  Could not load indexed components: {e}")
             # Continue with hardcoded components only
 
-# Global instance
-component_kb = AxieStudioComponentKB()
+# Global instance (built on first use, not at import)
+_component_kb = LazyInstance(AxieStudioComponentKB)
+
+
+def get_component_kb() -> AxieStudioComponentKB:
+    """Get the shared AxieStudioComponentKB, building it on first use."""
+    return _component_kb.get()
+
+
+def __getattr__(name):
+    # Keeps ``from .component_kb import component_kb`` working for existing callers
+    if name == "component_kb":
+        return get_component_kb()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,186 @@
+"""
+Conversation Memory
+
+Keeps the conversation context of chat prompts within a token budget, no
+matter how long an editing session runs:
+
+- Generated flows are stored once per session as store artifacts.
+  Messages refer to them by ``flow_ref``, and prompts show a one-line
+  reference instead of the flow.
+- Turns that leave the recent window are folded into a rolling summary one
+  at a time, so every turn is summarised exactly once.
+- The rendered context is capped at ``max_tokens``. The summary gets at
+  most ``summary_share`` of it (dropping its oldest lines but keeping the
+  opening request). Recent turns fill the rest, newest first.
+
+Summaries are extractive by default, so no extra model call is made. Pass
+a ``summarizer`` to fold turns differently.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .conversation_store import ConversationStore
+from .prompt_builder import count_tokens
+
+DEFAULT_MEMORY_TOKENS = 600
+DEFAULT_RECENT_TURNS = 6
+DEFAULT_SUMMARY_SHARE = 0.4
+# Flows kept per conversation; older ones are dropped from the store
+MAX_FLOWS = 5
+
+SUMMARY_CHARS = 160
+TURN_CHARS = 1200
+
+SUMMARY_HEADER = "Summary of earlier conversation:"
+STATE_KEY = "memory"
+FLOW_KEY_PREFIX = "flow:"
+
+Summarizer = Callable[[Dict[str, Any]], str]
+
+
+def summarize_turn(message: Dict[str, Any]) -> str:
+    """One summary line for a message (extractive, local)."""
+    content = " ".join(str(message.get("content", "")).split())
+    if len(content) > SUMMARY_CHARS:
+        content = content[:SUMMARY_CHARS].rsplit(" ", 1)[0] + "..."
+    if message.get("role") == "user":
+        return f"User asked: {content}"
+    if message.get("flow_ref"):
+        return f"Assistant built {_flow_label(message)}"
+    return f"Assistant: {content}"
+
+
+def _flow_label(message: Dict[str, Any]) -> str:
+    return f"flow {message['flow_ref']} \"{message.get('flow_name') or 'Untitled'}\" ({message.get('flow_nodes', 0)} nodes)"
+
+
+class ConversationMemory:
+    """Token-capped conversation context with out-of-line flows and a rolling summary."""
+
+    def __init__(self, store: ConversationStore, max_tokens: int = DEFAULT_MEMORY_TOKENS,
+                 recent_turns: int = DEFAULT_RECENT_TURNS, summary_share: float = DEFAULT_SUMMARY_SHARE,
+                 summarizer: Optional[Summarizer] = None):
+        self.store = store
+        self.max_tokens = max_tokens
+        # Turns fold into the summary before the store's message window drops them
+        self.recent_turns = max(1, min(recent_turns, store.max_messages - 1))
+        self.summary_share = summary_share
+        self.summarizer = summarizer or summarize_turn
+
+    def _state(self, conversation_id: str) -> Dict[str, Any]:
+        return self.store.get_artifact(conversation_id, STATE_KEY) or {
+            "turns": 0, "summarized": 0, "summary": [], "flows": []
+        }
+
+    def record(self, conversation_id: str, role: str, content: str,
+               flow: Optional[Dict[str, Any]] = None, **fields: Any) -> Dict[str, Any]:
+        """Append a message (storing ``flow`` out of line) and fold turns that left the recent window."""
+        state = self._state(conversation_id)
+        message = {"role": role, "content": content, "timestamp": datetime.now().isoformat(),
+                   "seq": state["turns"], **fields}
+
+        if flow is not None:
+            ref = uuid.uuid4().hex[:12]
+            self.store.put_artifact(conversation_id, FLOW_KEY_PREFIX + ref, flow)
+            message.update(flow_ref=ref, flow_name=flow.get("name"),
+                           flow_nodes=len(flow.get("data", flow).get("nodes", [])))
+            state["flows"].append(ref)
+            for stale in state["flows"][:-MAX_FLOWS]:
+                self.store.delete_artifact(conversation_id, FLOW_KEY_PREFIX + stale)
+            state["flows"] = state["flows"][-MAX_FLOWS:]
+
+        self.store.append(conversation_id, message)
+        state["turns"] += 1
+        self._fold(state, self._recent(conversation_id, state))
+        self.store.put_artifact(conversation_id, STATE_KEY, state)
+        return message
+
+    def _recent(self, conversation_id: str, state: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Messages not yet folded into the summary, oldest first."""
+        return [message for message in self.store.get_history(conversation_id)
+                if message.get("seq", state["summarized"]) >= state["summarized"]]
+
+    def _fold(self, state: Dict[str, Any], recent: List[Dict[str, Any]]):
+        """Summarise the oldest recent turns until the rest fit the window and the budget."""
+        budget = self.max_tokens - self._summary_budget()
+        while len(recent) > 1 and (len(recent) > self.recent_turns
+                                   or count_tokens(self._render_turns(recent)) > budget):
+            oldest = recent.pop(0)
+            state["summary"].append(self.summarizer(oldest))
+            state["summarized"] = oldest.get("seq", state["summarized"]) + 1
+        state["summary"] = self._cap_summary(state["summary"], self._summary_budget())
+
+    def _summary_budget(self, max_tokens: Optional[int] = None) -> int:
+        return int((max_tokens or self.max_tokens) * self.summary_share)
+
+    @staticmethod
+    def _cap_summary(lines: List[str], budget: int) -> List[str]:
+        """Drop the oldest lines after the first (the opening request) until the summary fits."""
+        lines = list(lines)
+        while len(lines) > 1 and count_tokens("\n".join([SUMMARY_HEADER, *lines])) > budget:
+            del lines[1]
+        return lines
+
+    @staticmethod
+    def _render_turn(message: Dict[str, Any]) -> str:
+        content = str(message.get("content", ""))
+        if len(content) > TURN_CHARS:
+            content = content[:TURN_CHARS] + "..."
+        line = f"{message['role']}: {content}"
+        if message.get("flow_ref"):
+            line += f" [{_flow_label(message)}]"
+        return line
+
+    def _render_turns(self, messages: List[Dict[str, Any]]) -> str:
+        return "\n".join(self._render_turn(message) for message in messages)
+
+    def context(self, conversation_id: str, max_tokens: Optional[int] = None) -> str:
+        """Summary plus the most recent turns, within ``max_tokens`` (default: the memory budget)."""
+        max_tokens = max_tokens or self.max_tokens
+        state = self._state(conversation_id)
+
+        summary = ""
+        lines = self._cap_summary(state["summary"], self._summary_budget(max_tokens))
+        if lines:
+            summary = "\n".join([SUMMARY_HEADER, *lines])
+            if count_tokens(summary) > self._summary_budget(max_tokens):
+                summary = ""
+
+        remaining = max_tokens - count_tokens(summary)
+        turns: List[str] = []
+        for message in reversed(self._recent(conversation_id, state)):
+            line = self._render_turn(message)
+            cost = count_tokens(line) + 1
+            if cost > remaining:
+                break
+            turns.append(line)
+            remaining -= cost
+
+        return "\n".join(part for part in (summary, "\n".join(reversed(turns))) if part)
+
+    def get_flow(self, conversation_id: str, flow_ref: str) -> Optional[Dict[str, Any]]:
+        """A flow stored in the conversation, or None if it was dropped."""
+        return self.store.get_artifact(conversation_id, FLOW_KEY_PREFIX + flow_ref)
+
+    def current_flow_ref(self, conversation_id: str) -> Optional[str]:
+        """Reference of the most recently generated flow of the conversation."""
+        flows = self._state(conversation_id)["flows"]
+        return flows[-1] if flows else None
+
+    def current_flow(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """The most recently generated flow of the conversation."""
+        flow_ref = self.current_flow_ref(conversation_id)
+        return self.get_flow(conversation_id, flow_ref) if flow_ref else None
+
+    def history(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Messages with their stored flows resolved into ``flow_data``."""
+        history = self.store.get_history(conversation_id)
+        for index, message in enumerate(history):
+            if message.get("flow_ref"):
+                history[index] = dict(message, flow_data=self.get_flow(conversation_id, message["flow_ref"]))
+        return history
+
+    def clear(self, conversation_id: str):
+        self.store.clear(conversation_id)
@@ -0,0 +1,297 @@
+"""
+Conversation Store
+
+Session-keyed storage for chat conversations. Every conversation is addressed
+by a ``conversation_id`` so concurrent users never share history, and each
+session keeps only a bounded window of recent messages.
+
+Besides messages, a session holds keyed artifacts (generated flows, the
+rolling summary) that live and expire with it, so large values are stored
+once instead of inside every message that refers to them.
+
+Two backends are available:
+- ``InMemoryConversationStore``: LRU of sessions with idle TTL (default)
+- ``SQLiteConversationStore``: persistent store for local testing
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+
+class ConversationStore(ABC):
+    """Interface for session-keyed conversation storage."""
+
+    def __init__(self, ttl_seconds: int = 3600, max_messages: int = 50):
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+
+    @staticmethod
+    def new_conversation_id() -> str:
+        """Create a fresh conversation id."""
+        return uuid.uuid4().hex
+
+    @abstractmethod
+    def get_history(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Get the messages of a conversation, oldest first."""
+
+    @abstractmethod
+    def append(self, conversation_id: str, message: Dict[str, Any]):
+        """Append a message to a conversation, creating it if needed."""
+
+    @abstractmethod
+    def clear(self, conversation_id: str):
+        """Remove a conversation, its messages and its artifacts."""
+
+    @abstractmethod
+    def get_artifact(self, conversation_id: str, key: str) -> Optional[Any]:
+        """Get an artifact of a conversation, or None."""
+
+    @abstractmethod
+    def put_artifact(self, conversation_id: str, key: str, value: Any):
+        """Store an artifact in a conversation, creating it if needed."""
+
+    @abstractmethod
+    def delete_artifact(self, conversation_id: str, key: str):
+        """Remove an artifact from a conversation."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of live conversations."""
+
+
+class InMemoryConversationStore(ConversationStore):
+    """LRU of conversations with idle TTL and a bounded message window per session.
+
+    Lookups are O(1): sessions live in an ``OrderedDict`` that is reordered on
+    access, and each session's messages live in a ``deque`` with ``maxlen``.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: int = 3600, max_messages: int = 50):
+        super().__init__(ttl_seconds=ttl_seconds, max_messages=max_messages)
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Deque[Dict[str, Any]]]" = OrderedDict()
+        self._last_access: Dict[str, float] = {}
+        self._artifacts: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _expired(self, conversation_id: str, now: float) -> bool:
+        return now - self._last_access.get(conversation_id, now) > self.ttl_seconds
+
+    def _drop(self, conversation_id: str):
+        self._sessions.pop(conversation_id, None)
+        self._last_access.pop(conversation_id, None)
+        self._artifacts.pop(conversation_id, None)
+
+    def _evict(self, now: float):
+        """Drop expired sessions from the LRU end, then enforce the session cap."""
+        while self._sessions:
+            oldest = next(iter(self._sessions))
+            if not self._expired(oldest, now) and len(self._sessions) <= self.max_sessions:
+                break
+            self._drop(oldest)
+
+    def get_history(self, conversation_id: str) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            if conversation_id not in self._sessions:
+                return []
+            if self._expired(conversation_id, now):
+                self._drop(conversation_id)
+                return []
+            self._sessions.move_to_end(conversation_id)
+            self._last_access[conversation_id] = now
+            return list(self._sessions[conversation_id])
+
+    def _touch(self, conversation_id: str, now: float) -> Deque[Dict[str, Any]]:
+        """Get (or create) a live session and mark it most recently used."""
+        if conversation_id in self._sessions and self._expired(conversation_id, now):
+            self._drop(conversation_id)
+        messages = self._sessions.get(conversation_id)
+        if messages is None:
+            messages = deque(maxlen=self.max_messages)
+            self._sessions[conversation_id] = messages
+        else:
+            self._sessions.move_to_end(conversation_id)
+        self._last_access[conversation_id] = now
+        return messages
+
+    def append(self, conversation_id: str, message: Dict[str, Any]):
+        now = time.monotonic()
+        with self._lock:
+            self._touch(conversation_id, now).append(message)
+            self._evict(now)
+
+    def clear(self, conversation_id: str):
+        with self._lock:
+            self._drop(conversation_id)
+
+    def get_artifact(self, conversation_id: str, key: str) -> Optional[Any]:
+        with self._lock:
+            if self._expired(conversation_id, time.monotonic()):
+                return None
+            return self._artifacts.get(conversation_id, {}).get(key)
+
+    def put_artifact(self, conversation_id: str, key: str, value: Any):
+        now = time.monotonic()
+        with self._lock:
+            self._touch(conversation_id, now)
+            self._artifacts.setdefault(conversation_id, {})[key] = value
+            self._evict(now)
+
+    def delete_artifact(self, conversation_id: str, key: str):
+        with self._lock:
+            self._artifacts.get(conversation_id, {}).pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+class SQLiteConversationStore(ConversationStore):
+    """SQLite-backed conversation store, mainly for local testing and single-node setups."""
+
+    def __init__(self, path: str = "conversations.db", ttl_seconds: int = 3600, max_messages: int = 50):
+        super().__init__(ttl_seconds=ttl_seconds, max_messages=max_messages)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS conversations (
+                conversation_id TEXT PRIMARY KEY,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                conversation_id TEXT NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS artifacts (
+                conversation_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (conversation_id, key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages (conversation_id, id);
+            CREATE INDEX IF NOT EXISTS idx_conversations_access ON conversations (last_access);
+        """)
+        self._conn.commit()
+
+    def _purge_expired(self, now: float):
+        cutoff = now - self.ttl_seconds
+        expired = "SELECT conversation_id FROM conversations WHERE last_access < ?"
+        self._conn.execute(f"DELETE FROM messages WHERE conversation_id IN ({expired})", (cutoff,))
+        self._conn.execute(f"DELETE FROM artifacts WHERE conversation_id IN ({expired})", (cutoff,))
+        self._conn.execute("DELETE FROM conversations WHERE last_access < ?", (cutoff,))
+
+    def get_history(self, conversation_id: str) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            self._purge_expired(now)
+            rows = self._conn.execute(
+                "SELECT payload FROM messages WHERE conversation_id = ? ORDER BY id",
+                (conversation_id,)
+            ).fetchall()
+            if rows:
+                self._conn.execute(
+                    "UPDATE conversations SET last_access = ? WHERE conversation_id = ?",
+                    (now, conversation_id)
+                )
+            self._conn.commit()
+        return [json.loads(row[0]) for row in rows]
+
+    def _touch(self, conversation_id: str, now: float):
+        self._conn.execute(
+            "INSERT INTO conversations (conversation_id, last_access) VALUES (?, ?) "
+            "ON CONFLICT(conversation_id) DO UPDATE SET last_access = excluded.last_access",
+            (conversation_id, now)
+        )
+
+    def append(self, conversation_id: str, message: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            self._purge_expired(now)
+            self._touch(conversation_id, now)
+            self._conn.execute(
+                "INSERT INTO messages (conversation_id, payload) VALUES (?, ?)",
+                (conversation_id, json.dumps(message, default=str))
+            )
+            # Keep only the most recent messages of the session
+            self._conn.execute(
+                "DELETE FROM messages WHERE conversation_id = ? AND id NOT IN ("
+                "SELECT id FROM messages WHERE conversation_id = ? ORDER BY id DESC LIMIT ?)",
+                (conversation_id, conversation_id, self.max_messages)
+            )
+            self._conn.commit()
+
+    def clear(self, conversation_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+            self._conn.execute("DELETE FROM artifacts WHERE conversation_id = ?", (conversation_id,))
+            self._conn.execute("DELETE FROM conversations WHERE conversation_id = ?", (conversation_id,))
+            self._conn.commit()
+
+    def get_artifact(self, conversation_id: str, key: str) -> Optional[Any]:
+        with self._lock:
+            self._purge_expired(time.time())
+            row = self._conn.execute(
+                "SELECT payload FROM artifacts WHERE conversation_id = ? AND key = ?",
+                (conversation_id, key)
+            ).fetchone()
+            self._conn.commit()
+        return json.loads(row[0]) if row else None
+
+    def put_artifact(self, conversation_id: str, key: str, value: Any):
+        now = time.time()
+        with self._lock:
+            self._purge_expired(now)
+            self._touch(conversation_id, now)
+            self._conn.execute(
+                "INSERT INTO artifacts (conversation_id, key, payload) VALUES (?, ?, ?) "
+                "ON CONFLICT(conversation_id, key) DO UPDATE SET payload = excluded.payload",
+                (conversation_id, key, json.dumps(value, default=str))
+            )
+            self._conn.commit()
+
+    def delete_artifact(self, conversation_id: str, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM artifacts WHERE conversation_id = ? AND key = ?", (conversation_id, key))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+
+def create_conversation_store(url: Optional[str] = None,
+                              max_sessions: Optional[int] = None,
+                              ttl_seconds: Optional[int] = None,
+                              max_messages: Optional[int] = None) -> ConversationStore:
+    """Create a conversation store from a URL (``memory`` or ``sqlite:///path``).
+
+    Unset arguments fall back to the ``CONVERSATION_*`` environment variables.
+    """
+    url = url or os.getenv("CONVERSATION_STORE_URL", "memory")
+    ttl_seconds = ttl_seconds or int(os.getenv("CONVERSATION_TTL_SECONDS", "3600"))
+    max_messages = max_messages or int(os.getenv("CONVERSATION_MAX_MESSAGES", "50"))
+
+    if url.startswith("sqlite:///"):
+        return SQLiteConversationStore(
+            path=url[len("sqlite:///"):],
+            ttl_seconds=ttl_seconds,
+            max_messages=max_messages
+        )
+    if url == "memory":
+        return InMemoryConversationStore(
+            max_sessions=max_sessions or int(os.getenv("CONVERSATION_MAX_SESSIONS", "10000")),
+            ttl_seconds=ttl_seconds,
+            max_messages=max_messages
+        )
+
+    raise ValueError(f"Unsupported conversation store URL: {url}")
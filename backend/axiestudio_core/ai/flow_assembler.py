@@ -0,0 +1,251 @@
+"""
+Deterministic Flow Assembler
+
+Builds a complete flow graph from an ordered component list, without an
+LLM writing node and edge JSON:
+
+1. Each component is resolved to a real node template from the starter
+   projects (exact type, known alias, normalised name, then embedding
+   similarity) and instantiated copy-on-write: the large component
+   template is shared, only ids and positions are new.
+2. Edges are wired by matching output types to the ``input_types`` of
+   visible input fields: empty required inputs first, then every node
+   feeds the next node that can take its output through a primary input
+   (``input_value``, a search query, a data input or a list input such as
+   an agent's tools). Only list inputs are fed backwards, so tools listed
+   after their agent still connect and no cycle is formed.
+3. Nodes are laid out left to right by their depth in the graph.
+
+The same component list and seed always produce the same flow.
+"""
+
+import hashlib
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from .flow_skeleton import build_edge
+from .semantic_index import SemanticIndex
+from .wiring_index import node_templates
+
+logger = logging.getLogger(__name__)
+
+NODE_SPACING_X = 450
+NODE_SPACING_Y = 350
+
+# Minimum cosine similarity for resolving a component name by embedding
+MIN_SIMILARITY = 0.3
+
+# Component names used by generator rules and prompts -> starter-project node types
+ALIASES = {
+    "OpenAIModel": "LanguageModelComponent",
+    "AnthropicModel": "LanguageModelComponent",
+    "LanguageModel": "LanguageModelComponent",
+    "FileComponent": "File",
+    "TextSplitter": "SplitText",
+    "ChromaDB": "AstraDB",
+    "VectorStore": "AstraDB",
+    "WebSearchTool": "TavilySearchComponent",
+    "WebSearch": "TavilySearchComponent",
+    "Calculator": "CalculatorComponent",
+    "Parser": "ParserComponent",
+}
+
+# Inputs a node's main data flows into, after empty required inputs
+PRIMARY_FIELDS = ("input_value", "search_query", "input_data", "data_inputs")
+
+_ID_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+_CAMEL_WORDS = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+class NodeCatalog:
+    """One real node template per component type, taken from the starter projects."""
+
+    def __init__(self, templates: Dict[str, Dict[str, Any]]):
+        self.templates = templates
+        self._normalized = {_normalize(node_type): node_type for node_type in templates}
+        self._semantic = SemanticIndex.build({
+            node_type: " ".join([_words(node_type), *(str(node["data"]["node"].get(key) or "")
+                                                      for key in ("display_name", "description"))])
+            for node_type, node in templates.items()
+        })
+
+    @classmethod
+    def from_index(cls, index) -> "NodeCatalog":
+        return cls(node_templates(index.flows.values()))
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """The catalog node type for a component name, or None."""
+        if name in self.templates:
+            return name
+        alias = ALIASES.get(name)
+        if alias in self.templates:
+            return alias
+        normalized = self._normalized.get(_normalize(name))
+        if normalized:
+            return normalized
+        matches = self._semantic.search(_words(name), k=1)
+        if matches and matches[0][1] >= MIN_SIMILARITY:
+            return matches[0][0]
+        return None
+
+
+class FlowAssembler:
+    """Assembles ``{"nodes": [...], "edges": [...]}`` graphs from component lists."""
+
+    def __init__(self, catalog: NodeCatalog):
+        self.catalog = catalog
+
+    def assemble(self, components: List[str], seed: str = "") -> Dict[str, Any]:
+        """Nodes, wired edges and layout for ``components`` (unknown components are skipped)."""
+        nodes: List[Dict[str, Any]] = []
+        for component in components:
+            node_type = self.catalog.resolve(component)
+            if node_type is None:
+                logger.warning(f"Skipping {component}: no node template for it")
+                continue
+            node_id = _node_id(node_type, seed, len(nodes))
+            nodes.append(_instantiate(self.catalog.templates[node_type], node_id))
+
+        edges = _wire(nodes)
+        return {"nodes": _layout(nodes, edges), "edges": edges}
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower()).removesuffix("component")
+
+
+def _words(name: str) -> str:
+    return " ".join(_CAMEL_WORDS.findall(name))
+
+
+def _node_id(node_type: str, seed: str, position: int) -> str:
+    """AxieStudio-style id (``ChatInput-SzjnT``), derived from the seed and position."""
+    digest = hashlib.blake2b(f"{seed}:{position}:{node_type}".encode(), digest_size=8).digest()
+    return f"{node_type}-" + "".join(_ID_ALPHABET[byte % len(_ID_ALPHABET)] for byte in digest[:5])
+
+
+def _instantiate(template: Dict[str, Any], node_id: str) -> Dict[str, Any]:
+    """Copy the node's top level with a new id; the component template itself is shared."""
+    node = dict(template)
+    node["id"] = node_id
+    node["data"] = dict(template["data"], id=node_id)
+    return node
+
+
+def _outputs(node: Dict[str, Any]) -> List[Tuple[str, List[str]]]:
+    return [(output["name"], output.get("types", []))
+            for output in node["data"]["node"].get("outputs", []) if output.get("name")]
+
+
+# Input ranks, in wiring preference order
+REQUIRED, PRIMARY, LIST, OTHER = range(4)
+
+
+def _inputs(node: Dict[str, Any]) -> List[Tuple[int, str, List[str], bool]]:
+    """Visible, connectable fields as (rank, name, input types, is list), best first."""
+    fields = []
+    for position, (name, field) in enumerate(node["data"]["node"].get("template", {}).items()):
+        if (isinstance(field, dict) and field.get("input_types") and field.get("show", True)
+                and not field.get("advanced")):
+            is_list = bool(field.get("list"))
+            if field.get("required") and field.get("value") in ("", None, [], {}):
+                rank = REQUIRED
+            elif name in PRIMARY_FIELDS:
+                rank = PRIMARY
+            else:
+                rank = LIST if is_list else OTHER
+            fields.append((rank, position, name, field["input_types"], is_list))
+    return [(rank, name, types, is_list) for rank, _, name, types, is_list in sorted(fields)]
+
+
+def _wire(nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    by_id = {node["id"]: node for node in nodes}
+    keys: List[Tuple[str, str, str, str]] = []
+    filled = set()  # Single-value inputs already connected
+
+    def connect(source: Dict[str, Any], target: Dict[str, Any], max_rank: int, lists_only: bool = False) -> bool:
+        """Connect the first compatible output of ``source`` to the best free input of ``target``."""
+        if _reaches(keys, target["id"], source["id"]):
+            return False
+        for rank, field_name, input_types, is_list in _inputs(target):
+            if rank > max_rank or (target["id"], field_name) in filled or (lists_only and not is_list):
+                continue
+            for output_name, output_types in _outputs(source):
+                if set(output_types) & set(input_types):
+                    keys.append((source["id"], output_name, target["id"], field_name))
+                    if not is_list:
+                        filled.add((target["id"], field_name))
+                    return True
+        return False
+
+    def has_edge(node: Dict[str, Any], end: int) -> bool:
+        return any(key[end] == node["id"] for key in keys)
+
+    # Empty required inputs, from the nearest earlier node that can feed them
+    for index, target in enumerate(nodes):
+        for source in reversed(nodes[:index]):
+            while connect(source, target, REQUIRED):
+                pass
+
+    # Every node feeds the next node that takes its output through a primary
+    # input; backwards only into list inputs (tools listed after their agent)
+    for index, source in enumerate(nodes):
+        if has_edge(source, 0):
+            continue
+        if not any(connect(source, target, LIST) for target in nodes[index + 1:]):
+            any(connect(source, target, LIST, lists_only=True) for target in reversed(nodes[:index]))
+
+    # Every node after the first is fed by the nearest earlier node that can
+    for index, target in enumerate(nodes[1:], start=1):
+        if not has_edge(target, 2):
+            any(connect(source, target, LIST) for source in reversed(nodes[:index]))
+
+    # Nodes still unconnected take any compatible input
+    for index, node in enumerate(nodes):
+        if not has_edge(node, 0) and not has_edge(node, 2):
+            if not any(connect(node, target, OTHER) for target in nodes[index + 1:]):
+                any(connect(source, node, OTHER) for source in reversed(nodes[:index]))
+
+    edges = [build_edge(key, by_id) for key in keys]
+    return [edge for edge in edges if edge is not None]
+
+
+def _reaches(keys: List[Tuple[str, str, str, str]], start: str, goal: str) -> bool:
+    """True if ``goal`` is reachable from ``start`` (an edge goal -> start would close a cycle)."""
+    stack, seen = [start], set()
+    while stack:
+        node_id = stack.pop()
+        if node_id == goal:
+            return True
+        if node_id not in seen:
+            seen.add(node_id)
+            stack.extend(key[2] for key in keys if key[0] == node_id)
+    return False
+
+
+def _layout(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Columns by longest path from a source node, rows in list order."""
+    depth = {node["id"]: 0 for node in nodes}
+    # Edges only form a DAG, so len(nodes) relaxation rounds settle every depth
+    for _ in range(len(nodes)):
+        changed = False
+        for edge in edges:
+            if depth[edge["target"]] < depth[edge["source"]] + 1:
+                depth[edge["target"]] = depth[edge["source"]] + 1
+                changed = True
+        if not changed:
+            break
+
+    rows: Dict[int, int] = {}
+    for node in nodes:
+        column = depth[node["id"]]
+        row = rows.get(column, 0)
+        rows[column] = row + 1
+        position = {"x": column * NODE_SPACING_X, "y": row * NODE_SPACING_Y}
+        node["position"] = position
+        if "positionAbsolute" in node:
+            node["positionAbsolute"] = dict(position)
+    return nodes
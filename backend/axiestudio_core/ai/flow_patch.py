@@ -0,0 +1,340 @@
+"""
+Flow JSON Patches
+
+Follow-up requests ("add a web search tool") change a few nodes of a flow
+that can be hundreds of KB. Regenerating and resending the whole flow is
+avoided as follows:
+
+1. The model sees an *edit view* of the session's current flow. This is
+   the skeleton (see ``flow_skeleton``) with nodes keyed by id, so JSON
+   pointers stay stable, e.g. ``/nodes/Agent-x1Ab2/params/temperature``.
+2. The model answers with an RFC 6902 patch against that view.
+   ``apply_edit`` applies the patch and rehydrates the result into the
+   full flow. New nodes nobody wired are connected through the wiring
+   index, and ``validate_flow`` checks the edges the edit added or changed.
+3. ``diff`` computes the RFC 6902 patch from the previous full flow to the
+   new one, and only that patch is returned. Rehydration shares unchanged
+   subtrees with the previous flow, so ``diff`` skips them by identity.
+
+``apply_patch`` never mutates its input: containers along each patched
+path are copied, and everything else is shared.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from .flow_skeleton import _PARAM_LENGTHS, _edge_key, build_edge, extract_skeleton, rehydrate
+from .prompt_builder import count_tokens
+
+_OPS = ("add", "remove", "replace", "move", "copy", "test")
+
+class PatchError(ValueError):
+    """Raised when a patch cannot be applied or produces an invalid flow."""
+
+
+def _parse_pointer(pointer: str) -> List[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _escape(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _index(container: list, token: str, allow_end: bool) -> int:
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise PatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"Array index out of range: {index}")
+    return index
+
+
+def _get(document: Any, tokens: List[str]) -> Any:
+    for token in tokens:
+        if isinstance(document, dict):
+            if token not in document:
+                raise PatchError(f"Missing member: {token!r}")
+            document = document[token]
+        elif isinstance(document, list):
+            document = document[_index(document, token, allow_end=False)]
+        else:
+            raise PatchError(f"Cannot descend into {type(document).__name__} at {token!r}")
+    return document
+
+
+def _update(document: Any, tokens: List[str], op: str, value: Any = None) -> Any:
+    """Return a copy of ``document`` with ``op`` applied at ``tokens``; only the path is copied."""
+    if not tokens:
+        if op == "remove":
+            raise PatchError("Cannot remove the document root")
+        return value
+
+    token, rest = tokens[0], tokens[1:]
+    if isinstance(document, dict):
+        result = dict(document)
+        if rest:
+            result[token] = _update(_get(document, [token]), rest, op, value)
+        elif op == "add":
+            result[token] = value
+        elif token not in result:
+            raise PatchError(f"Missing member: {token!r}")
+        elif op == "remove":
+            del result[token]
+        else:
+            result[token] = value
+        return result
+
+    if isinstance(document, list):
+        result = list(document)
+        if rest:
+            index = _index(document, token, allow_end=False)
+            result[index] = _update(document[index], rest, op, value)
+        elif op == "add":
+            result.insert(_index(document, token, allow_end=True), value)
+        elif op == "remove":
+            del result[_index(document, token, allow_end=False)]
+        else:
+            result[_index(document, token, allow_end=False)] = value
+        return result
+
+    raise PatchError(f"Cannot descend into {type(document).__name__} at {token!r}")
+
+
+def apply_patch(document: Any, patch: List[Dict[str, Any]]) -> Any:
+    """Apply RFC 6902 operations, returning a new document (``document`` is never mutated)."""
+    if not isinstance(patch, list):
+        raise PatchError("A patch must be a list of operations")
+
+    for operation in patch:
+        if not isinstance(operation, dict) or operation.get("op") not in _OPS or not isinstance(operation.get("path"), str):
+            raise PatchError(f"Invalid operation: {operation!r}")
+        op, path = operation["op"], _parse_pointer(operation["path"])
+
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise PatchError(f"{op} requires a value")
+        if op in ("move", "copy"):
+            if not isinstance(operation.get("from"), str):
+                raise PatchError(f"{op} requires from")
+            source = _parse_pointer(operation["from"])
+            value = _get(document, source)
+            if op == "move":
+                if path[:len(source)] == source and path != source:
+                    raise PatchError("Cannot move a value into one of its children")
+                document = _update(document, source, "remove")
+            document = _update(document, path, "add", value)
+        elif op == "test":
+            if _get(document, path) != operation["value"]:
+                raise PatchError(f"Test failed at {operation['path']}")
+        elif op == "replace":
+            _get(document, path)
+            document = _update(document, path, "replace", operation["value"])
+        else:
+            document = _update(document, path, op, operation.get("value"))
+
+    return document
+
+
+def diff(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """RFC 6902 operations turning ``old`` into ``new``; identical subtrees are skipped without comparing."""
+    if old is new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        operations = [{"op": "remove", "path": f"{path}/{_escape(key)}"} for key in old if key not in new]
+        for key, value in new.items():
+            if key in old:
+                operations += diff(old[key], value, f"{path}/{_escape(key)}")
+            else:
+                operations.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": value})
+        return operations
+    if isinstance(old, list) and isinstance(new, list):
+        return _diff_list(old, new, path)
+    if type(old) is type(new) and old == new:
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def _same_item(a: Any, b: Any) -> bool:
+    """Whether two list items are the same element (ReactFlow nodes and edges match by id)."""
+    if a is b:
+        return True
+    if isinstance(a, dict) and isinstance(b, dict) and "id" in a and "id" in b:
+        return a["id"] == b["id"]
+    return type(a) is type(b) and a == b
+
+
+def _diff_list(old: List[Any], new: List[Any], path: str) -> List[Dict[str, Any]]:
+    """Edit script over a list: matching items are diffed in place, others removed or inserted.
+
+    After each step the working list is ``new[:j] + old[i:]``, so indices
+    in the emitted operations are positions in that list.
+    """
+    operations = []
+    i = j = 0
+    while i < len(old) and j < len(new):
+        if _same_item(old[i], new[j]):
+            operations += diff(old[i], new[j], f"{path}/{j}")
+            i += 1
+            j += 1
+        elif not any(_same_item(old[i], item) for item in new[j:]):
+            operations.append({"op": "remove", "path": f"{path}/{j}"})
+            i += 1
+        else:
+            operations.append({"op": "add", "path": f"{path}/{j}", "value": new[j]})
+            j += 1
+    operations += [{"op": "remove", "path": f"{path}/{j}"} for _ in range(i, len(old))]
+    operations += [{"op": "add", "path": f"{path}/-", "value": item} for item in new[j:]]
+    return operations
+
+
+def edit_view(flow: Dict[str, Any], max_param_length: Optional[int] = None) -> Dict[str, Any]:
+    """Flow skeleton with nodes keyed by id, the document edit patches are written against."""
+    skeleton = extract_skeleton(flow, max_param_length)
+    skeleton["nodes"] = {node.pop("id"): node for node in skeleton["nodes"]}
+    return skeleton
+
+
+def fit_edit_view(flow: Dict[str, Any], budget: int) -> str:
+    """Edit view as compact JSON, shortening long params until it fits ``budget`` tokens."""
+    text = ""
+    for max_length in _PARAM_LENGTHS:
+        text = json.dumps(edit_view(flow, max_length), separators=(",", ":"), ensure_ascii=False)
+        if count_tokens(text) <= budget:
+            break
+    return text
+
+
+def apply_edit(flow: Dict[str, Any], patch: List[Dict[str, Any]],
+               node_templates: Optional[Dict[str, Dict[str, Any]]] = None, wiring=None) -> Dict[str, Any]:
+    """Apply an edit-view patch to a full flow and validate the result.
+
+    ``node_templates`` supplies nodes for component types the flow does not
+    contain yet. With a ``wiring`` index, added nodes the patch left
+    unconnected are wired to the best compatible existing node.
+    """
+    view = edit_view(flow)
+    edited = apply_patch(view, patch)
+    if not isinstance(edited, dict) or not isinstance(edited.get("nodes"), dict):
+        raise PatchError("The patched view must keep its nodes object")
+
+    nodes = []
+    for node_id, node in edited["nodes"].items():
+        if not isinstance(node, dict):
+            raise PatchError(f"Node {node_id} must be an object")
+        nodes.append(dict(node, id=node_id))
+    # Edges of removed nodes go with them
+    node_ids = {node["id"] for node in nodes}
+    edges = [edge for edge in edited.get("edges", []) if isinstance(edge, dict)
+             and edge.get("source") in node_ids and edge.get("target") in node_ids]
+    skeleton = dict(edited, nodes=nodes, edges=edges)
+
+    result = rehydrate(flow, skeleton, node_templates=node_templates)
+    missing = [node["id"] for node in nodes if node["id"] not in _graph_node_ids(result)]
+    if missing:
+        raise PatchError(f"Unknown component type for new node(s): {', '.join(missing)}")
+    # Rehydration skips edges with unknown handles; an edit asking for one is wrong
+    graph = _graph(result)
+    built = {_edge_key(edge) for edge in graph.get("edges", [])}
+    dropped = [f"{edge.get('source')}.{edge.get('output')} -> {edge.get('target')}.{edge.get('input')}"
+               for edge in skeleton["edges"]
+               if (edge.get("source"), edge.get("output"), edge.get("target"), edge.get("input")) not in built]
+    if dropped:
+        raise PatchError(f"Edge(s) with unknown handles: {', '.join(dropped[:5])}")
+    if wiring is not None:
+        graph["edges"] = graph.get("edges", []) + _wire_new_nodes(graph, set(view["nodes"]), wiring)
+
+    # The template's own edges are not the edit's concern; only added or changed ones are checked
+    unchanged = {id(edge) for edge in _graph(flow).get("edges", [])}
+    validate_flow(result, [edge for edge in graph.get("edges", []) if id(edge) not in unchanged])
+    return result
+
+
+def _wire_new_nodes(graph: Dict[str, Any], existing: set, wiring) -> List[Dict[str, Any]]:
+    """Edges connecting each added, unconnected node to the best compatible node (as source, else as target).
+
+    Candidates come from the wiring index by component type; each one is
+    built against the actual nodes, and those whose handles don't exist on
+    them (e.g. a component cloned in tool mode) or don't share a type are
+    skipped.
+    """
+    nodes = {node.get("id"): node for node in graph.get("nodes", []) if node.get("type") == "genericNode"}
+    types = {node_id: node.get("data", {}).get("type") for node_id, node in nodes.items()}
+    edges = graph.get("edges", [])
+    connected = {edge.get(end) for edge in edges for end in ("source", "target")}
+    filled = {_edge_key(edge)[2:] for edge in edges}
+
+    wired = []
+    for node_id, node_type in types.items():
+        if node_id in existing or node_id in connected:
+            continue
+        candidates: List[Tuple[str, str, str, str]] = []
+        for connection in wiring.targets(node_type):
+            candidates += [(node_id, connection.output, other, connection.field)
+                           for other, other_type in types.items() if other_type == connection.target and other != node_id]
+        for connection in wiring.sources(node_type):
+            candidates += [(other, connection.output, node_id, connection.field)
+                           for other, other_type in types.items() if other_type == connection.source and other != node_id]
+        for key in candidates:
+            source, output, target, field = key
+            if (target, field) in filled and not _is_list_input(wiring, types[target], field):
+                continue
+            if _edge_error(source, output, target, field, nodes) is not None:
+                continue
+            edge = build_edge(key, nodes)
+            if edge is not None:
+                wired.append(edge)
+                filled.add((target, field))
+                break
+    return wired
+
+
+def _is_list_input(wiring, component: str, field: str) -> bool:
+    return field in wiring.list_inputs.get(component, ())
+
+
+def _graph(flow: Dict[str, Any]) -> Dict[str, Any]:
+    return flow["data"] if isinstance(flow.get("data"), dict) else flow
+
+
+def _graph_node_ids(flow: Dict[str, Any]) -> set:
+    return {node.get("id") for node in _graph(flow).get("nodes", [])}
+
+
+def _edge_error(source_id: str, output_name: Optional[str], target_id: str, field_name: Optional[str],
+                nodes: Dict[str, Dict[str, Any]]) -> Optional[str]:
+    """Why an edge between these handles is invalid, or None if it is fine."""
+    source, target = nodes.get(source_id), nodes.get(target_id)
+    if source is None or target is None:
+        return f"edge {source_id} -> {target_id} joins a missing node"
+    output = next((o for o in source.get("data", {}).get("node", {}).get("outputs", [])
+                   if o.get("name") == output_name), None)
+    field = target.get("data", {}).get("node", {}).get("template", {}).get(field_name)
+    if output is None or not isinstance(field, dict):
+        return f"edge {source_id}.{output_name} -> {target_id}.{field_name} has an unknown handle"
+    if field.get("input_types") and not set(output.get("types", [])) & set(field["input_types"]):
+        return f"edge {source_id}.{output_name} -> {target_id}.{field_name} joins incompatible types"
+    return None
+
+
+def validate_flow(flow: Dict[str, Any], edges: Optional[List[Dict[str, Any]]] = None):
+    """Check node ids are unique and each edge (default: all of them) joins existing handles with a common type."""
+    graph = _graph(flow)
+    errors = []
+    nodes: Dict[str, Dict[str, Any]] = {}
+    for node in graph.get("nodes", []):
+        if node.get("id") in nodes:
+            errors.append(f"duplicate node id {node.get('id')}")
+        nodes[node.get("id")] = node
+
+    for edge in graph.get("edges", []) if edges is None else edges:
+        error = _edge_error(*_edge_key(edge), nodes)
+        if error is not None:
+            errors.append(error)
+
+    if errors:
+        raise PatchError("; ".join(errors[:5]))
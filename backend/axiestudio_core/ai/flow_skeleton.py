@@ -0,0 +1,300 @@
+"""
+Flow Template Skeletons
+
+Starter projects embed each component's full template (including its source
+code) in every node, but customising a flow only touches node types,
+user-facing parameters and connections. ``extract_skeleton`` produces that
+compact view for prompts:
+
+    {"name": ..., "description": ...,
+     "nodes": [{"id": "ChatInput-et7o5", "type": "ChatInput", "display_name": "Chat Input",
+                "params": {"input_value": "What is this document about?"}}],
+     "edges": [{"source": "ChatInput-et7o5", "output": "message",
+                "target": "Prompt-V3tlJ", "input": "question"}]}
+
+``rehydrate`` merges an edited skeleton back into the full template. The
+round trip is lossless: rehydrating an unedited skeleton reproduces the
+template. Only the parts that change are copied; everything else is shared
+with the (read-only) template. Both starter-project JSON (graph under
+``data``) and crawled flow dicts (``nodes``/``edges`` at the top level) are
+supported. Skeletons are 8-100x smaller than the
+templates they describe.
+"""
+
+import copy
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from .prompt_builder import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Horizontal offset for nodes added by an edit, next to the node they were cloned from
+NEW_NODE_OFFSET = 400
+
+_SCALARS = (str, int, float, bool, type(None))
+
+# Param string lengths tried by fit_skeleton, longest first
+_PARAM_LENGTHS = (None, 400, 200, 100, 50, 20)
+
+
+def extract_skeleton(flow: Dict[str, Any], max_param_length: Optional[int] = None) -> Dict[str, Any]:
+    """Compact, editable view of a flow: component nodes, user-facing params and edges.
+
+    Param strings longer than ``max_param_length`` are shortened to
+    ``"<prefix>..."``; ``rehydrate`` treats such echoes as unchanged.
+    """
+    graph = flow["data"] if isinstance(flow.get("data"), dict) else flow
+
+    nodes = []
+    for node in graph.get("nodes", []):
+        if node.get("type") != "genericNode":
+            continue  # Notes are documentation; rehydrate keeps them as they are
+        node_data = node.get("data", {})
+        component = node_data.get("node", {})
+        nodes.append({
+            "id": node["id"],
+            "type": node_data.get("type"),
+            "display_name": component.get("display_name"),
+            "params": {name: _shorten(field["value"], max_param_length)
+                       for name, field in component.get("template", {}).items() if _is_user_param(name, field)}
+        })
+
+    edges = [_edge_key_dict(edge) for edge in graph.get("edges", [])]
+
+    return {
+        "name": flow.get("name"),
+        "description": flow.get("description"),
+        "nodes": nodes,
+        "edges": edges
+    }
+
+
+def fit_skeleton(flow: Dict[str, Any], budget: int) -> str:
+    """Skeleton as compact JSON, shortening long params until it fits ``budget`` tokens.
+
+    Nodes and edges are never dropped (a missing node means "delete" to
+    ``rehydrate``), so a very large flow may still exceed the budget.
+    """
+    text = ""
+    for max_length in _PARAM_LENGTHS:
+        text = json.dumps(extract_skeleton(flow, max_length), separators=(",", ":"), ensure_ascii=False)
+        if count_tokens(text) <= budget:
+            break
+    return text
+
+
+def rehydrate(flow: Dict[str, Any], skeleton: Dict[str, Any], partial: bool = False,
+              node_templates: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Apply an edited skeleton to the full template, returning a new flow.
+
+    - ``name``/``description`` replace the template's.
+    - Component nodes missing from ``nodes`` are removed with their edges;
+      param and display name edits are applied to fields that exist.
+    - A node with an unknown id is cloned from a template node of the same
+      type, else from ``node_templates`` (type -> node from another flow),
+      placed right of the existing nodes.
+    - ``edges`` lists the connections to keep or create.
+
+    Keys missing from the skeleton leave that part of the template unchanged.
+    With ``partial`` (a truncated skeleton), nodes and edges missing from
+    the lists are kept instead of removed. The template itself is never
+    mutated.
+    """
+    result = dict(flow)
+    for key in ("name", "description"):
+        if isinstance(skeleton.get(key), str):
+            result[key] = skeleton[key]
+
+    if isinstance(flow.get("data"), dict):
+        graph = result["data"] = dict(flow["data"])
+    else:
+        graph = result
+
+    if isinstance(skeleton.get("nodes"), list):
+        graph["nodes"] = _rehydrate_nodes(graph.get("nodes", []), skeleton["nodes"], partial, node_templates)
+    nodes = {node.get("id"): node for node in graph.get("nodes", [])}
+
+    edges = graph.get("edges", [])
+    if isinstance(skeleton.get("edges"), list):
+        graph["edges"] = _rehydrate_edges(edges, skeleton["edges"], nodes, partial)
+    elif "edges" in graph:
+        graph["edges"] = [edge for edge in edges if edge.get("source") in nodes and edge.get("target") in nodes]
+
+    return result
+
+
+def _is_user_param(name: str, field: Any) -> bool:
+    """Visible, non-advanced, non-secret fields with plain values; connection-only inputs are skipped."""
+    if name.startswith("_") or not isinstance(field, dict) or "value" not in field:
+        return False
+    if not field.get("show", True) or field.get("advanced") or field.get("type") == "code":
+        return False
+    if field.get("password") or field.get("load_from_db"):
+        return False
+    value = field["value"]
+    if value in ("", None) and field.get("input_types"):
+        return False
+    return isinstance(value, _SCALARS) or (isinstance(value, list) and all(isinstance(v, _SCALARS) for v in value))
+
+
+def _shorten(value: Any, max_length: Optional[int]) -> Any:
+    if max_length is None or not isinstance(value, str) or len(value) <= max_length:
+        return value
+    return value[:max_length] + "..."
+
+
+def _rehydrate_nodes(template_nodes: List[Dict[str, Any]], skeleton_nodes: List[Any],
+                     partial: bool = False,
+                     node_templates: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    edits = {node["id"]: node for node in skeleton_nodes if isinstance(node, dict) and node.get("id")}
+    by_id = {node.get("id"): node for node in template_nodes}
+    by_type = {}
+    for node in template_nodes:
+        if node.get("type") == "genericNode":
+            by_type.setdefault(node.get("data", {}).get("type"), node)
+
+    nodes = []
+    for node in template_nodes:
+        if node.get("id") in edits and node.get("type") == "genericNode":
+            nodes.append(_apply_node_edit(node, edits[node["id"]]))
+        elif node.get("type") != "genericNode" or partial:
+            nodes.append(node)
+
+    for node_id, edit in edits.items():
+        if node_id in by_id:
+            continue
+        source = by_type.get(edit.get("type"))
+        if source is not None:
+            nodes.append(_apply_node_edit(_clone_node(source, node_id), edit))
+            continue
+        source = (node_templates or {}).get(edit.get("type"))
+        if source is None:
+            logger.warning(f"Skipping new node {node_id}: no {edit.get('type')} node in the template to clone")
+            continue
+        right = max((node.get("position", {}).get("x", 0) for node in nodes), default=0)
+        nodes.append(_apply_node_edit(_clone_node(source, node_id, x=right + NEW_NODE_OFFSET), edit))
+
+    return nodes
+
+
+def _apply_node_edit(node: Dict[str, Any], edit: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy only the path down to changed fields; unchanged nodes are returned as is."""
+    component = node.get("data", {}).get("node", {})
+    template = component.get("template", {})
+
+    params = edit.get("params") if isinstance(edit.get("params"), dict) else {}
+    changed_fields = {
+        name: value for name, value in params.items()
+        if isinstance(template.get(name), dict) and template[name].get("value") != value
+        and not _is_truncation(template[name].get("value"), value)
+    }
+    display_name = edit.get("display_name")
+    rename = isinstance(display_name, str) and display_name != component.get("display_name")
+
+    if not changed_fields and not rename:
+        return node
+
+    node = dict(node)
+    node["data"] = dict(node["data"])
+    component = node["data"]["node"] = dict(component)
+    if rename:
+        component["display_name"] = display_name
+    if changed_fields:
+        template = component["template"] = dict(template)
+        for name, value in changed_fields.items():
+            template[name] = dict(template[name], value=value)
+    return node
+
+
+def _is_truncation(original: Any, value: Any) -> bool:
+    """True for a prompt-shortened echo (``"abc..."``) of a longer original string."""
+    return (isinstance(original, str) and isinstance(value, str) and value.endswith("...")
+            and len(value) - 3 < len(original) and original.startswith(value[:-3]))
+
+
+def _clone_node(source: Dict[str, Any], node_id: str, x: Optional[float] = None) -> Dict[str, Any]:
+    """Copy of ``source`` with a new id, at ``x`` (default: next to the source)."""
+    node = copy.deepcopy(source)
+    node["id"] = node_id
+    node["data"]["id"] = node_id
+    for key in ("position", "positionAbsolute"):
+        if isinstance(node.get(key), dict):
+            node[key] = dict(node[key], x=node[key].get("x", 0) + NEW_NODE_OFFSET if x is None else x)
+    return node
+
+
+def _edge_key(edge: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+    edge_data = edge.get("data", {})
+    return (edge.get("source"), edge_data.get("sourceHandle", {}).get("name"),
+            edge.get("target"), edge_data.get("targetHandle", {}).get("fieldName"))
+
+
+def _edge_key_dict(edge: Dict[str, Any]) -> Dict[str, Any]:
+    source, output, target, field = _edge_key(edge)
+    return {"source": source, "output": output, "target": target, "input": field}
+
+
+def _rehydrate_edges(template_edges: List[Dict[str, Any]], skeleton_edges: List[Any],
+                     nodes: Dict[str, Dict[str, Any]], partial: bool = False) -> List[Dict[str, Any]]:
+    wanted = [_edge_key(edge) for edge in template_edges] if partial else []
+    for edge in skeleton_edges:
+        if isinstance(edge, dict):
+            key = (edge.get("source"), edge.get("output"), edge.get("target"), edge.get("input"))
+            if key not in wanted:
+                wanted.append(key)
+
+    existing = {}
+    for edge in template_edges:
+        existing.setdefault(_edge_key(edge), edge)
+
+    edges = []
+    for key in wanted:
+        source, _, target, _ = key
+        if source not in nodes or target not in nodes:
+            continue
+        edge = existing.get(key) or build_edge(key, nodes)
+        if edge is not None:
+            edges.append(edge)
+
+    # Keep the template's edge order for the edges that survive
+    order = {id(edge): position for position, edge in enumerate(template_edges)}
+    edges.sort(key=lambda edge: order.get(id(edge), len(order)))
+    return edges
+
+
+def build_edge(key: Tuple[str, str, str, str], nodes: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Create a ReactFlow edge for a new connection, or None if the handles don't exist."""
+    source_id, output_name, target_id, field_name = key
+    source_component = nodes[source_id].get("data", {}).get("node", {})
+    target_data = nodes[target_id].get("data", {})
+    output = next((o for o in source_component.get("outputs", []) if o.get("name") == output_name), None)
+    field = target_data.get("node", {}).get("template", {}).get(field_name)
+    if output is None or not isinstance(field, dict):
+        logger.warning(f"Skipping edge {source_id}.{output_name} -> {target_id}.{field_name}: unknown handle")
+        return None
+
+    source_handle = {"dataType": nodes[source_id].get("data", {}).get("type"), "id": source_id,
+                     "name": output_name, "output_types": output.get("types", [])}
+    target_handle = {"fieldName": field_name, "id": target_id,
+                     "inputTypes": field.get("input_types"), "type": field.get("type")}
+
+    return {
+        "animated": False,
+        "className": "",
+        "data": {"sourceHandle": source_handle, "targetHandle": target_handle},
+        "id": f"reactflow__edge-{source_id}{_encode_handle(source_handle, compact=True)}"
+              f"-{target_id}{_encode_handle(target_handle, compact=True)}",
+        "selected": False,
+        "source": source_id,
+        "sourceHandle": _encode_handle(source_handle),
+        "target": target_id,
+        "targetHandle": _encode_handle(target_handle)
+    }
+
+
+def _encode_handle(handle: Dict[str, Any], compact: bool = False) -> str:
+    """ReactFlow's handle encoding: JSON with ``œ`` in place of double quotes."""
+    separators = (",", ":") if compact else (", ", ": ")
+    return json.dumps(handle, separators=separators, ensure_ascii=False).replace('"', "œ")
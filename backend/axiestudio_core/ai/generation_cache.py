@@ -0,0 +1,167 @@
+"""
+Generation Cache
+
+Content-addressed cache for flow generation results. Keys are derived from
+the normalised user description, flow type, model and template-set version,
+so near-identical requests ("Simple chatbot with GPT-4!" vs "simple chatbot
+with gpt-4") share one set of LLM calls.
+
+Two tiers:
+- in-process LRU with per-entry TTL (always on)
+- optional SQLite tier on disk, shared across workers and restarts
+
+The service container builds the configured cache from ``Settings`` and
+hands it to the generators. Generators built without one share a
+memory-only default from ``get_generation_cache()``.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .lazy_instance import LazyInstance
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n.,!?;:\"'"
+
+
+def normalize_description(description: str) -> str:
+    """Normalise a description so trivially different phrasings share a key."""
+    return _WHITESPACE.sub(" ", description.lower()).strip(_EDGE_PUNCTUATION)
+
+
+def make_cache_key(namespace: str, description: str, flow_type: Optional[str] = None,
+                   model: Optional[str] = None, template_version: Optional[str] = None) -> str:
+    """Build a content-addressed cache key for a generation request."""
+    payload = json.dumps(
+        [namespace, normalize_description(description), flow_type or "", model or "", template_version or ""]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def content_version(paths: Iterable[Path]) -> str:
+    """Version a set of files by name, size and mtime (cheap, no content reads)."""
+    digest = hashlib.sha1()
+    for path in sorted(Path(p) for p in paths):
+        try:
+            stat = path.stat()
+            digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+        except OSError:
+            digest.update(f"{path.name}:missing;".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def mark_degraded(flow: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of ``flow`` flagged in its metadata as built from a fallback; such flows are never cached."""
+    return dict(flow, metadata=dict(flow.get("metadata") or {}, degraded=True))
+
+
+def is_degraded(flow: Optional[Dict[str, Any]]) -> bool:
+    return bool(flow and (flow.get("metadata") or {}).get("degraded"))
+
+
+class GenerationCache:
+    """Two-tier (memory LRU + optional SQLite) cache with TTLs and hit/miss metrics.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: int = 3600, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "sets": 0, "evictions": 0}
+
+        self._disk: Optional[sqlite3.Connection] = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS generation_cache ("
+                "key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._disk.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+
+            if self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT expires_at, value FROM generation_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[0] > now:
+                    value = json.loads(row[1])
+                    self._remember(key, value, row[0])
+                    self._stats["disk_hits"] += 1
+                    return value
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None):
+        """Store a value in every tier."""
+        expires_at = time.time() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self._stats["sets"] += 1
+
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO generation_cache (key, expires_at, value) VALUES (?, ?, ?)",
+                    (key, expires_at, json.dumps(value, default=str))
+                )
+                self._disk.execute("DELETE FROM generation_cache WHERE expires_at <= ?", (time.time(),))
+                self._disk.commit()
+
+    def _remember(self, key: str, value: Any, expires_at: float):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._memory.clear()
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM generation_cache")
+                self._disk.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss metrics."""
+        with self._lock:
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            lookups = hits + self._stats["misses"]
+            return dict(
+                self._stats,
+                hits=hits,
+                hit_rate=hits / lookups if lookups else 0.0,
+                memory_entries=len(self._memory),
+                disk_enabled=self._disk is not None
+            )
+
+
+_generation_cache = LazyInstance(GenerationCache)
+
+
+def get_generation_cache() -> GenerationCache:
+    """Get the shared memory-only cache of generators that were not given one."""
+    return _generation_cache.get()
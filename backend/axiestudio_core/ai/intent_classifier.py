@@ -0,0 +1,286 @@
+"""
+Local Intent Classifier
+
+Most requests name their use case plainly ("build a PDF Q&A bot", "what
+is a vector store?"), and sending each one to GPT-4 costs a full round
+trip. This module answers them on the CPU instead, in well under a
+millisecond:
+
+- Features are hashed: word unigrams, word bigrams (the first word
+  anchored, so "what is ..." and "build ..." read differently) and
+  character trigrams of longer words, which absorb typos and plurals.
+- A multinomial logistic regression is trained offline on
+  ``intent_examples.json``. Its sparse weights are shipped as
+  ``intent_model.json``.
+- ``predict`` returns a label with its probability. Callers handle the
+  request locally when the probability reaches their threshold, and
+  escalate to the LLM otherwise. Requests without a single word the model
+  was trained on are never trusted.
+
+Labels are ``conversation`` (a question, no flow wanted) and the use cases
+of the generators' component rules. Retrain after editing the examples:
+
+    python -m ai.intent_classifier --train
+"""
+
+import argparse
+import json
+import logging
+import math
+import random
+import re
+import sys
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .lazy_instance import LazyInstance
+
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = Path(__file__).parent / "intent_model.json"
+EXAMPLES_PATH = Path(__file__).parent / "intent_examples.json"
+
+# Bump whenever the features change; older weight files are then rejected
+FEATURE_VERSION = 1
+DEFAULT_DIM = 1 << 18
+DEFAULT_THRESHOLD = 0.8
+
+CONVERSATION = "conversation"
+USE_CASES = ("basic_chat", "document_qa", "agent_tools", "rag_system", "data_processing")
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def features(text: str) -> List[str]:
+    """Hashed-feature names of a text (before hashing)."""
+    words = _words(text)
+    names = [f"w:{word}" for word in words]
+    names += [f"b:{first} {second}" for first, second in zip(["^", *words], words)]
+    for word in words:
+        if len(word) > 3:
+            padded = f"#{word}#"
+            names += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return names
+
+
+def _bucket(name: str, dim: int) -> int:
+    return zlib.crc32(name.encode("utf-8")) % dim
+
+
+def _hash(names: Iterable[str], dim: int) -> Dict[int, float]:
+    """Binary feature vector, scaled to unit length."""
+    buckets = {_bucket(name, dim) for name in names}
+    value = 1.0 / math.sqrt(len(buckets)) if buckets else 0.0
+    return {bucket: value for bucket in buckets}
+
+
+def _softmax(scores: List[float]) -> List[float]:
+    top = max(scores)
+    exps = [math.exp(score - top) for score in scores]
+    total = sum(exps)
+    return [value / total for value in exps]
+
+
+@dataclass
+class Prediction:
+    label: str
+    confidence: float
+    probabilities: Dict[str, float]
+    known: bool  # Whether any word of the text was seen in training
+
+    def confident(self, threshold: float) -> bool:
+        return self.known and self.confidence >= threshold
+
+
+class IntentClassifier:
+    """Multinomial logistic regression over hashed n-grams."""
+
+    def __init__(self, labels: Sequence[str], weights: Dict[int, List[float]], bias: List[float],
+                 dim: int = DEFAULT_DIM):
+        self.labels = list(labels)
+        self.weights = weights
+        self.bias = bias
+        self.dim = dim
+        self._stats: Counter = Counter()
+
+    @classmethod
+    def load(cls, path: Path = MODEL_PATH) -> "IntentClassifier":
+        model = json.loads(Path(path).read_text(encoding="utf-8"))
+        if model.get("feature_version") != FEATURE_VERSION:
+            raise ValueError(f"Intent model {path} was trained with other features; retrain it")
+        weights = {int(bucket): row for bucket, row in model["weights"].items()}
+        return cls(model["labels"], weights, model["bias"], model["dim"])
+
+    def save(self, path: Path = MODEL_PATH, precision: int = 4):
+        model = {
+            "feature_version": FEATURE_VERSION,
+            "dim": self.dim,
+            "labels": self.labels,
+            "bias": [round(value, precision) for value in self.bias],
+            "weights": {str(bucket): [round(value, precision) for value in row]
+                        for bucket, row in sorted(self.weights.items())},
+        }
+        Path(path).write_text(json.dumps(model, separators=(",", ":")), encoding="utf-8")
+
+    def predict(self, text: str, labels: Optional[Sequence[str]] = None) -> Prediction:
+        """Most likely label of ``text``, optionally restricted to ``labels``."""
+        vector = _hash(features(text), self.dim)
+        scores = list(self.bias)
+        for bucket, value in vector.items():
+            row = self.weights.get(bucket)
+            if row is not None:
+                for index, weight in enumerate(row):
+                    scores[index] += weight * value
+        # Character trigrams match almost anything; only whole words count as known
+        known = any(_bucket(f"w:{word}", self.dim) in self.weights for word in _words(text))
+
+        candidates = [index for index, label in enumerate(self.labels) if labels is None or label in labels]
+        probabilities = _softmax([scores[index] for index in candidates])
+        best = max(range(len(candidates)), key=probabilities.__getitem__)
+        return Prediction(
+            label=self.labels[candidates[best]],
+            confidence=probabilities[best],
+            probabilities={self.labels[index]: p for index, p in zip(candidates, probabilities)},
+            known=known,
+        )
+
+    def classify(self, text: str, threshold: float = DEFAULT_THRESHOLD,
+                 labels: Optional[Sequence[str]] = None) -> Optional[str]:
+        """The label of ``text`` if the prediction is confident, else None (ask the LLM)."""
+        prediction = self.predict(text, labels)
+        if prediction.confident(threshold):
+            self._stats["local"] += 1
+            logger.info(f"🎯 Local intent: {prediction.label} ({prediction.confidence:.2f})")
+            return prediction.label
+        self._stats["escalated"] += 1
+        return None
+
+    def stats(self) -> Dict[str, float]:
+        local, escalated = self._stats["local"], self._stats["escalated"]
+        return {"local": local, "escalated": escalated,
+                "local_rate": local / (local + escalated) if local + escalated else 0.0}
+
+    @classmethod
+    def train(cls, examples: Sequence[Tuple[str, str]], dim: int = DEFAULT_DIM, epochs: int = 30,
+              learning_rate: float = 0.5, l2: float = 1e-5, prune: float = 1e-3, seed: int = 0) -> "IntentClassifier":
+        """Fit on ``(text, label)`` pairs with SGD; weights below ``prune`` are dropped.
+
+        Examples are weighted inversely to their label's frequency, so every
+        label carries the same total weight.
+        """
+        labels = sorted({label for _, label in examples})
+        label_index = {label: index for index, label in enumerate(labels)}
+        counts = Counter(label for _, label in examples)
+        data = [(_hash(features(text), dim), label_index[label], len(examples) / (len(labels) * counts[label]))
+                for text, label in examples]
+        weights: Dict[int, List[float]] = {}
+        bias = [0.0] * len(labels)
+        rng = random.Random(seed)
+
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            rate = learning_rate / (1 + epoch * 0.1)
+            for vector, target, sample_weight in data:
+                scores = list(bias)
+                for bucket, value in vector.items():
+                    row = weights.get(bucket)
+                    if row is not None:
+                        for index, weight in enumerate(row):
+                            scores[index] += weight * value
+                gradient = _softmax(scores)
+                gradient[target] -= 1.0
+                gradient = [g * sample_weight for g in gradient]
+                for index, g in enumerate(gradient):
+                    bias[index] -= rate * g
+                for bucket, value in vector.items():
+                    row = weights.setdefault(bucket, [0.0] * len(labels))
+                    for index, g in enumerate(gradient):
+                        row[index] -= rate * (g * value + l2 * row[index])
+
+        weights = {bucket: row for bucket, row in weights.items() if max(map(abs, row)) >= prune}
+        return cls(labels, weights, bias, dim)
+
+
+def load_examples(path: Path = EXAMPLES_PATH, holdout_every: int = 0) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """Expand the example file into training and held-out ``(text, label)`` pairs.
+
+    Flow use cases list request phrases that are combined with every flow
+    prefix ("build", "I need" ...); conversation topics are combined with
+    every question prefix. Plain ``texts`` are used as they are. With
+    ``holdout_every``, every n-th phrase or text of a label is held out with
+    all its expansions, so held-out requests are really unseen.
+    """
+    spec = json.loads(Path(path).read_text(encoding="utf-8"))
+    training, held_out = [], []
+    for label, entry in spec["labels"].items():
+        prefixes = spec["question_prefixes"] if label == CONVERSATION else spec["flow_prefixes"]
+        # A bare topic ("embeddings") is no question, but a bare use case is a request
+        groups = [[*([phrase] if label != CONVERSATION else []), *(f"{prefix} {phrase}" for prefix in prefixes)]
+                  for phrase in entry.get("phrases", [])]
+        groups += [[text] for text in entry.get("texts", [])]
+        for position, group in enumerate(groups):
+            target = held_out if holdout_every and position % holdout_every == holdout_every - 1 else training
+            target += [(text, label) for text in group]
+    return training, held_out
+
+
+def evaluate(classifier: IntentClassifier, examples: Sequence[Tuple[str, str]],
+             threshold: float = DEFAULT_THRESHOLD) -> Dict[str, float]:
+    """Accuracy overall and on the examples confident enough to skip the LLM."""
+    predictions = [(classifier.predict(text), label) for text, label in examples]
+    confident = [(prediction, label) for prediction, label in predictions if prediction.confident(threshold)]
+    return {
+        "accuracy": sum(p.label == label for p, label in predictions) / len(predictions),
+        "coverage": len(confident) / len(predictions),
+        "confident_accuracy": sum(p.label == label for p, label in confident) / len(confident) if confident else 0.0,
+    }
+
+
+def _load_default() -> Optional[IntentClassifier]:
+    try:
+        return IntentClassifier.load()
+    except Exception as e:
+        logger.warning(f"Local intent classifier unavailable, every intent goes to the LLM: {e}")
+        return None
+
+
+_intent_classifier = LazyInstance(_load_default)
+
+
+def get_intent_classifier() -> Optional[IntentClassifier]:
+    """Get the shipped classifier (loaded on first use), or None if its weights are missing."""
+    return _intent_classifier.get()
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Train or try the local intent classifier")
+    parser.add_argument("--train", action="store_true", help=f"retrain {MODEL_PATH.name} from {EXAMPLES_PATH.name}")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("text", nargs="*", help="requests to classify")
+    args = parser.parse_args(argv)
+
+    if args.train:
+        training, held_out = load_examples(holdout_every=5)
+        print(f"Held-out phrases (1 in 5): {evaluate(IntentClassifier.train(training), held_out, args.threshold)}")
+        examples, _ = load_examples()
+        classifier = IntentClassifier.train(examples)
+        classifier.save()
+        print(f"Trained on {len(examples)} examples: {len(classifier.weights)} weight rows -> {MODEL_PATH}")
+    else:
+        classifier = IntentClassifier.load()
+
+    for text in args.text:
+        prediction = classifier.predict(text)
+        verdict = "local" if prediction.confident(args.threshold) else "LLM"
+        print(f"{prediction.label:16} {prediction.confidence:.2f} {verdict:5} {text}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
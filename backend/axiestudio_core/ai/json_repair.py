@@ -0,0 +1,141 @@
+"""
+JSON Repair
+
+Completions often wrap their JSON in Markdown fences or prose, leave a
+trailing comma, or stop mid-object when they hit ``max_tokens``. Parsing
+them with ``json.loads`` throws the whole completion away. ``parse_json``
+salvages what is there instead:
+
+1. Valid JSON is parsed as is (fast path).
+2. The JSON is located inside fences or surrounding prose.
+3. Otherwise a single scan drops trailing commas and cuts truncated text
+   back to its last complete member, then closes the open objects and
+   arrays. A half-written string or number is never returned as data, and
+   array elements are all-or-nothing (no half-written nodes or edges).
+
+    parse_json('```json\\n{"nodes": [{"id": "a"}, {"id": "b", "ty')
+    -> {"nodes": [{"id": "a"}]}
+"""
+
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:```|$)", re.DOTALL)
+_CLOSERS = {"{": "}", "[": "]"}
+
+_decoder = json.JSONDecoder()
+
+
+class JSONRepairError(ValueError):
+    """Raised when no JSON value can be salvaged from the text."""
+
+
+def parse_json(text: Optional[str]) -> Any:
+    """Parse JSON from a completion, repairing fences, trailing commas and truncation."""
+    return parse_json_partial(text)[0]
+
+
+def parse_json_partial(text: Optional[str]) -> Tuple[Any, bool]:
+    """Like :func:`parse_json`, also returning False if the JSON was truncated.
+
+    A truncated value is missing its tail: callers should not read an
+    absent key or a short list as "remove the rest".
+    """
+    if not text:
+        raise JSONRepairError("Empty completion")
+    try:
+        return json.loads(text), True
+    except ValueError:
+        pass
+
+    candidate = _extract(text)
+    if candidate is None:
+        raise JSONRepairError("No JSON object or array in completion")
+
+    # Complete value followed by prose
+    try:
+        return _decoder.raw_decode(candidate)[0], True
+    except ValueError:
+        pass
+
+    repaired, complete = _repair(candidate)
+    try:
+        return json.loads(repaired), complete
+    except ValueError as e:
+        raise JSONRepairError(f"Could not repair JSON in completion: {e}") from e
+
+
+def _extract(text: str) -> Optional[str]:
+    """The text from the first ``{`` or ``[``, preferring a fenced block."""
+    fenced = _FENCE.search(text)
+    if fenced and fenced.group(1).strip():
+        text = fenced.group(1)
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    return text[min(starts):].strip() if starts else None
+
+
+def _repair(text: str) -> Tuple[str, bool]:
+    """Close the text at its last complete member, dropping trailing commas.
+
+    Also returns whether the value was complete (only commas were fixed).
+    """
+    chars: List[str] = []
+    stack: List[str] = []
+    # Cut point (length of chars) and open containers after the last complete member
+    # that leaves no array element half-written
+    safe_point: Tuple[int, Tuple[str, ...]] = (0, ())
+    in_string = escaped = False
+
+    for char in text:
+        if in_string:
+            chars.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char in "}]":
+            if not stack or _CLOSERS[stack[-1]] != char:
+                break  # Unbalanced: keep what came before
+            _drop_trailing_comma(chars)
+            stack.pop()
+            chars.append(char)
+            if not stack:
+                return "".join(chars), True  # Complete value; anything after is prose
+            if _elements_whole(stack):
+                safe_point = (len(chars), tuple(stack))
+            continue
+
+        if char == "," and _elements_whole(stack):
+            safe_point = (len(chars), tuple(stack))
+        chars.append(char)
+        if char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(char)
+            if _elements_whole(stack):
+                safe_point = (len(chars), tuple(stack))
+
+    length, open_containers = safe_point
+    head = chars[:length]
+    _drop_trailing_comma(head)
+    return "".join(head).rstrip() + "".join(_CLOSERS[opener] for opener in reversed(open_containers)), False
+
+
+def _elements_whole(stack: List[str]) -> bool:
+    """True unless an object inside an array is open (closing it would keep a partial element)."""
+    if "[" not in stack:
+        return True
+    return "{" not in stack[stack.index("[") + 1:]
+
+
+def _drop_trailing_comma(chars: List[str]):
+    index = len(chars) - 1
+    while index >= 0 and chars[index].isspace():
+        index -= 1
+    if index >= 0 and chars[index] == ",":
+        del chars[index:]
@@ -0,0 +1,495 @@
+"""
+Unified AxieStudio Knowledge Index
+
+Parses every component ``.py`` file and every starter-project JSON file exactly
+once and keeps a single canonical in-memory representation:
+
+- ``ModuleRecord`` per component module: class summaries (name, bases,
+  docstring) plus the facts the consumers used to re-derive with their own
+  ``ast.parse``/regex passes. Neither the source text nor the AST is kept.
+- ``FlowDocument`` per starter project: the parsed JSON, shared by reference.
+
+The crawler, flow indexer, knowledge processor and template generator build
+their views from this index instead of walking the data directories
+themselves. Flow documents are shared between all views and must be treated
+as read-only; copy before mutating.
+
+Changed modules can be parsed in parallel: with ``workers > 1``
+(``0`` = one per core) the files to parse are
+sharded across a process pool and merged back in sorted path order, so the
+result is identical to a sequential build.
+
+The index persists itself to a versioned on-disk cache keyed by file path,
+mtime, size and content hash, so a restart only re-parses files that
+changed. ``semantic()`` adds embedding indexes (see ``semantic_index``)
+whose matrices are cached alongside, and ``wiring()`` the component
+type-compatibility graph (see ``wiring_index``). Prebuild both (e.g. in the Docker
+image) with:
+
+    cd backend/axiestudio_core && python -m ai.knowledge_index build
+"""
+
+import argparse
+import ast
+import math
+import multiprocessing
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .generation_cache import content_version
+from .lazy_instance import LazyInstance
+from .semantic_index import SemanticCatalog
+from .wiring_index import WiringIndex
+
+logger = logging.getLogger(__name__)
+
+# backend/axiestudio_core/axiestudio
+DEFAULT_DATA_ROOT = Path(__file__).parent.parent / "axiestudio"
+CACHE_FILE_NAME = "knowledge_index.pickle"
+
+# Bump whenever ModuleRecord/ClassSummary or the extracted facts change
+INDEX_FORMAT_VERSION = 1
+
+# Below this many changed modules a process pool costs more than it saves
+PARALLEL_MIN_FILES = 32
+
+_DISPLAY_NAME = re.compile(r'display_name\s*=\s*["\']([^"\']+)["\']')
+_DESCRIPTION = re.compile(r'description\s*=\s*["\']([^"\']+)["\']')
+_INPUTS_BLOCK = re.compile(r'inputs\s*=\s*\[(.*?)\]', re.DOTALL)
+_OUTPUTS_BLOCK = re.compile(r'outputs\s*=\s*\[(.*?)\]', re.DOTALL)
+# Anchored at word starts: same matches as unanchored, without rescanning every suffix
+_TYPED_INPUT_PATTERNS = [
+    re.compile(r'\b(\w+)\s*:\s*(\w+Input)\s*=\s*(\w+Input)\('),
+    re.compile(r'\b(\w+)\s*=\s*(\w+Input)\('),
+]
+_OUTPUT_PATTERNS = [
+    re.compile(r'return\s+(\w+)\('),
+    re.compile(r'self\.status\s*=\s*(\w+)'),
+]
+_STATEMENT_BLOCKS = ("body", "handlers", "orelse", "finalbody", "cases")
+_IMPORT = re.compile(r'from\s+(\S+)\s+import|import\s+(\S+)')
+_COMPONENT_MARKERS = ["Component", "display_name", "description", "inputs", "outputs", "build_", "@component"]
+_CONTENT_USE_CASES = [
+    (("chat",), "chat"),
+    (("search",), "search"),
+    (("document", "pdf"), "document_processing"),
+    (("embedding",), "embeddings"),
+]
+
+
+@dataclass
+class ClassSummary:
+    """A class definition, without its AST."""
+    name: str
+    bases: List[str]  # Plain names ("Component") or dotted attributes ("lc.Component")
+    docstring: Optional[Any] = None
+
+
+@dataclass
+class ModuleRecord:
+    """Everything the consumers need from one component module."""
+    path: str
+    relative_path: str
+    category: str
+    classes: List[ClassSummary]
+    code_hash: str
+    display_name: Optional[str] = None
+    description: Optional[str] = None
+    class_description: Optional[str] = None  # Text after ``class <component_class>...:``
+    component_class: Optional[str] = None  # First class with a ``*Component*`` base name
+    inputs_block: Optional[str] = None  # Raw ``inputs = [...]`` contents
+    outputs_block: Optional[str] = None
+    typed_inputs: List[Dict[str, Any]] = field(default_factory=list)
+    output_types: List[str] = field(default_factory=list)
+    dependencies: List[str] = field(default_factory=list)
+    content_use_cases: List[str] = field(default_factory=list)
+    looks_like_component: bool = False
+    has_build_method: bool = False
+    has_inputs: bool = False
+    has_outputs: bool = False
+
+
+@dataclass
+class FlowDocument:
+    """A parsed starter-project flow (shared, read-only)."""
+    stem: str
+    path: str
+    data: Dict[str, Any]
+
+    @property
+    def name(self) -> str:
+        return self.data.get("name", self.stem)
+
+
+class KnowledgeIndex:
+    """Single-pass index of AxieStudio components and starter projects."""
+
+    def __init__(self, data_root: Optional[Path] = None, cache_path: Optional[str] = None,
+                 use_cache: bool = True, workers: Optional[int] = None):
+        self.data_root = Path(data_root) if data_root else DEFAULT_DATA_ROOT
+        self.components_dir = self.data_root / "axiestudio_components"
+        self.starter_projects_dir = self.data_root / "axiestudio_initial_setup" / "starter_projects"
+        self.cache_path = Path(cache_path or self.data_root / CACHE_FILE_NAME)
+        self.use_cache = use_cache
+        if workers is None:
+            workers = 1
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+
+        self.modules: Dict[str, ModuleRecord] = {}
+        self.flows: Dict[str, FlowDocument] = {}
+        self.build_stats = {"reused": 0, "parsed": 0, "removed": 0, "cache_loaded": False,
+                            "parallel": False, "build_time": 0.0}
+
+        # Cache entries: relative path -> (mtime_ns, size, content hash, record)
+        self._module_entries: Dict[str, Tuple[int, int, str, Optional[Dict[str, Any]]]] = {}
+        self._flow_entries: Dict[str, Tuple[int, int, str, Optional[Dict[str, Any]]]] = {}
+        self._dirty = False
+        self._semantic = LazyInstance(lambda: SemanticCatalog(self, use_cache=self.use_cache))
+        self._wiring = LazyInstance(lambda: WiringIndex.from_index(self))
+
+        self._build()
+
+        self.flows_version = content_version(Path(doc.path) for doc in self.flows.values())
+
+    def _build(self):
+        start_time = time.time()
+        logger.info(f"📚 Building knowledge index from {self.data_root}")
+
+        cached = self._load_cache() if self.use_cache else {}
+        cached_modules = cached.get("modules", {})
+        cached_flows = cached.get("flows", {})
+
+        if self.components_dir.exists():
+            module_files = [path for path in sorted(self.components_dir.rglob("*.py"))
+                            if not path.name.startswith("__")]
+            pending = []
+            for py_file in module_files:
+                relative_path = py_file.relative_to(self.components_dir).as_posix()
+                entry, raw = self._check_entry(py_file, cached_modules.get(relative_path))
+                self._module_entries[relative_path] = entry
+                if raw is not None:
+                    pending.append((relative_path, py_file, raw))
+
+            records = self._parse_modules([(str(py_file), raw) for _, py_file, raw in pending])
+            for (relative_path, _, _), record in zip(pending, records):
+                self._module_entries[relative_path] += (record,)
+
+            for py_file in module_files:
+                relative_path = py_file.relative_to(self.components_dir).as_posix()
+                record = self._module_entries[relative_path][3]
+                if record is not None:
+                    self.modules[relative_path] = self._module_from_dict(record, py_file)
+
+        if self.starter_projects_dir.exists():
+            for json_file in sorted(self.starter_projects_dir.glob("*.json")):
+                entry, raw = self._check_entry(json_file, cached_flows.get(json_file.name))
+                if raw is not None:
+                    entry += (self._parse_flow(json_file, raw),)
+                self._flow_entries[json_file.name] = entry
+                if entry[3] is not None:
+                    self.flows[json_file.stem] = FlowDocument(stem=json_file.stem, path=str(json_file), data=entry[3])
+
+        self.build_stats["removed"] = (len(set(cached_modules) - set(self._module_entries))
+                                       + len(set(cached_flows) - set(self._flow_entries)))
+        if self.use_cache and (self._dirty or self.build_stats["removed"]):
+            self.save()
+
+        self.build_stats["build_time"] = time.time() - start_time
+        logger.info(
+            f"✅ Knowledge index ready: {len(self.modules)} modules, {len(self.flows)} flows "
+            f"({self.build_stats['parsed']} parsed, {self.build_stats['reused']} reused) "
+            f"in {self.build_stats['build_time']:.2f}s"
+        )
+
+    def _check_entry(self, file_path: Path, entry: Optional[tuple]) -> Tuple[tuple, Optional[bytes]]:
+        """Reuse a cache entry when the file is unchanged.
+
+        mtime + size short-circuits without reading the file; a touched file
+        whose content hash is unchanged is reused without parsing. Otherwise
+        returns ``(mtime_ns, size, hash)`` and the raw bytes to parse.
+        """
+        stat = file_path.stat()
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            self.build_stats["reused"] += 1
+            return entry, None
+
+        self._dirty = True
+        raw = file_path.read_bytes()
+        digest = hashlib.md5(raw).hexdigest()
+        if entry is not None and entry[2] == digest:
+            self.build_stats["reused"] += 1
+            return (stat.st_mtime_ns, stat.st_size, digest, entry[3]), None
+
+        self.build_stats["parsed"] += 1
+        return (stat.st_mtime_ns, stat.st_size, digest), raw
+
+    def _parse_modules(self, files: List[Tuple[str, bytes]]) -> List[Optional[Dict[str, Any]]]:
+        """Parse modules, sharded across a process pool when worthwhile; results keep input order."""
+        if self.workers <= 1 or len(files) < PARALLEL_MIN_FILES:
+            return self._parse_shard(str(self.components_dir), files)
+
+        shard_size = math.ceil(len(files) / (self.workers * 4))
+        shards = [files[i:i + shard_size] for i in range(0, len(files), shard_size)]
+        logger.info(f"⚡ Parsing {len(files)} modules in {len(shards)} shards across {self.workers} processes")
+
+        try:
+            # spawn: forking a threaded server process is not safe
+            with ProcessPoolExecutor(max_workers=self.workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as executor:
+                results = executor.map(self._parse_shard, [str(self.components_dir)] * len(shards), shards)
+                records = [record for shard in results for record in shard]
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning(f"Parallel indexing failed ({e}), parsing sequentially")
+            return self._parse_shard(str(self.components_dir), files)
+
+        self.build_stats["parallel"] = True
+        return records
+
+    @classmethod
+    def _parse_shard(cls, components_dir: str, files: List[Tuple[str, bytes]]) -> List[Optional[Dict[str, Any]]]:
+        """Parse a shard of modules into plain dicts (runs in worker processes)."""
+        records = []
+        for file_path, raw in files:
+            record = cls._parse_module(Path(components_dir), Path(file_path), raw)
+            records.append(asdict(record) if record else None)
+        return records
+
+    @staticmethod
+    def _parse_flow(file_path: Path, raw: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(raw)
+        except Exception as e:
+            logger.warning(f"Failed to load flow {file_path}: {e}")
+            return None
+
+    @staticmethod
+    def _module_from_dict(data: Dict[str, Any], file_path: Path) -> ModuleRecord:
+        fields = dict(data, path=str(file_path))
+        fields["classes"] = [ClassSummary(**cls) for cls in data["classes"]]
+        return ModuleRecord(**fields)
+
+    def _load_cache(self) -> Dict[str, Any]:
+        """Load the on-disk cache; a missing, corrupt or outdated cache is ignored."""
+        try:
+            with open(self.cache_path, "rb") as f:
+                cached = pickle.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable knowledge index cache {self.cache_path}: {e}")
+            return {}
+
+        if not isinstance(cached, dict) or cached.get("format") != INDEX_FORMAT_VERSION:
+            logger.info("Knowledge index cache format changed, rebuilding")
+            return {}
+
+        self.build_stats["cache_loaded"] = True
+        return cached
+
+    def save(self, cache_path: Optional[str] = None) -> Optional[Path]:
+        """Write the index cache atomically. Failures (e.g. read-only images) are logged, not raised.
+
+        Only builtins are pickled, so the cache loads no matter how this
+        module was imported.
+        """
+        path = Path(cache_path) if cache_path else self.cache_path
+        payload = {"format": INDEX_FORMAT_VERSION, "modules": self._module_entries, "flows": self._flow_entries}
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write knowledge index cache {path}: {e}")
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+            return None
+        return path
+
+    @classmethod
+    def _parse_module(cls, components_dir: Path, file_path: Path, raw: bytes) -> Optional[ModuleRecord]:
+        """Parse and summarise one component module."""
+        try:
+            content = raw.decode("utf-8")
+            tree = ast.parse(content)
+        except Exception as e:
+            logger.warning(f"Failed to parse {file_path}: {e}")
+            return None
+
+        classes = [cls._summarize_class(node) for node in cls._iter_classes(tree)]
+        component_class = next(
+            (summary.name for summary in classes
+             if any("." not in base and "Component" in base for base in summary.bases)),
+            None
+        )
+        relative_path = file_path.relative_to(components_dir)
+        description = cls._first_group(_DESCRIPTION, content)
+
+        return ModuleRecord(
+            path=str(file_path),
+            relative_path=relative_path.as_posix(),
+            category=relative_path.parts[0] if len(relative_path.parts) > 1 else "",
+            classes=classes,
+            code_hash=hashlib.md5(raw).hexdigest(),
+            display_name=cls._first_group(_DISPLAY_NAME, content),
+            description=description,
+            class_description=None if description else cls._class_description(content, component_class),
+            component_class=component_class,
+            inputs_block=cls._first_group(_INPUTS_BLOCK, content),
+            outputs_block=cls._first_group(_OUTPUTS_BLOCK, content),
+            typed_inputs=cls._typed_inputs(content),
+            output_types=[
+                match.group(1)
+                for pattern in _OUTPUT_PATTERNS
+                for match in pattern.finditer(content)
+                if match.group(1) not in ['self', 'super']
+            ],
+            dependencies=cls._dependencies(content),
+            content_use_cases=cls._content_use_cases(content),
+            looks_like_component=any(marker in content for marker in _COMPONENT_MARKERS),
+            has_build_method="def build" in content,
+            has_inputs="inputs" in content,
+            has_outputs="outputs" in content
+        )
+
+    @staticmethod
+    def _iter_classes(tree: ast.AST):
+        """Yield class definitions in ``ast.walk`` order, visiting statements only."""
+        queue = deque([tree])
+        while queue:
+            node = queue.popleft()
+            if isinstance(node, ast.ClassDef):
+                yield node
+            for block in _STATEMENT_BLOCKS:
+                children = getattr(node, block, None)
+                if isinstance(children, list):
+                    queue.extend(children)
+
+    @staticmethod
+    def _summarize_class(node: ast.ClassDef) -> ClassSummary:
+        bases = []
+        for base in node.bases:
+            if isinstance(base, ast.Name):
+                bases.append(base.id)
+            elif isinstance(base, ast.Attribute):
+                bases.append(ast.unparse(base))
+
+        docstring = None
+        if node.body and isinstance(node.body[0], ast.Expr) and isinstance(node.body[0].value, ast.Constant):
+            docstring = node.body[0].value.value
+
+        return ClassSummary(name=node.name, bases=bases, docstring=docstring)
+
+    @staticmethod
+    def _first_group(pattern: "re.Pattern", content: str) -> Optional[str]:
+        match = pattern.search(content)
+        return match.group(1) if match else None
+
+    @staticmethod
+    def _class_description(content: str, class_name: Optional[str]) -> Optional[str]:
+        if not class_name:
+            return None
+        match = re.search(rf'class {class_name}.*?:\s*["\']([^"\']+)["\']', content, re.DOTALL)
+        return match.group(1).strip() if match else None
+
+    @staticmethod
+    def _typed_inputs(content: str) -> List[Dict[str, Any]]:
+        required = "required=True" in content
+        return [
+            {"name": match.group(1), "type": match.group(2), "required": required}
+            for pattern in _TYPED_INPUT_PATTERNS
+            for match in pattern.finditer(content)
+        ]
+
+    @staticmethod
+    def _dependencies(content: str) -> List[str]:
+        dependencies = set()
+        for match in _IMPORT.finditer(content):
+            module = match.group(1) or match.group(2)
+            if module and not module.startswith('.') and module not in ['typing', 'os', 'sys']:
+                dependencies.add(module.split('.')[0])
+        return sorted(dependencies)
+
+    @staticmethod
+    def _content_use_cases(content: str) -> List[str]:
+        content_lower = content.lower()
+        return [use_case for needles, use_case in _CONTENT_USE_CASES
+                if any(needle in content_lower for needle in needles)]
+
+    def semantic(self) -> SemanticCatalog:
+        """Embedding indexes over the components and flows, built on first use."""
+        return self._semantic.get()
+
+    def wiring(self) -> WiringIndex:
+        """Type-compatibility graph and co-occurrence counts of the starter-project components."""
+        return self._wiring.get()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get index counts."""
+        return {
+            "modules": len(self.modules),
+            "classes": sum(len(module.classes) for module in self.modules.values()),
+            "flows": len(self.flows),
+            "flows_version": self.flows_version,
+            "cache_path": str(self.cache_path),
+            **self.build_stats
+        }
+
+
+# Global instance (built on first use, not at import)
+_knowledge_index = LazyInstance(KnowledgeIndex)
+
+
+def get_knowledge_index() -> KnowledgeIndex:
+    """Get the shared KnowledgeIndex, building it on first use."""
+    return _knowledge_index.get()
+
+
+def configure_knowledge_index(**options: Any):
+    """Set the ``KnowledgeIndex`` options of the shared index; only effective before its first use."""
+    global _knowledge_index
+
+    if _knowledge_index.is_built():
+        logger.warning("Knowledge index already built, ignoring new options")
+        return
+    _knowledge_index = LazyInstance(lambda: KnowledgeIndex(**options))
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point: ``python -m ai.knowledge_index build``."""
+    parser = argparse.ArgumentParser(description="Build the AxieStudio knowledge index cache")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    build = subcommands.add_parser("build", help="Parse changed files and write the on-disk index")
+    build.add_argument("--data-root", help="AxieStudio data directory (default: bundled data)")
+    build.add_argument("--output", help="Cache file (default: KNOWLEDGE_INDEX_PATH or <data-root>/knowledge_index.pickle)")
+    build.add_argument("--full", action="store_true", help="Ignore the existing cache and re-parse everything")
+    build.add_argument("--workers", type=int, help="Parser processes (0 = one per core; default KNOWLEDGE_INDEX_WORKERS or 1)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    workers = args.workers if args.workers is not None else int(os.getenv("KNOWLEDGE_INDEX_WORKERS", "1"))
+    index = KnowledgeIndex(data_root=args.data_root, cache_path=args.output or os.getenv("KNOWLEDGE_INDEX_PATH"),
+                           use_cache=not args.full, workers=workers)
+    if args.full:
+        index.save()
+    # Precompute the embedding matrices next to the cache
+    SemanticCatalog(index)
+    print(json.dumps(index.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Lazy Global Instances
+
+The AI modules expose process-wide instances (``flow_indexer``,
+``template_generator`` ...). Building them walks the component tree and loads
+the starter projects, so they are created on first use instead of at import
+time.
+"""
+
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LazyInstance(Generic[T]):
+    """Thread-safe, build-once holder for a global instance."""
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        """Get the instance, building it on first use."""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    def is_built(self) -> bool:
+        return self._instance is not None
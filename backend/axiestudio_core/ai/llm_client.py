@@ -0,0 +1,422 @@
+"""
+Shared LLM Client Pool
+
+Provides process-wide OpenAI clients for the AI generators. The async client
+is backed by a single pooled HTTP connection pool so every generator (and
+every concurrent request) reuses keep-alive connections instead of opening a
+new socket per completion.
+
+Calls go through ``ResilientLLM``, which keeps an upstream brown-out from
+piling up hanging requests:
+
+- every call has a deadline (queueing included), after which it fails with
+  ``DeadlineExceeded``,
+- at most ``max_concurrency`` calls per model are in flight; the rest wait.
+  A stream keeps its slot until it is exhausted or closed,
+- an async call still running after the model's p95 latency is hedged: a
+  duplicate request is sent and the first answer wins,
+- after ``failure_threshold`` consecutive provider failures of a model
+  (server errors, connection errors and timeouts) its circuit opens. Calls
+  to that model then fail at once with ``CircuitOpenError``, so callers go
+  to another model or straight to their template fallbacks. After
+  ``reset_timeout`` a single probe call is let through, and its success
+  closes the circuit.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+import httpx
+from openai import APIConnectionError, AsyncOpenAI, OpenAI
+
+from .lazy_instance import LazyInstance
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Connection pool sizing for the shared async HTTP client
+MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+REQUEST_TIMEOUT = float(os.getenv("OPENAI_REQUEST_TIMEOUT", "60"))
+
+_lock = threading.Lock()
+_sync_clients: Dict[Tuple[str, Optional[str]], OpenAI] = {}
+_async_clients: Dict[Tuple[str, Optional[str]], AsyncOpenAI] = {}
+_async_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _client_key(api_key: str, base_url: Optional[str]) -> Tuple[str, Optional[str]]:
+    return api_key, base_url or os.getenv("OPENAI_BASE_URL") or None
+
+
+def _get_async_http_client() -> httpx.AsyncClient:
+    """Return the shared pooled HTTP client used by every AsyncOpenAI instance."""
+    global _async_http_client
+
+    if _async_http_client is None or _async_http_client.is_closed:
+        _async_http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=10.0),
+        )
+    return _async_http_client
+
+
+def get_openai_client(api_key: str, base_url: Optional[str] = None) -> OpenAI:
+    """Get the shared synchronous OpenAI client for an API key."""
+    key = _client_key(api_key, base_url)
+    with _lock:
+        if key not in _sync_clients:
+            _sync_clients[key] = OpenAI(api_key=key[0], base_url=key[1])
+        return _sync_clients[key]
+
+
+def get_async_openai_client(api_key: str, base_url: Optional[str] = None) -> AsyncOpenAI:
+    """Get the shared AsyncOpenAI client for an API key.
+
+    All async clients share one pooled ``httpx.AsyncClient`` so dozens of
+    generations can be in flight on a single worker.
+    """
+    key = _client_key(api_key, base_url)
+    with _lock:
+        client = _async_clients.get(key)
+        if client is None or _async_http_client is None or _async_http_client.is_closed:
+            client = AsyncOpenAI(
+                api_key=key[0],
+                base_url=key[1],
+                http_client=_get_async_http_client(),
+            )
+            _async_clients[key] = client
+        return client
+
+
+async def close_async_clients():
+    """Close the shared async HTTP pool (called on application shutdown)."""
+    global _async_http_client
+
+    with _lock:
+        http_client = _async_http_client
+        _async_http_client = None
+        _async_clients.clear()
+
+    if http_client is not None and not http_client.is_closed:
+        await http_client.aclose()
+
+
+class CircuitOpenError(Exception):
+    """The provider is degraded; the call was not attempted."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """A call (including its wait for a concurrency slot) ran past its deadline."""
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Whether ``error`` says the provider is unhealthy (not that the request was bad)."""
+    if isinstance(error, (APIConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and (status >= 500 or status == 429)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """Whether a call would currently be let through (without claiming the probe)."""
+        with self._lock:
+            return self.state == self.CLOSED or time.monotonic() - self._opened_at >= self.reset_timeout
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            # Only the first caller after the cool-down probes the provider. A probe
+            # that never settles (cancelled) is replaced after another cool-down.
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"LLM circuit opened after {self.failures} failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per model."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(model, deque(maxlen=self._window)).append(seconds)
+
+    def percentile(self, model: str, percentile: float) -> Optional[float]:
+        """Latency percentile of ``model``, or None until ``min_samples`` calls were seen."""
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(percentile * len(samples)))]
+
+
+class _GuardedStream:
+    """Async iterator over a stream that holds a concurrency slot until it is exhausted or closed."""
+
+    def __init__(self, stream: Any, semaphore: asyncio.Semaphore):
+        self._stream = stream
+        self._iterator = stream.__aiter__()
+        self._semaphore: Optional[asyncio.Semaphore] = semaphore
+
+    def __aiter__(self) -> "_GuardedStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._semaphore is None:
+            raise StopAsyncIteration
+        try:
+            return await self._iterator.__anext__()
+        except BaseException:
+            await self.aclose()
+            raise
+
+    async def aclose(self):
+        if self._semaphore is None:
+            return
+        self._semaphore.release()
+        self._semaphore = None
+        close = getattr(self._stream, "close", None)
+        if close is not None and asyncio.iscoroutinefunction(close):
+            await close()
+
+    def __del__(self):
+        # An abandoned stream must not keep its slot forever
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+
+class ResilientLLM:
+    """Deadlines, per-model concurrency limits, hedging and circuit breaking for LLM calls.
+
+    ``call``/``acall``/``astream`` take the model name and a function of the
+    timeout (in seconds) the SDK request should use, so any client or
+    endpoint can be wrapped.
+    """
+
+    def __init__(self, deadline: float = 30.0, max_concurrency: int = 8, hedge_percentile: Optional[float] = 0.95,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0, latency: Optional[LatencyTracker] = None):
+        self.deadline = deadline
+        self.max_concurrency = max_concurrency
+        self.hedge_percentile = hedge_percentile  # None disables hedging
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latency = latency or LatencyTracker()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._async_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._lock = threading.Lock()
+        self._stats: Counter = Counter()
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            if model not in self._breakers:
+                self._breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[model]
+
+    def is_available(self, model: str) -> bool:
+        """False while ``model``'s circuit is open; callers can skip straight to their fallbacks."""
+        return self.breaker(model).available
+
+    def _semaphore(self, model: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if model not in self._semaphores:
+                self._semaphores[model] = threading.BoundedSemaphore(self.max_concurrency)
+            return self._semaphores[model]
+
+    def _async_semaphore(self, model: str) -> asyncio.Semaphore:
+        with self._lock:
+            if model not in self._async_semaphores:
+                self._async_semaphores[model] = asyncio.Semaphore(self.max_concurrency)
+            return self._async_semaphores[model]
+
+    def _admit(self, model: str):
+        if not self.breaker(model).allow():
+            self._count("rejected")
+            raise CircuitOpenError(f"LLM provider degraded, not calling {model}")
+        self._count("calls")
+
+    def _settle(self, model: str, error: Optional[BaseException]):
+        if isinstance(error, asyncio.CancelledError):
+            return
+        # Timeouts count, including a stage's latency budget running out: in a brown-out
+        # that is how slowness shows, and the breaker is per model, so others are unaffected
+        if error is not None and is_provider_failure(error):
+            self._count("failures")
+            self.breaker(model).record_failure()
+        else:
+            # The provider answered, even if it rejected the request
+            self.breaker(model).record_success()
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def call(self, model: str, request: Callable[[float], T], timeout: float) -> T:
+        """Run ``request(timeout)`` within the deadline and the model's concurrency limit."""
+        self._admit(model)
+        deadline = time.monotonic() + self.deadline
+        error = None
+        try:
+            if not self._semaphore(model).acquire(timeout=self.deadline):
+                self._count("deadline_exceeded")
+                raise DeadlineExceeded(f"No free {model} slot within {self.deadline}s")
+            try:
+                start = time.monotonic()
+                result = request(max(min(timeout, deadline - start), 0.001))
+                self.latency.record(model, time.monotonic() - start)
+                return result
+            finally:
+                self._semaphore(model).release()
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._settle(model, error)
+
+    async def acall(self, model: str, request: Callable[[float], Awaitable[T]], timeout: float,
+                    hedge: bool = True) -> T:
+        """Async variant of :meth:`call`; slow calls are hedged unless ``hedge`` is False."""
+        self._admit(model)
+        deadline = time.monotonic() + self.deadline
+        error = None
+        try:
+            return await asyncio.wait_for(self._ahedged(model, request, timeout, deadline, hedge), self.deadline)
+        except asyncio.TimeoutError as e:
+            self._count("deadline_exceeded")
+            error = DeadlineExceeded(f"{model} call exceeded its {self.deadline}s deadline")
+            raise error from e
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._settle(model, error)
+
+    async def astream(self, model: str, request: Callable[[float], Awaitable[Any]], timeout: float) -> AsyncIterator[Any]:
+        """Start a streamed call within the deadline; the model's slot is held until the stream is closed.
+
+        Streams are never hedged (a duplicate would be paid for token by
+        token), and the time they take to start is not recorded: it says
+        nothing about how long a full completion takes.
+        """
+        self._admit(model)
+        deadline = time.monotonic() + self.deadline
+        error = None
+        try:
+            return await asyncio.wait_for(self._astart(model, request, timeout, deadline), self.deadline)
+        except asyncio.TimeoutError as e:
+            self._count("deadline_exceeded")
+            error = DeadlineExceeded(f"{model} stream did not start within its {self.deadline}s deadline")
+            raise error from e
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._settle(model, error)
+
+    async def _astart(self, model: str, request: Callable[[float], Awaitable[Any]], timeout: float,
+                      deadline: float) -> _GuardedStream:
+        semaphore = self._async_semaphore(model)
+        await semaphore.acquire()
+        try:
+            return _GuardedStream(await request(max(min(timeout, deadline - time.monotonic()), 0.001)), semaphore)
+        except BaseException:
+            semaphore.release()
+            raise
+
+    async def _ahedged(self, model: str, request: Callable[[float], Awaitable[T]], timeout: float,
+                       deadline: float, hedge: bool) -> T:
+        attempts = [asyncio.ensure_future(self._aattempt(model, request, timeout, deadline))]
+        try:
+            delay = self.latency.percentile(model, self.hedge_percentile) if hedge and self.hedge_percentile else None
+            if delay is not None and delay < timeout:
+                done, _ = await asyncio.wait(attempts, timeout=delay)
+                if not done:
+                    self._count("hedges")
+                    attempts.append(asyncio.ensure_future(self._aattempt(model, request, timeout, deadline)))
+
+            pending, error = set(attempts), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None:
+                        if attempt is not attempts[0]:
+                            self._count("hedge_wins")
+                        return attempt.result()
+                    error = attempt.exception()
+            raise error
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+    async def _aattempt(self, model: str, request: Callable[[float], Awaitable[T]], timeout: float,
+                        deadline: float) -> T:
+        async with self._async_semaphore(model):
+            start = time.monotonic()
+            result = await request(max(min(timeout, deadline - start), 0.001))
+            self.latency.record(model, time.monotonic() - start)
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            models = list(self._semaphores.keys() | self._async_semaphores.keys())
+            breakers = dict(self._breakers)
+        stats.update(
+            circuits={model: breaker.state for model, breaker in sorted(breakers.items())},
+            consecutive_failures={model: breaker.failures for model, breaker in sorted(breakers.items())},
+            p95_seconds={model: self.latency.percentile(model, 0.95) for model in sorted(models)},
+        )
+        return stats
+
+
+_resilient_llm = LazyInstance(ResilientLLM)
+
+
+def get_resilient_llm() -> ResilientLLM:
+    """Get the process-wide call guard shared by generators that are not given their own."""
+    return _resilient_llm.get()
@@ -0,0 +1,191 @@
+"""
+Per-Stage Model Policy
+
+Generator pipelines make LLM calls for very different jobs. Classifying an
+intent or writing a two-sentence reply does not need the model that
+customises a flow. Every call therefore names its stage, and the policy
+decides, per stage:
+
+- the model,
+- a latency budget: the call times out after it, with no SDK retries, and
+  is retried once on the faster ``fallback`` model,
+- a cost budget: a cap on completion tokens, applied on top of the
+  ``max_tokens`` the request asks for.
+
+The policy also counts calls, fallbacks, latency and completion tokens per
+stage for ``stats()``. Every attempt runs through a ``ResilientLLM``
+(deadline, per-model concurrency, hedging and circuit breaking). A stage
+whose model's circuit is open goes straight to its fallback model; while
+some stage has neither, ``available`` is False.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from openai import APITimeoutError
+
+from .llm_client import CircuitOpenError, ResilientLLM, get_resilient_llm
+
+logger = logging.getLogger(__name__)
+
+INTENT = "intent"
+CHAT_REPLY = "chat_reply"
+COMPONENT_SELECTION = "component_selection"
+FLOW_CUSTOMIZATION = "flow_customization"
+STAGES = (INTENT, CHAT_REPLY, COMPONENT_SELECTION, FLOW_CUSTOMIZATION)
+
+DEFAULT_MODEL = "gpt-4"
+FAST_MODEL = "gpt-4o-mini"
+
+
+@dataclass(frozen=True)
+class StagePolicy:
+    model: str
+    latency_budget: float  # Seconds before the call is abandoned for the fallback model
+    max_tokens: int  # Cost budget: completion tokens a call of this stage may use
+    fallback: Optional[str] = FAST_MODEL
+
+
+DEFAULT_STAGES = {
+    INTENT: StagePolicy(FAST_MODEL, latency_budget=5.0, max_tokens=500),
+    CHAT_REPLY: StagePolicy(FAST_MODEL, latency_budget=10.0, max_tokens=300),
+    COMPONENT_SELECTION: StagePolicy(DEFAULT_MODEL, latency_budget=15.0, max_tokens=1500),
+    FLOW_CUSTOMIZATION: StagePolicy(DEFAULT_MODEL, latency_budget=25.0, max_tokens=3000),
+}
+
+
+class ModelPolicy:
+    """Chooses the model, timeout and token cap of each pipeline stage and runs its calls."""
+
+    def __init__(self, stages: Optional[Dict[str, StagePolicy]] = None, llm: Optional[ResilientLLM] = None):
+        self.stages = dict(DEFAULT_STAGES, **(stages or {}))
+        self.llm = llm or get_resilient_llm()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    @property
+    def available(self) -> bool:
+        """False while the provider is degraded and calls go straight to the fallbacks."""
+        return all(self.llm.is_available(policy.model) or (policy.fallback and self.llm.is_available(policy.fallback))
+                   for policy in self.stages.values())
+
+    def model(self, stage: str) -> str:
+        return self.stages[stage].model
+
+    def signature(self) -> str:
+        """The models of every stage, for cache keys (a policy change must not serve stale answers)."""
+        return ",".join(f"{stage}={policy.model}" for stage, policy in sorted(self.stages.items()))
+
+    def prepare(self, stage: str, request: Dict[str, Any], model: Optional[str] = None) -> Dict[str, Any]:
+        """``request`` with the stage's model and its ``max_tokens`` capped to the cost budget."""
+        policy = self.stages[stage]
+        max_tokens = min(request.get("max_tokens") or policy.max_tokens, policy.max_tokens)
+        return dict(request, model=model or policy.model, max_tokens=max_tokens)
+
+    def complete(self, client, stage: str, **request: Any):
+        """Run a chat completion for ``stage``, retrying once on the fallback model if it times out."""
+        policy = self.stages[stage]
+        start = time.perf_counter()
+        try:
+            response = self._create(client, policy, self.prepare(stage, request))
+        except (APITimeoutError, CircuitOpenError) as e:
+            if not self._falls_back(stage, policy, e):
+                raise
+            response = self._create(client, policy, self.prepare(stage, request, model=policy.fallback))
+        self._record(stage, start, response)
+        return response
+
+    async def acomplete(self, async_client, stage: str, **request: Any):
+        """Async variant of :meth:`complete`."""
+        policy = self.stages[stage]
+        start = time.perf_counter()
+        try:
+            response = await self._acreate(async_client, policy, self.prepare(stage, request))
+        except (APITimeoutError, CircuitOpenError) as e:
+            if not self._falls_back(stage, policy, e):
+                raise
+            response = await self._acreate(async_client, policy, self.prepare(stage, request, model=policy.fallback))
+        self._record(stage, start, response)
+        return response
+
+    async def astream(self, async_client, stage: str, **request: Any):
+        """Start a streamed completion for ``stage``, falling back like :meth:`acomplete` if it does not start in time."""
+        policy = self.stages[stage]
+        start = time.perf_counter()
+        try:
+            stream = await self._astart(async_client, policy, self.prepare(stage, dict(request, stream=True)))
+        except (APITimeoutError, CircuitOpenError) as e:
+            if not self._falls_back(stage, policy, e):
+                raise
+            stream = await self._astart(async_client, policy,
+                                        self.prepare(stage, dict(request, stream=True), model=policy.fallback))
+        self._record(stage, start, None)
+        return stream
+
+    def _create(self, client, policy: StagePolicy, request: Dict[str, Any]):
+        return self.llm.call(
+            request["model"],
+            lambda timeout: self._client(client, timeout).chat.completions.create(**request),
+            policy.latency_budget)
+
+    async def _acreate(self, async_client, policy: StagePolicy, request: Dict[str, Any]):
+        return await self.llm.acall(
+            request["model"],
+            lambda timeout: self._client(async_client, timeout).chat.completions.create(**request),
+            policy.latency_budget)
+
+    async def _astart(self, async_client, policy: StagePolicy, request: Dict[str, Any]):
+        return await self.llm.astream(
+            request["model"],
+            lambda timeout: self._client(async_client, timeout).chat.completions.create(**request),
+            policy.latency_budget)
+
+    @staticmethod
+    def _client(client, timeout: float):
+        # The SDK would otherwise retry a timed-out call twice before giving up
+        return client.with_options(timeout=timeout, max_retries=0)
+
+    def _falls_back(self, stage: str, policy: StagePolicy, error: Exception) -> bool:
+        if isinstance(error, APITimeoutError):
+            with self._lock:
+                self._stats[stage]["timeouts"] += 1
+        if not policy.fallback or policy.fallback == policy.model:
+            return False
+        if isinstance(error, CircuitOpenError):
+            logger.warning(f"{policy.model} is degraded, running {stage} on {policy.fallback}")
+        else:
+            logger.warning(f"{stage} call on {policy.model} exceeded {policy.latency_budget}s, retrying on {policy.fallback}")
+        with self._lock:
+            self._stats[stage]["fallbacks"] += 1
+        return True
+
+    def _record(self, stage: str, start: float, response: Any):
+        usage = getattr(response, "usage", None)
+        with self._lock:
+            stats = self._stats[stage]
+            stats["calls"] += 1
+            stats["seconds"] += time.perf_counter() - start
+            stats["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {}
+            for stage, policy in sorted(self.stages.items()):
+                stats = self._stats.get(stage, {})
+                calls = stats.get("calls", 0)
+                result[stage] = {
+                    "model": policy.model,
+                    "fallback": policy.fallback,
+                    "latency_budget": policy.latency_budget,
+                    "max_tokens": policy.max_tokens,
+                    "calls": int(calls),
+                    "timeouts": int(stats.get("timeouts", 0)),
+                    "fallbacks": int(stats.get("fallbacks", 0)),
+                    "mean_seconds": stats.get("seconds", 0.0) / calls if calls else 0.0,
+                    "completion_tokens": int(stats.get("completion_tokens", 0)),
+                }
+            return result
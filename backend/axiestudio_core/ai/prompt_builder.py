@@ -0,0 +1,127 @@
+"""
+Token-Budgeted Prompt Builder
+
+Prompts used to carry a character-sliced prefix of one giant knowledge
+string. This module precomputes one knowledge shard per component and per
+flow, each with its token count, and packs the shards most relevant to a
+request into a fixed token budget. Template JSON is fitted to its budget by
+``flow_skeleton.fit_skeleton``.
+
+Token counts use ``tiktoken`` when it is installed and fall back to an
+estimate of four characters per token.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # Optional: the estimate is close enough for budgeting
+    tiktoken = None
+
+DEFAULT_KNOWLEDGE_TOKENS = 400
+DEFAULT_TEMPLATE_TOKENS = 1500
+
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Count prompt tokens (cl100k_base with tiktoken, else ~4 characters each)."""
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class KnowledgeShard:
+    """One component's or flow's knowledge text with its token count."""
+    key: str
+    kind: str  # "component" or "flow"
+    text: str
+    tokens: int
+
+
+class KnowledgeShards:
+    """Per-component and per-flow knowledge, packed into prompts by relevance."""
+
+    SECTIONS = {
+        "component": "=== REAL AXIESTUDIO COMPONENTS ===",
+        "flow": "=== REAL AXIESTUDIO FLOW PATTERNS ===",
+    }
+
+    def __init__(self, shards: List[KnowledgeShard], semantic_catalog=None):
+        self.shards = {(shard.kind, shard.key): shard for shard in shards}
+        self.semantic_catalog = semantic_catalog
+        self._section_tokens = {kind: count_tokens(header) for kind, header in self.SECTIONS.items()}
+
+    @classmethod
+    def from_crawl(cls, axiestudio_data: Dict[str, Any], semantic_catalog=None) -> "KnowledgeShards":
+        """Build shards from ``RealAxieStudioCrawler.crawl_all()`` output."""
+        shards = []
+        relationships = axiestudio_data.get('relationships', {})
+        wiring = axiestudio_data.get('wiring', {})
+
+        for comp_name, comp_info in axiestudio_data['components'].items():
+            text = f"""COMPONENT: {comp_name}
+- Display Name: {comp_info['display_name']}
+- Description: {comp_info['description']}
+- Base Classes: {', '.join(comp_info['base_classes'])}
+- Inputs: {len(comp_info['inputs'])} input(s)
+- Outputs: {len(comp_info['outputs'])} output(s)
+- Module: {comp_info['module_path']}"""
+            related = relationships.get(comp_name)
+            if related:
+                text += f"\n- Commonly used with: {', '.join(related[:5])}"
+            connectable = wiring.get(comp_name)
+            if connectable:
+                text += f"\n- Connects to: {', '.join(connectable[:5])}"
+            shards.append(KnowledgeShard(comp_name, "component", text, count_tokens(text)))
+
+        for flow_name, flow_info in axiestudio_data['flows'].items():
+            text = f"""FLOW: {flow_name}
+- Description: {flow_info['description']}
+- Components Used: {', '.join(flow_info['components_used'])}
+- Nodes: {len(flow_info['nodes'])} node(s)
+- Edges: {len(flow_info['edges'])} connection(s)"""
+            shards.append(KnowledgeShard(flow_name, "flow", text, count_tokens(text)))
+
+        return cls(shards, semantic_catalog)
+
+    def __len__(self) -> int:
+        return len(self.shards)
+
+    def rank(self, query: str, limit: int = 40) -> List[KnowledgeShard]:
+        """Shards most relevant to the query, best first, components and flows interleaved."""
+        if self.semantic_catalog is None:
+            return list(self.shards.values())[:limit]
+
+        scored: List[Tuple[float, int, KnowledgeShard]] = []
+        for kind, index in (("flow", self.semantic_catalog.flows), ("component", self.semantic_catalog.components)):
+            for key, score in index.search(query, k=limit, where=lambda key: (kind, key) in self.shards):
+                scored.append((score, len(scored), self.shards[(kind, key)]))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [shard for _, _, shard in scored[:limit]]
+
+    def pack(self, query: str, budget: int = DEFAULT_KNOWLEDGE_TOKENS) -> str:
+        """Greedily pack the most relevant shards into ``budget`` tokens."""
+        selected: Dict[str, List[KnowledgeShard]] = {kind: [] for kind in self.SECTIONS}
+        remaining = budget
+
+        for shard in self.rank(query):
+            # A kind's section header is paid for by its first shard
+            cost = shard.tokens + 1 + (0 if selected[shard.kind] else self._section_tokens[shard.kind] + 1)
+            if cost <= remaining:
+                selected[shard.kind].append(shard)
+                remaining -= cost
+
+        sections = []
+        for kind, shards in selected.items():
+            if shards:
+                sections.append("\n".join([self.SECTIONS[kind], *(shard.text for shard in shards)]))
+        return "\n\n".join(sections)
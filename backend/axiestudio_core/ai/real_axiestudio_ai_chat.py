@@ -10,15 +10,30 @@ This is a CONVERSATIONAL AI system that:
 This ensures users get REAL AxieStudio flows, not generic ones!
 """
 
+import asyncio
 import json
 import os
-from typing import Dict, List, Any, Optional
-from openai import OpenAI
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 from dotenv import load_dotenv
 from datetime import datetime
 import logging
 
-from .real_axiestudio_crawler import real_axiestudio_crawler
+from .conversation_memory import DEFAULT_MEMORY_TOKENS, ConversationMemory
+from .conversation_store import ConversationStore, create_conversation_store
+from .generation_cache import GenerationCache, get_generation_cache, is_degraded, make_cache_key, mark_degraded
+from .intent_classifier import CONVERSATION, DEFAULT_THRESHOLD, get_intent_classifier
+from .llm_client import get_async_openai_client, get_openai_client
+from .single_flight import SingleFlight
+from .lazy_instance import LazyInstance
+from .model_policy import CHAT_REPLY, FLOW_CUSTOMIZATION, INTENT, ModelPolicy
+from .flow_patch import apply_edit, diff, fit_edit_view, PatchError
+from .flow_skeleton import fit_skeleton, rehydrate
+from .json_repair import parse_json
+from .prompt_builder import DEFAULT_KNOWLEDGE_TOKENS, DEFAULT_TEMPLATE_TOKENS, KnowledgeShards
+from .real_axiestudio_crawler import RealAxieStudioCrawler, get_real_axiestudio_crawler
+from .search_index import BM25Index
+from .structured_output import CUSTOMIZED_FLOW, FLOW_PATCH, completion_text
+from .wiring_index import node_templates
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,88 +43,468 @@ from pathlib import Path
 config_path = Path(__file__).parent.parent.parent / "config" / ".env"
 load_dotenv(config_path)
 
+# Follow-ups containing these start a new flow instead of editing the current one
+NEW_FLOW_PHRASES = ("new flow", "another flow", "different flow", "start over", "from scratch")
+
+# Local classifier use case -> intent flow_type
+USE_CASE_FLOW_TYPES = {"basic_chat": "chat", "document_qa": "rag", "rag_system": "rag",
+                       "agent_tools": "agent", "data_processing": "data_processing"}
+
 class RealAxieStudioAIChat:
     """Conversational AI system for generating real AxieStudio flows."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, pipelined: bool = True, speculative: bool = False,
+                 conversation_store: Optional[ConversationStore] = None,
+                 crawler: Optional[RealAxieStudioCrawler] = None,
+                 knowledge_budget: int = DEFAULT_KNOWLEDGE_TOKENS,
+                 template_budget: int = DEFAULT_TEMPLATE_TOKENS,
+                 structured_output: bool = True,
+                 memory_tokens: int = DEFAULT_MEMORY_TOKENS,
+                 edit_mode: bool = True,
+                 intent_threshold: float = DEFAULT_THRESHOLD,
+                 model_policy: Optional[ModelPolicy] = None,
+                 generation_cache: Optional[GenerationCache] = None):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key required. Set OPENAI_API_KEY environment variable.")
         
-        self.client = OpenAI(api_key=self.api_key)
-        self.conversation_history: List[Dict[str, Any]] = []
+        self.client = get_openai_client(self.api_key)
+        self.async_client = get_async_openai_client(self.api_key)
+        # Model, latency and token budgets per pipeline stage
+        self.models = model_policy or ModelPolicy()
+        # Opening messages are answered from here when they were seen before
+        self.cache = generation_cache or get_generation_cache()
+        
+        # Session-keyed conversation history, addressed by conversation_id
+        self.conversation_store = conversation_store or create_conversation_store()
+        
+        # Prompt context: flows stored by reference, older turns summarised, capped in tokens
+        self.memory = ConversationMemory(self.conversation_store, max_tokens=memory_tokens)
+        
+        # Coalesces concurrent identical opening messages onto one generation
+        self.single_flight = SingleFlight()
+        
+        # Pipelined mode fans the chat reply and flow customisation out concurrently;
+        # speculative mode also starts customising the most likely template while
+        # intent analysis is still in flight.
+        self.pipelined = pipelined
+        self.speculative = speculative
+        
+        # Customised flows are requested through function calling (schema-shaped arguments)
+        self.structured_output = structured_output
+        
+        # Intents the local classifier is sure about skip the LLM round trip
+        self.intent_classifier = get_intent_classifier()
+        self.intent_threshold = intent_threshold
         
         # Load real AxieStudio data
         logger.info("🔍 Loading real AxieStudio component data...")
-        self.axiestudio_data = real_axiestudio_crawler.crawl_all()
+        crawler = crawler or get_real_axiestudio_crawler()
+        self.axiestudio_data = crawler.crawl_all()
+        
+        # Embedding index used to pick the closest starter flow for a request
+        self.semantic_catalog = crawler.index.semantic()
         
-        # Create AI knowledge base
-        self.ai_knowledge = self._create_ai_knowledge_base()
+        # Per-component/per-flow knowledge shards, packed into prompts by relevance
+        self.knowledge_shards = KnowledgeShards.from_crawl(self.axiestudio_data, self.semantic_catalog)
+        self.knowledge_budget = knowledge_budget
+        self.template_budget = template_budget
+        self._template_context: Dict[str, str] = {}
+        
+        # Version of the template set, part of every generation cache key
+        self.template_version = crawler.index.flows_version
+        
+        # Follow-ups edit the session's current flow through JSON patches;
+        # new component types are cloned from starter-project nodes and wired by type
+        self.edit_mode = edit_mode
+        self.node_templates = node_templates(crawler.index.flows.values())
+        self.wiring = crawler.index.wiring()
+        self._node_type_search = BM25Index()
+        for node_type, node in self.node_templates.items():
+            component = node["data"]["node"]
+            self._node_type_search.add(node_type, f"{node_type} {component.get('display_name') or ''} "
+                                                  f"{component.get('description') or ''}")
+        self._node_type_search.finalize()
         
         logger.info(f"🚀 Real AxieStudio AI Chat ready with {len(self.axiestudio_data['components'])} components")
     
-    def _create_ai_knowledge_base(self) -> str:
-        """Create comprehensive knowledge base for AI from real AxieStudio data."""
-        
-        knowledge_parts = []
-        
-        # Component knowledge
-        knowledge_parts.append("=== REAL AXIESTUDIO COMPONENTS ===")
-        for comp_name, comp_info in self.axiestudio_data['components'].items():
-            knowledge_parts.append(f"""
-COMPONENT: {comp_name}
-- Display Name: {comp_info['display_name']}
-- Description: {comp_info['description']}
-- Base Classes: {', '.join(comp_info['base_classes'])}
-- Inputs: {len(comp_info['inputs'])} input(s)
-- Outputs: {len(comp_info['outputs'])} output(s)
-- Module: {comp_info['module_path']}
-""")
-        
-        # Flow patterns knowledge
-        knowledge_parts.append("\n=== REAL AXIESTUDIO FLOW PATTERNS ===")
-        for flow_name, flow_info in self.axiestudio_data['flows'].items():
-            knowledge_parts.append(f"""
-FLOW: {flow_name}
-- Description: {flow_info['description']}
-- Components Used: {', '.join(flow_info['components_used'])}
-- Nodes: {len(flow_info['nodes'])} node(s)
-- Edges: {len(flow_info['edges'])} connection(s)
-""")
-        
-        # Component relationships
-        knowledge_parts.append("\n=== COMPONENT RELATIONSHIPS ===")
-        for comp, related in self.axiestudio_data['relationships'].items():
-            if related:
-                knowledge_parts.append(f"{comp} commonly used with: {', '.join(related[:5])}")
-        
-        return "\n".join(knowledge_parts)
-    
-    def chat(self, user_message: str) -> Dict[str, Any]:
-        """Process user message and return conversational response with flow generation."""
-        
-        # Add user message to history
-        self.conversation_history.append({
-            "role": "user",
-            "content": user_message,
-            "timestamp": datetime.now().isoformat()
-        })
+    def chat(self, user_message: str, conversation_id: Optional[str] = None, use_cache: bool = True) -> Dict[str, Any]:
+        """Process user message and return conversational response with flow generation.
+        
+        A new conversation is started when no ``conversation_id`` is given.
+        Opening messages of a conversation are served from the generation
+        cache unless ``use_cache`` is False.
+        """
+        
+        cache_key = self._cache_key(user_message, conversation_id) if use_cache else None
+        cached = self.cache.get(cache_key) if cache_key else None
+        if cached:
+            return self._replay_cached_response(user_message, conversation_id, cached)
+        
+        conversation_id = self._record_user_message(user_message, conversation_id)
         
         # Determine if user wants to generate a flow
-        intent = self._analyze_user_intent(user_message)
+        intent = self._analyze_user_intent(user_message, conversation_id)
+        
+        editable = self._editable_flow(user_message, conversation_id) if intent["wants_flow"] else None
+        if editable:
+            result = self._edit_flow_with_chat(user_message, intent, conversation_id, editable)
+        elif intent["wants_flow"]:
+            result = self._generate_flow_with_chat(user_message, intent, conversation_id)
+        else:
+            result = self._provide_conversational_response(user_message, intent, conversation_id)
+        
+        self._cache_response(cache_key, result)
+        return result
+    
+    async def achat(self, user_message: str, conversation_id: Optional[str] = None, use_cache: bool = True) -> Dict[str, Any]:
+        """Async variant of :meth:`chat` that never blocks the event loop."""
+        
+        cache_key = self._cache_key(user_message, conversation_id) if use_cache else None
+        if not cache_key:
+            return await self._achat_uncached(user_message, conversation_id)
+        
+        cached = self.cache.get(cache_key)
+        if cached:
+            return self._replay_cached_response(user_message, conversation_id, cached)
+        
+        async def generate():
+            result = await self._achat_uncached(user_message, conversation_id)
+            self._cache_response(cache_key, result)
+            return result
+        
+        result, shared = await self.single_flight.do(cache_key, generate)
+        if not shared:
+            return result
+        
+        # Followers get the leader's exchange recorded in their own conversation
+        if result.get("success"):
+            return self._replay_cached_response(user_message, conversation_id, self._cacheable_response(result))
+        return await self._achat_uncached(user_message, conversation_id)
+    
+    async def _achat_uncached(self, user_message: str, conversation_id: Optional[str]) -> Dict[str, Any]:
+        """Run the async chat pipeline without consulting the cache."""
+        
+        conversation_id = self._record_user_message(user_message, conversation_id)
+        
+        speculative_flow = None
+        intent = self._local_user_intent(user_message, conversation_id)
+        if intent is None:
+            # A follow-up on a flow is most likely an edit, not a new flow to customise
+            if self.pipelined and self.speculative and not self._has_current_flow(conversation_id):
+                speculative_flow = self._start_speculative_flow(user_message)
+            
+            try:
+                intent = await self._aanalyze_user_intent(user_message, conversation_id, local=False)
+            except BaseException:
+                if speculative_flow:
+                    speculative_flow[1].cancel()
+                raise
+        
+        editable = self._editable_flow(user_message, conversation_id) if intent["wants_flow"] else None
+        if editable:
+            if speculative_flow:
+                speculative_flow[1].cancel()
+            return await self._aedit_flow_with_chat(user_message, intent, conversation_id, editable)
         
         if intent["wants_flow"]:
-            return self._generate_flow_with_chat(user_message, intent)
+            return await self._agenerate_flow_with_chat(user_message, intent, conversation_id, speculative_flow)
+        
+        if speculative_flow:
+            speculative_flow[1].cancel()
+        return await self._aprovide_conversational_response(user_message, intent, conversation_id)
+    
+    def _cache_key(self, user_message: str, conversation_id: Optional[str]) -> Optional[str]:
+        """Cache key for an opening message; follow-ups depend on context and are not cached."""
+        
+        if conversation_id and self.conversation_store.get_history(conversation_id):
+            return None
+        return make_cache_key("real_ai_chat", user_message, model=self.models.signature(),
+                              template_version=self.template_version)
+    
+    def _cache_response(self, cache_key: Optional[str], result: Dict[str, Any]):
+        # Answers built from fallbacks after an LLM failure are not kept
+        if cache_key and result.get("success") and not self._degraded(result):
+            self.cache.set(cache_key, self._cacheable_response(result))
+    
+    @staticmethod
+    def _degraded(result: Dict[str, Any]) -> bool:
+        """Whether a step of the result fell back because the LLM failed."""
+        return bool(result.get("intent", {}).get("degraded")) or is_degraded(result.get("flow"))
+    
+    def _cacheable_response(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """The conversation-independent part of a chat result."""
+        return {
+            "message": result["message"],
+            "flow": result.get("flow"),
+            "intent": result.get("intent", {})
+        }
+    
+    def _replay_cached_response(self, user_message: str, conversation_id: Optional[str],
+                                cached: Dict[str, Any]) -> Dict[str, Any]:
+        """Record a cached exchange in the conversation and return it as a fresh result."""
+        
+        conversation_id = self._record_user_message(user_message, conversation_id)
+        if cached["flow"] is not None:
+            result = self._record_flow_response(conversation_id, cached["message"], cached["flow"], cached["intent"])
         else:
-            return self._provide_conversational_response(user_message, intent)
+            result = self._record_conversational_response(conversation_id, cached["message"], cached["intent"])
+        result["cached"] = True
+        return result
+    
+    async def astream_chat(self, user_message: str, conversation_id: Optional[str] = None,
+                           use_cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the chat as incremental events.
+        
+        Yields ``{"event": ..., "data": ...}`` dicts in this order:
+        ``conversation``, ``intent``, then either ``token``* for a plain
+        reply, or ``template``, ``token``*, ``node``* and ``flow`` when a flow
+        is generated, or ``token``* and ``patch`` when the conversation's
+        current flow is edited, and finally ``done``. Chat text is streamed
+        with OpenAI streaming while the flow customisation runs concurrently.
+        Opening messages are replayed from the generation cache (as one
+        ``token`` event) unless ``use_cache`` is False.
+        """
+        
+        cache_key = self._cache_key(user_message, conversation_id) if use_cache else None
+        cached = self.cache.get(cache_key) if cache_key else None
+        if cached:
+            for event in self._replay_events(self._replay_cached_response(user_message, conversation_id, cached)):
+                yield event
+            return
+        
+        conversation_id = self._record_user_message(user_message, conversation_id)
+        yield {"event": "conversation", "data": {"conversation_id": conversation_id}}
+        
+        intent = await self._aanalyze_user_intent(user_message, conversation_id)
+        yield {"event": "intent", "data": intent}
+        
+        if not intent["wants_flow"]:
+            chunks = []
+            async for token in self._astream_reply(CHAT_REPLY, self._conversational_request(user_message, conversation_id),
+                                                   intent=intent):
+                chunks.append(token)
+                yield {"event": "token", "data": {"text": token}}
+            
+            result = self._record_conversational_response(conversation_id, "".join(chunks), intent)
+            self._cache_response(cache_key, result)
+            yield {"event": "done", "data": {"conversation_id": conversation_id, "success": result["success"]}}
+            return
+        
+        editable = self._editable_flow(user_message, conversation_id)
+        if editable:
+            async for event in self._astream_flow_edit(user_message, intent, conversation_id, editable):
+                yield event
+            return
+        
+        template_flow = self._select_best_template_flow(user_message, intent)
+        yield {"event": "template", "data": {"name": template_flow["name"] if template_flow else None}}
+        
+        conversation_context = self._conversation_context(conversation_id)
+        flow_task = asyncio.create_task(self._agenerate_real_axiestudio_flow(user_message, intent))
+        
+        try:
+            chunks = []
+            request = self._chat_response_request(user_message, intent, conversation_context)
+            async for token in self._astream_reply(CHAT_REPLY, request, fallback=self._fallback_chat_response(intent),
+                                                   intent=intent):
+                chunks.append(token)
+                yield {"event": "token", "data": {"text": token}}
+            
+            flow_json = await flow_task
+        finally:
+            flow_task.cancel()
+        
+        for event in self._flow_events(flow_json):
+            yield event
+        
+        self._cache_response(cache_key, self._record_flow_response(conversation_id, "".join(chunks), flow_json, intent))
+        yield {"event": "done", "data": {"conversation_id": conversation_id, "success": True}}
+    
+    def _replay_events(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """The events of :meth:`astream_chat` for a replayed cached result."""
+        
+        conversation_id = result["conversation_id"]
+        events = [
+            {"event": "conversation", "data": {"conversation_id": conversation_id}},
+            {"event": "intent", "data": result.get("intent", {})},
+            {"event": "token", "data": {"text": result["message"]}},
+        ]
+        if result.get("flow") is not None:
+            events += self._flow_events(result["flow"])
+        events.append({"event": "done", "data": {"conversation_id": conversation_id, "success": True, "cached": True}})
+        return events
+    
+    def _flow_events(self, flow_json: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """``node`` events for every node of a flow, then the ``flow`` event."""
+        
+        events = []
+        nodes = flow_json.get("data", flow_json).get("nodes", [])
+        for index, node in enumerate(nodes):
+            node_data = node.get("data", {})
+            events.append({"event": "node", "data": {
+                "index": index,
+                "id": node.get("id"),
+                "type": node_data.get("type", node.get("type")),
+                "display_name": node_data.get("node", {}).get("display_name", node_data.get("display_name"))
+            }})
+        events.append({"event": "flow", "data": flow_json})
+        return events
     
-    def _analyze_user_intent(self, message: str) -> Dict[str, Any]:
-        """Analyze what the user wants to do."""
+    async def _astream_flow_edit(self, user_message: str, intent: Dict[str, Any], conversation_id: str,
+                                 editable: Tuple[str, Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the reply while the current flow is patched; a failed edit streams a regenerated flow."""
+        
+        base_ref, base_flow = editable
+        conversation_context = self._conversation_context(conversation_id)
+        edit_task = asyncio.create_task(self._aedit_flow(base_flow, user_message, conversation_context))
+        
+        try:
+            chunks = []
+            request = self._chat_response_request(user_message, intent, conversation_context)
+            async for token in self._astream_reply(CHAT_REPLY, request, fallback=self._fallback_chat_response(intent),
+                                                   intent=intent):
+                chunks.append(token)
+                yield {"event": "token", "data": {"text": token}}
+            
+            flow_json = await edit_task
+        finally:
+            edit_task.cancel()
+        
+        if flow_json is not None:
+            result = self._record_flow_edit(conversation_id, "".join(chunks), base_ref, base_flow, flow_json, intent)
+            yield {"event": "patch", "data": {key: result[key] for key in ("base_flow_ref", "flow_ref", "patch")}}
+        else:
+            flow_json = await self._agenerate_real_axiestudio_flow(user_message, intent)
+            for event in self._flow_events(flow_json):
+                yield event
+            self._record_flow_response(conversation_id, "".join(chunks), flow_json, intent)
         
+        yield {"event": "done", "data": {"conversation_id": conversation_id, "success": True}}
+    
+    async def _astream_reply(self, stage: str, request: Dict[str, Any], fallback: Optional[str] = None,
+                             intent: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """Stream completion text deltas, yielding ``fallback`` if the call fails before any text.
+        
+        A failed call marks ``intent`` degraded, so the exchange is not cached.
+        """
+        
+        produced = False
+        stream = None
+        try:
+            stream = await self.models.astream(self.async_client, stage, **request)
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    produced = True
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            logger.warning(f"Streaming response failed: {e}")
+            if intent is not None:
+                intent["degraded"] = True
+            if not produced:
+                yield fallback or "I'm here to help you create AxieStudio flows! What would you like to build?"
+        finally:
+            # Frees the model's concurrency slot if the client went away mid-stream
+            if stream is not None:
+                await stream.aclose()
+    
+    def _start_speculative_flow(self, user_message: str) -> Tuple[str, "asyncio.Task"]:
+        """Start customising the template for the most likely flow type."""
+        
+        guessed_type = self._guess_flow_type(user_message)
+        guessed_intent = dict(self._fallback_user_intent(user_message), flow_type=guessed_type)
+        task = asyncio.create_task(self._agenerate_real_axiestudio_flow(user_message, guessed_intent))
+        return guessed_type, task
+    
+    def _guess_flow_type(self, message: str) -> str:
+        """Cheap keyword guess of the flow type the intent analysis will return."""
+        
+        message_lower = message.lower()
+        if any(kw in message_lower for kw in ["rag", "retrieval", "vector", "embedding", "knowledge base"]):
+            return "rag"
+        if any(kw in message_lower for kw in ["agent", "tool", "search the web", "autonomous"]):
+            return "agent"
+        if any(kw in message_lower for kw in ["document", "pdf", "file", "csv"]):
+            return "data_processing"
+        return "chat"
+    
+    def _record_user_message(self, user_message: str, conversation_id: Optional[str]) -> str:
+        """Add user message to the conversation and return its id."""
+        conversation_id = conversation_id or self.conversation_store.new_conversation_id()
+        self.memory.record(conversation_id, "user", user_message)
+        return conversation_id
+    
+    def _complete(self, stage: str, **request: Any) -> str:
+        """Run a chat completion on the stage's model and return the message content (or function call arguments)."""
+        response = self.models.complete(self.client, stage, **request)
+        return completion_text(response.choices[0].message)
+    
+    async def _acomplete(self, stage: str, **request: Any) -> str:
+        """Async variant of :meth:`_complete` on the shared async client."""
+        response = await self.models.acomplete(self.async_client, stage, **request)
+        return completion_text(response.choices[0].message)
+    
+    def _analyze_user_intent(self, message: str, conversation_id: Optional[str] = None,
+                             local: bool = True) -> Dict[str, Any]:
+        """Analyze what the user wants to do, asking the LLM only if the local classifier is unsure."""
+        
+        intent = self._local_user_intent(message, conversation_id) if local else None
+        if intent is not None:
+            return intent
+        
+        try:
+            return parse_json(self._complete(INTENT, **self._intent_request(message, conversation_id)))
+        except Exception as e:
+            logger.warning(f"Intent analysis failed: {e}")
+            return dict(self._fallback_user_intent(message), degraded=True)
+    
+    async def _aanalyze_user_intent(self, message: str, conversation_id: Optional[str] = None,
+                                    local: bool = True) -> Dict[str, Any]:
+        """Async variant of :meth:`_analyze_user_intent`."""
+        
+        intent = self._local_user_intent(message, conversation_id) if local else None
+        if intent is not None:
+            return intent
+        
+        try:
+            return parse_json(await self._acomplete(INTENT, **self._intent_request(message, conversation_id)))
+        except Exception as e:
+            logger.warning(f"Intent analysis failed: {e}")
+            return dict(self._fallback_user_intent(message), degraded=True)
+    
+    def _local_user_intent(self, message: str, conversation_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Intent from the local classifier, or None if it is not confident enough.
+        
+        The classifier learned from opening messages. When the conversation
+        has a flow to edit, a message it takes for a question ("remove the
+        memory node") may well be an edit, so that answer goes to the LLM.
+        """
+        
+        if self.intent_classifier is None:
+            return None
+        label = self.intent_classifier.classify(message, self.intent_threshold)
+        if label is None or (label == CONVERSATION and self._has_current_flow(conversation_id)):
+            return None
+        return {
+            "wants_flow": label != CONVERSATION,
+            "flow_type": USE_CASE_FLOW_TYPES.get(label, "chat"),
+            "complexity": "simple",
+            "specific_components": [],
+            "clarification_needed": False,
+            "clarification_questions": [],
+            "source": "local"
+        }
+    
+    def _intent_request(self, message: str, conversation_id: Optional[str] = None) -> Dict[str, Any]:
+        """Build the completion request for intent analysis."""
+        
+        current_flow = ("\nThe user already built a flow in this conversation. Requests to change it (add, remove, "
+                        "rename, connect or reconfigure components) want a flow.\n"
+                        if self._has_current_flow(conversation_id) else "")
         system_prompt = f"""You are an expert AxieStudio assistant. Analyze the user's message to understand their intent.
-
+{current_flow}
 REAL AXIESTUDIO KNOWLEDGE:
-{self.ai_knowledge[:2000]}  # Truncated for prompt
+{self.knowledge_shards.pack(message, self.knowledge_budget)}
 
 User message: "{message}"
 
@@ -123,35 +518,27 @@ Respond with JSON:
     "clarification_questions": ["question1", "question2"]
 }}"""
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "system", "content": system_prompt}],
-                temperature=0.2,
-                max_tokens=500
-            )
-            
-            return json.loads(response.choices[0].message.content)
-            
-        except Exception as e:
-            logger.warning(f"Intent analysis failed: {e}")
-            return {
-                "wants_flow": "create" in message.lower() or "build" in message.lower(),
-                "flow_type": "chat",
-                "complexity": "simple",
-                "specific_components": [],
-                "clarification_needed": False,
-                "clarification_questions": []
-            }
+        return {
+            "messages": [{"role": "system", "content": system_prompt}],
+            "temperature": 0.2,
+            "max_tokens": 500
+        }
+    
+    def _fallback_user_intent(self, message: str) -> Dict[str, Any]:
+        """Keyword-based intent used when the AI call fails."""
+        return {
+            "wants_flow": "create" in message.lower() or "build" in message.lower(),
+            "flow_type": "chat",
+            "complexity": "simple",
+            "specific_components": [],
+            "clarification_needed": False,
+            "clarification_questions": []
+        }
     
-    def _generate_flow_with_chat(self, user_message: str, intent: Dict[str, Any]) -> Dict[str, Any]:
+    def _generate_flow_with_chat(self, user_message: str, intent: Dict[str, Any], conversation_id: str) -> Dict[str, Any]:
         """Generate a real AxieStudio flow with conversational response."""
         
-        # Create conversation context
-        conversation_context = "\n".join([
-            f"{msg['role']}: {msg['content']}" 
-            for msg in self.conversation_history[-5:]  # Last 5 messages
-        ])
+        conversation_context = self._conversation_context(conversation_id)
         
         # Generate conversational response
         chat_response = self._generate_chat_response(user_message, intent, conversation_context)
@@ -159,26 +546,213 @@ Respond with JSON:
         # Generate actual AxieStudio flow
         flow_json = self._generate_real_axiestudio_flow(user_message, intent)
         
-        # Add assistant response to history
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": chat_response,
-            "timestamp": datetime.now().isoformat(),
-            "flow_generated": True,
-            "flow_data": flow_json
-        })
+        return self._record_flow_response(conversation_id, chat_response, flow_json, intent)
+    
+    async def _agenerate_flow_with_chat(self, user_message: str, intent: Dict[str, Any], conversation_id: str,
+                                        speculative_flow: Optional[Tuple[str, "asyncio.Task"]] = None) -> Dict[str, Any]:
+        """Async variant of :meth:`_generate_flow_with_chat`.
+        
+        In pipelined mode the chat reply and the flow customisation run
+        concurrently since the reply does not depend on the customised flow.
+        A speculative customisation is reused when its guessed flow type
+        matches the analysed intent, and cancelled otherwise.
+        """
+        
+        conversation_context = self._conversation_context(conversation_id)
+        
+        if speculative_flow:
+            guessed_type, task = speculative_flow
+            if guessed_type == intent.get("flow_type", "chat"):
+                flow_coro = task
+            else:
+                task.cancel()
+                flow_coro = self._agenerate_real_axiestudio_flow(user_message, intent)
+        else:
+            flow_coro = self._agenerate_real_axiestudio_flow(user_message, intent)
+        
+        chat_coro = self._agenerate_chat_response(user_message, intent, conversation_context)
+        
+        if self.pipelined:
+            chat_response, flow_json = await asyncio.gather(chat_coro, flow_coro)
+        else:
+            chat_response = await chat_coro
+            flow_json = await flow_coro
+        
+        return self._record_flow_response(conversation_id, chat_response, flow_json, intent)
+    
+    def _has_current_flow(self, conversation_id: Optional[str]) -> bool:
+        """Whether follow-ups in the conversation can edit a flow generated earlier."""
+        return bool(self.edit_mode and conversation_id and self.memory.current_flow_ref(conversation_id))
+    
+    def _editable_flow(self, user_message: str, conversation_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """The conversation's current flow and its reference, when the message should edit it."""
+        
+        if not self.edit_mode or any(phrase in user_message.lower() for phrase in NEW_FLOW_PHRASES):
+            return None
+        flow_ref = self.memory.current_flow_ref(conversation_id)
+        flow = self.memory.get_flow(conversation_id, flow_ref) if flow_ref else None
+        return (flow_ref, flow) if flow is not None else None
+    
+    def _edit_flow_with_chat(self, user_message: str, intent: Dict[str, Any], conversation_id: str,
+                             editable: Tuple[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Patch the conversation's current flow, regenerating it if the edit fails."""
+        
+        base_ref, base_flow = editable
+        conversation_context = self._conversation_context(conversation_id)
+        chat_response = self._generate_chat_response(user_message, intent, conversation_context)
+        
+        try:
+            content = self._complete(FLOW_CUSTOMIZATION, **self._edit_request(base_flow, user_message, conversation_context))
+            flow_json = self._apply_flow_patch(base_flow, content)
+        except Exception as e:
+            logger.warning(f"Flow edit failed, regenerating: {e}")
+            flow_json = self._generate_real_axiestudio_flow(user_message, intent)
+            return self._record_flow_response(conversation_id, chat_response, flow_json, intent)
+        
+        return self._record_flow_edit(conversation_id, chat_response, base_ref, base_flow, flow_json, intent)
+    
+    async def _aedit_flow_with_chat(self, user_message: str, intent: Dict[str, Any], conversation_id: str,
+                                    editable: Tuple[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Async variant of :meth:`_edit_flow_with_chat`; the reply and the patch run concurrently when pipelined."""
+        
+        base_ref, base_flow = editable
+        conversation_context = self._conversation_context(conversation_id)
+        chat_coro = self._agenerate_chat_response(user_message, intent, conversation_context)
+        edit_coro = self._aedit_flow(base_flow, user_message, conversation_context)
+        
+        if self.pipelined:
+            chat_response, flow_json = await asyncio.gather(chat_coro, edit_coro)
+        else:
+            chat_response = await chat_coro
+            flow_json = await edit_coro
+        
+        if flow_json is None:
+            flow_json = await self._agenerate_real_axiestudio_flow(user_message, intent)
+            return self._record_flow_response(conversation_id, chat_response, flow_json, intent)
+        
+        return self._record_flow_edit(conversation_id, chat_response, base_ref, base_flow, flow_json, intent)
+    
+    async def _aedit_flow(self, base_flow: Dict[str, Any], user_message: str, context: str) -> Optional[Dict[str, Any]]:
+        """The patched flow, or None if the model's patch could not be applied."""
+        
+        try:
+            content = await self._acomplete(FLOW_CUSTOMIZATION, **self._edit_request(base_flow, user_message, context))
+            return self._apply_flow_patch(base_flow, content)
+        except Exception as e:
+            logger.warning(f"Flow edit failed, regenerating: {e}")
+            return None
+    
+    def _edit_request(self, base_flow: Dict[str, Any], user_message: str, context: str) -> Dict[str, Any]:
+        """Build the completion request for a JSON patch against the current flow."""
+        
+        system_prompt = f"""You are an expert AxieStudio flow architect. Edit the user's current flow with a JSON patch instead of rewriting it.
+
+CURRENT FLOW (edit view: nodes keyed by id with their user-facing params, and edges from an output to an input param):
+{fit_edit_view(base_flow, self.template_budget)}
+
+CONVERSATION CONTEXT:
+{context}
+
+COMPONENT TYPES YOU CAN ADD:
+{', '.join(sorted(self.node_templates))}
+{self._component_handles(user_message)}
+
+USER REQUEST: "{user_message}"
+
+Return an RFC 6902 JSON patch against the edit view as {{"patch": [...]}}:
+- Add a node: {{"op": "add", "path": "/nodes/<Type>-<5 random letters>", "value": {{"type": "<Type>", "params": {{}}}}}}
+- Set a param: {{"op": "replace", "path": "/nodes/<id>/params/<param>", "value": ...}}
+- Remove a node: {{"op": "remove", "path": "/nodes/<id>"}}
+- Connect nodes: {{"op": "add", "path": "/edges/-", "value": {{"source": "<id>", "output": "<output>", "target": "<id>", "input": "<param>"}}}}
+New nodes you leave unconnected are wired automatically. Change only what the request needs."""
+
+        request = {
+            "messages": [{"role": "system", "content": system_prompt}],
+            "temperature": 0.2,
+            "max_tokens": 800
+        }
+        if self.structured_output:
+            request.update(FLOW_PATCH.request())
+        return request
+    
+    def _component_handles(self, user_message: str, limit: int = 5) -> str:
+        """Output and input handles of the component types most relevant to the request."""
+        
+        lines = []
+        for node_type, _, _ in self._node_type_search.search(user_message, limit=limit):
+            outputs = ", ".join(f"{name} ({'/'.join(types)})" for name, types in self.wiring.outputs.get(node_type, []))
+            inputs = ", ".join(f"{name} ({'/'.join(types)})" for name, types in self.wiring.inputs.get(node_type, []))
+            lines.append(f"- {node_type}: outputs {outputs or 'none'}; inputs {inputs or 'none'}")
+        return "Handles of relevant types:\n" + "\n".join(lines) if lines else ""
+    
+    def _apply_flow_patch(self, base_flow: Dict[str, Any], content: Optional[str]) -> Dict[str, Any]:
+        """Apply and validate the model's patch; a truncated patch is rejected rather than half-applied."""
+        
+        value, complete = FLOW_PATCH.parse(content)
+        if not complete:
+            raise PatchError("The patch was truncated")
+        return apply_edit(base_flow, value["patch"], self.node_templates, self.wiring)
+    
+    def _record_flow_edit(self, conversation_id: str, chat_response: str, base_ref: str, base_flow: Dict[str, Any],
+                          flow_json: Dict[str, Any], intent: Dict[str, Any]) -> Dict[str, Any]:
+        """Store the edited flow and build a chat result carrying only the patch from the previous flow."""
+        
+        message = self.memory.record(conversation_id, "assistant", chat_response, flow=flow_json,
+                                     flow_generated=True, base_flow_ref=base_ref)
+        
+        return {
+            "success": True,
+            "message": chat_response,
+            "flow": None,
+            "patch": diff(base_flow, flow_json),
+            "base_flow_ref": base_ref,
+            "flow_ref": message["flow_ref"],
+            "intent": intent,
+            "conversation_id": conversation_id
+        }
+    
+    def _conversation_context(self, conversation_id: str, max_tokens: Optional[int] = None) -> str:
+        """Conversation summary and recent turns within the memory token budget."""
+        return self.memory.context(conversation_id, max_tokens)
+    
+    def _record_flow_response(self, conversation_id: str, chat_response: str,
+                              flow_json: Dict[str, Any], intent: Dict[str, Any]) -> Dict[str, Any]:
+        """Add assistant response to the conversation and build the chat result."""
+        
+        message = self.memory.record(conversation_id, "assistant", chat_response, flow=flow_json, flow_generated=True)
         
         return {
             "success": True,
             "message": chat_response,
             "flow": flow_json,
+            "flow_ref": message["flow_ref"],
             "intent": intent,
-            "conversation_id": len(self.conversation_history)
+            "conversation_id": conversation_id
         }
     
     def _generate_chat_response(self, user_message: str, intent: Dict[str, Any], context: str) -> str:
         """Generate natural conversational response."""
         
+        try:
+            return self._complete(CHAT_REPLY, **self._chat_response_request(user_message, intent, context))
+        except Exception as e:
+            logger.warning(f"Chat response generation failed: {e}")
+            intent["degraded"] = True
+            return self._fallback_chat_response(intent)
+    
+    async def _agenerate_chat_response(self, user_message: str, intent: Dict[str, Any], context: str) -> str:
+        """Async variant of :meth:`_generate_chat_response`."""
+        
+        try:
+            return await self._acomplete(CHAT_REPLY, **self._chat_response_request(user_message, intent, context))
+        except Exception as e:
+            logger.warning(f"Chat response generation failed: {e}")
+            intent["degraded"] = True
+            return self._fallback_chat_response(intent)
+    
+    def _chat_response_request(self, user_message: str, intent: Dict[str, Any], context: str) -> Dict[str, Any]:
+        """Build the completion request for the conversational reply."""
+        
         system_prompt = f"""You are a friendly AxieStudio AI assistant. You help users create powerful flows using real AxieStudio components.
 
 CONVERSATION CONTEXT:
@@ -197,28 +771,23 @@ Generate a friendly, helpful response that:
 
 Keep it concise but informative (2-3 sentences)."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=0.7,
-                max_tokens=200
-            )
-            
-            return response.choices[0].message.content
-            
-        except Exception as e:
-            logger.warning(f"Chat response generation failed: {e}")
-            return f"I'll help you create a {intent.get('flow_type', 'custom')} flow! Let me generate that for you using real AxieStudio components."
+        return {
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            "temperature": 0.7,
+            "max_tokens": 200
+        }
+    
+    def _fallback_chat_response(self, intent: Dict[str, Any]) -> str:
+        return f"I'll help you create a {intent.get('flow_type', 'custom')} flow! Let me generate that for you using real AxieStudio components."
     
     def _generate_real_axiestudio_flow(self, user_message: str, intent: Dict[str, Any]) -> Dict[str, Any]:
         """Generate authentic AxieStudio flow JSON using real component data."""
         
         # Select appropriate template flow based on intent
-        template_flow = self._select_best_template_flow(intent)
+        template_flow = self._select_best_template_flow(user_message, intent)
         
         if not template_flow:
             return self._create_minimal_real_flow(user_message, intent)
@@ -228,79 +797,117 @@ Keep it concise but informative (2-3 sentences)."""
         
         return customized_flow
     
-    def _select_best_template_flow(self, intent: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Select the best template flow based on user intent."""
+    async def _agenerate_real_axiestudio_flow(self, user_message: str, intent: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of :meth:`_generate_real_axiestudio_flow`."""
         
-        flow_type = intent.get("flow_type", "chat")
+        template_flow = self._select_best_template_flow(user_message, intent)
         
-        # Map intent to actual flow templates
-        flow_mapping = {
-            "chat": "Basic Prompting",
-            "rag": "Vector Store RAG", 
-            "agent": "Simple Agent",
-            "data_processing": "Document Q&A"
-        }
+        if not template_flow:
+            return self._create_minimal_real_flow(user_message, intent)
         
-        template_name = flow_mapping.get(flow_type)
-        if template_name and template_name in self.axiestudio_data['flows']:
-            return self.axiestudio_data['flows'][template_name]
+        return await self._acustomize_flow_with_ai(template_flow, user_message, intent)
+    
+    def _select_best_template_flow(self, user_message: str, intent: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Select the starter flow closest to the request and its intent."""
+        
+        flows = self.axiestudio_data['flows']
+        
+        # Depends only on the message and flow type, so a speculative
+        # customisation with the same guessed type starts from the same template
+        query = f"{user_message} {intent.get('flow_type', 'chat')}"
+        matches = self.semantic_catalog.flows.search(query, k=1, where=lambda name: name in flows)
+        if matches:
+            return flows[matches[0][0]]
         
         # Fallback to first available flow
-        if self.axiestudio_data['flows']:
-            return list(self.axiestudio_data['flows'].values())[0]
+        if flows:
+            return next(iter(flows.values()))
         
         return None
     
     def _customize_flow_with_ai(self, template_flow: Dict[str, Any], user_message: str, intent: Dict[str, Any]) -> Dict[str, Any]:
         """Use AI to customize template flow for user's specific needs."""
         
-        # Create customization prompt
+        try:
+            content = self._complete(FLOW_CUSTOMIZATION, **self._customize_request(template_flow, user_message, intent))
+            return self._finalize_customized_flow(*CUSTOMIZED_FLOW.parse(content), template_flow, user_message)
+        except Exception as e:
+            logger.warning(f"Flow customization failed: {e}")
+            return self._fallback_customized_flow(template_flow, user_message)
+    
+    async def _acustomize_flow_with_ai(self, template_flow: Dict[str, Any], user_message: str, intent: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of :meth:`_customize_flow_with_ai`."""
+        
+        try:
+            content = await self._acomplete(FLOW_CUSTOMIZATION, **self._customize_request(template_flow, user_message, intent))
+            return self._finalize_customized_flow(*CUSTOMIZED_FLOW.parse(content), template_flow, user_message)
+        except Exception as e:
+            logger.warning(f"Flow customization failed: {e}")
+            return self._fallback_customized_flow(template_flow, user_message)
+    
+    def _customize_request(self, template_flow: Dict[str, Any], user_message: str, intent: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the completion request for template customization."""
+        
         system_prompt = f"""You are an expert AxieStudio flow architect. Customize this real AxieStudio flow template for the user's specific needs.
 
-TEMPLATE FLOW:
-{json.dumps(template_flow, indent=2)[:1500]}...
+TEMPLATE FLOW (skeleton: component nodes with their user-facing params, and edges from an output to an input param):
+{self._fit_template(template_flow)}
 
 USER REQUEST: "{user_message}"
 USER INTENT: {json.dumps(intent, indent=2)}
 
-AVAILABLE COMPONENTS:
-{', '.join(list(self.axiestudio_data['components'].keys())[:30])}
-
 Customize the flow by:
 1. Updating the name and description
-2. Modifying component parameters if needed
-3. Keeping the same JSON structure
-4. Ensuring all components exist in our component list
+2. Modifying component params if needed (values ending in "..." are shortened; leave them as they are unless you replace them)
+3. Removing nodes that are not needed, or adding nodes with a new id and the type of an existing node
+4. Keeping edges consistent with the nodes
 
-Return the complete customized flow JSON."""
+Return the complete customized skeleton JSON with the same structure."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "system", "content": system_prompt}],
-                temperature=0.3,
-                max_tokens=2000
-            )
-            
-            customized = json.loads(response.choices[0].message.content)
-            
-            # Add metadata
-            customized["metadata"] = customized.get("metadata", {})
-            customized["metadata"].update({
-                "generated_by": "Real AxieStudio AI Chat",
-                "user_request": user_message,
-                "generation_timestamp": datetime.now().isoformat(),
-                "template_used": template_flow["name"]
-            })
-            
-            return customized
-            
-        except Exception as e:
-            logger.warning(f"Flow customization failed: {e}")
-            # Return original template with updated metadata
-            template_flow["name"] = f"AI Generated: {user_message[:50]}..."
-            template_flow["description"] = f"Generated flow for: {user_message}"
-            return template_flow
+        request = {
+            "messages": [{"role": "system", "content": system_prompt}],
+            "temperature": 0.3,
+            "max_tokens": 2000
+        }
+        if self.structured_output:
+            request.update(CUSTOMIZED_FLOW.request())
+        return request
+    
+    def _fit_template(self, template_flow: Dict[str, Any]) -> str:
+        """Template skeleton JSON within the template token budget, rendered once per template."""
+        
+        name = template_flow["name"]
+        if name not in self._template_context:
+            self._template_context[name] = fit_skeleton(template_flow, self.template_budget)
+        return self._template_context[name]
+    
+    def _finalize_customized_flow(self, customized: Dict[str, Any], complete: bool, template_flow: Dict[str, Any],
+                                  user_message: str) -> Dict[str, Any]:
+        """Merge the customized skeleton into the template and add generation metadata.
+        
+        A truncated (repaired) skeleton only lists some nodes and edges, so
+        the rest are kept rather than removed.
+        """
+        
+        customized = rehydrate(template_flow, customized, partial=not complete)
+        customized["metadata"] = dict(customized.get("metadata", {}))
+        customized["metadata"].update({
+            "generated_by": "Real AxieStudio AI Chat",
+            "user_request": user_message,
+            "generation_timestamp": datetime.now().isoformat(),
+            "template_used": template_flow["name"]
+        })
+        
+        return customized
+    
+    def _fallback_customized_flow(self, template_flow: Dict[str, Any], user_message: str) -> Dict[str, Any]:
+        """Return original template with updated name and description."""
+        
+        # Shallow copy so the shared crawled template is never mutated
+        flow = mark_degraded(template_flow)
+        flow["name"] = f"AI Generated: {user_message[:50]}..."
+        flow["description"] = f"Generated flow for: {user_message}"
+        return flow
     
     def _create_minimal_real_flow(self, user_message: str, intent: Dict[str, Any]) -> Dict[str, Any]:
         """Create minimal but real AxieStudio flow as fallback."""
@@ -321,64 +928,95 @@ Return the complete customized flow JSON."""
             }
         }
     
-    def _provide_conversational_response(self, user_message: str, intent: Dict[str, Any]) -> Dict[str, Any]:
+    def _provide_conversational_response(self, user_message: str, intent: Dict[str, Any], conversation_id: str) -> Dict[str, Any]:
         """Provide conversational response without flow generation."""
         
+        try:
+            chat_response = self._complete(CHAT_REPLY, **self._conversational_request(user_message, conversation_id))
+            return self._record_conversational_response(conversation_id, chat_response, intent)
+        except Exception as e:
+            logger.warning(f"Conversational response failed: {e}")
+            return self._failed_conversational_response(conversation_id, e)
+    
+    async def _aprovide_conversational_response(self, user_message: str, intent: Dict[str, Any], conversation_id: str) -> Dict[str, Any]:
+        """Async variant of :meth:`_provide_conversational_response`."""
+        
+        try:
+            chat_response = await self._acomplete(CHAT_REPLY, **self._conversational_request(user_message, conversation_id))
+            return self._record_conversational_response(conversation_id, chat_response, intent)
+        except Exception as e:
+            logger.warning(f"Conversational response failed: {e}")
+            return self._failed_conversational_response(conversation_id, e)
+    
+    def _conversational_request(self, user_message: str, conversation_id: str) -> Dict[str, Any]:
+        """Build the completion request for a plain conversational reply."""
+        
+        conversation_context = self._conversation_context(conversation_id, self.memory.max_tokens // 2)
+        
         system_prompt = f"""You are a helpful AxieStudio AI assistant. The user is asking a question or having a conversation.
 
 AVAILABLE AXIESTUDIO COMPONENTS:
 {', '.join(list(self.axiestudio_data['components'].keys())[:20])}...
 
 CONVERSATION HISTORY:
-{json.dumps(self.conversation_history[-3:], indent=2) if self.conversation_history else "No previous conversation"}
+{conversation_context or "No previous conversation"}
 
 Provide a helpful, conversational response. If they're asking about AxieStudio capabilities, mention real components and features."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=0.7,
-                max_tokens=300
-            )
-            
-            chat_response = response.choices[0].message.content
-            
-            # Add to conversation history
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": chat_response,
-                "timestamp": datetime.now().isoformat(),
-                "flow_generated": False
-            })
-            
-            return {
-                "success": True,
-                "message": chat_response,
-                "flow": None,
-                "intent": intent,
-                "conversation_id": len(self.conversation_history)
-            }
-            
-        except Exception as e:
-            logger.warning(f"Conversational response failed: {e}")
-            return {
-                "success": False,
-                "message": "I'm here to help you create AxieStudio flows! What would you like to build?",
-                "error": str(e)
-            }
+        return {
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            "temperature": 0.7,
+            "max_tokens": 300
+        }
     
-    def get_conversation_history(self) -> List[Dict[str, Any]]:
-        """Get the current conversation history."""
-        return self.conversation_history
+    def _record_conversational_response(self, conversation_id: str, chat_response: str, intent: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a conversational reply to the conversation and build the chat result."""
+        
+        self.memory.record(conversation_id, "assistant", chat_response, flow_generated=False)
+        
+        return {
+            "success": True,
+            "message": chat_response,
+            "flow": None,
+            "intent": intent,
+            "conversation_id": conversation_id
+        }
+    
+    def _failed_conversational_response(self, conversation_id: str, error: Exception) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "message": "I'm here to help you create AxieStudio flows! What would you like to build?",
+            "error": str(error),
+            "conversation_id": conversation_id
+        }
+    
+    def get_flow(self, conversation_id: str, flow_ref: str) -> Optional[Dict[str, Any]]:
+        """A flow generated in a conversation, by reference."""
+        return self.memory.get_flow(conversation_id, flow_ref)
+    
+    def get_conversation_history(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Get the history of a conversation, with generated flows resolved."""
+        return self.memory.history(conversation_id)
     
-    def clear_conversation(self):
-        """Clear the conversation history."""
-        self.conversation_history = []
-        logger.info("🗑️ Conversation history cleared")
+    def clear_conversation(self, conversation_id: str):
+        """Clear the history of a conversation."""
+        self.memory.clear(conversation_id)
+        logger.info(f"🗑️ Conversation {conversation_id} cleared")
+
+# Global instance (built on first use, not at import)
+_real_axiestudio_ai_chat = LazyInstance(RealAxieStudioAIChat)
+
+
+def get_real_axiestudio_ai_chat() -> RealAxieStudioAIChat:
+    """Get the shared RealAxieStudioAIChat, building it on first use."""
+    return _real_axiestudio_ai_chat.get()
+
 
-# Global instance
-real_axiestudio_ai_chat = RealAxieStudioAIChat()
+def __getattr__(name):
+    # Keeps ``from .real_axiestudio_ai_chat import real_axiestudio_ai_chat`` working for existing callers
+    if name == "real_axiestudio_ai_chat":
+        return get_real_axiestudio_ai_chat()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
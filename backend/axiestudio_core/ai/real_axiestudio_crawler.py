@@ -10,15 +10,13 @@ This module crawls and analyzes REAL AxieStudio component files to extract:
 This ensures the AI generates AUTHENTIC AxieStudio flows!
 """
 
-import json
-import os
-import ast
-import re
-from pathlib import Path
 from typing import Dict, List, Any, Optional, Set
 from dataclasses import dataclass
 import logging
 
+from .knowledge_index import ClassSummary, FlowDocument, KnowledgeIndex, ModuleRecord, get_knowledge_index
+from .lazy_instance import LazyInstance
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -50,22 +48,14 @@ class FlowInfo:
 class RealAxieStudioCrawler:
     """Crawls real AxieStudio files to extract component and flow information."""
     
-    def __init__(self):
+    def __init__(self, index: Optional[KnowledgeIndex] = None):
         self.components: Dict[str, ComponentInfo] = {}
         self.flows: Dict[str, FlowInfo] = {}
         self.component_relationships: Dict[str, List[str]] = {}
+        self.component_wiring: Dict[str, List[str]] = {}
         
-        # Paths to real AxieStudio files (relative to project root)
-        project_root = Path(__file__).parent.parent.parent.parent
-        self.axiestudio_paths = [
-            project_root / "axiestudio/src/backend/base/axiestudio/components",
-            project_root / "axiestudio/backend/base/axiestudio/components",
-            project_root / "backend/axiestudio_core/axiestudio/axiestudio_components",
-            project_root / "data/axiestudio/axiestudio_initial_setup/starter_projects",
-            # Also check current directory structure
-            Path("../axiestudio_core/axiestudio/axiestudio_components"),
-            Path("../../data/axiestudio/axiestudio_initial_setup/starter_projects")
-        ]
+        # Real AxieStudio files, parsed once by the shared knowledge index
+        self.index = index or get_knowledge_index()
         
         logger.info("🔍 Real AxieStudio Crawler initialized")
     
@@ -86,6 +76,7 @@ class RealAxieStudioCrawler:
             "components": {name: self._component_to_dict(comp) for name, comp in self.components.items()},
             "flows": {name: self._flow_to_dict(flow) for name, flow in self.flows.items()},
             "relationships": self.component_relationships,
+            "wiring": self.component_wiring,
             "stats": {
                 "total_components": len(self.components),
                 "total_flows": len(self.flows),
@@ -97,247 +88,93 @@ class RealAxieStudioCrawler:
         return result
     
     def _crawl_components(self):
-        """Crawl real AxieStudio component files."""
+        """Collect component classes from the indexed AxieStudio modules."""
         logger.info("🔍 Crawling AxieStudio components...")
         
-        for base_path in self.axiestudio_paths:
-            if not base_path.exists():
+        for module in self.index.modules.values():
+            if not module.looks_like_component:
                 continue
-                
-            # Find Python component files
-            for py_file in base_path.rglob("*.py"):
-                if py_file.name.startswith("__"):
-                    continue
-                    
-                try:
-                    self._analyze_component_file(py_file)
-                except Exception as e:
-                    logger.warning(f"Failed to analyze {py_file}: {e}")
-    
-    def _analyze_component_file(self, file_path: Path):
-        """Analyze a single component Python file."""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Parse AST to find component classes
-            tree = ast.parse(content)
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.ClassDef):
-                    component_info = self._extract_component_info(node, content, file_path)
-                    if component_info:
-                        self.components[component_info.name] = component_info
-                        logger.debug(f"Found component: {component_info.name}")
-                        
-        except Exception as e:
-            logger.warning(f"Error analyzing {file_path}: {e}")
-    
-    def _extract_component_info(self, class_node: ast.ClassDef, content: str, file_path: Path) -> Optional[ComponentInfo]:
-        """Extract component information from AST node."""
-        try:
-            # Look for AxieStudio component patterns
-            if not self._is_axiestudio_component(class_node, content):
-                return None
             
-            # Extract basic info
-            name = class_node.name
-            display_name = self._extract_display_name(class_node, content)
-            description = self._extract_description(class_node, content)
-            
-            # Extract inputs and outputs
-            inputs = self._extract_inputs(class_node, content)
-            outputs = self._extract_outputs(class_node, content)
-            
-            # Extract template and metadata
-            template = self._extract_template(class_node, content)
-            metadata = self._extract_metadata(class_node, content)
-            
-            return ComponentInfo(
-                name=name,
-                display_name=display_name or name,
-                description=description or f"AxieStudio {name} component",
-                base_classes=self._extract_base_classes(class_node),
-                inputs=inputs,
-                outputs=outputs,
-                template=template,
-                metadata=metadata,
-                file_path=str(file_path),
-                module_path=self._get_module_path(file_path)
-            )
-            
-        except Exception as e:
-            logger.warning(f"Error extracting component info from {class_node.name}: {e}")
-            return None
-    
-    def _is_axiestudio_component(self, class_node: ast.ClassDef, content: str) -> bool:
-        """Check if class is an AxieStudio component."""
-        # Check for common AxieStudio patterns
-        patterns = [
-            "Component",
-            "display_name",
-            "description", 
-            "inputs",
-            "outputs",
-            "build_",
-            "@component"
-        ]
-        
-        return any(pattern in content for pattern in patterns)
-    
-    def _extract_display_name(self, class_node: ast.ClassDef, content: str) -> Optional[str]:
-        """Extract display name from component."""
-        # Look for display_name attribute
-        match = re.search(r'display_name\s*=\s*["\']([^"\']+)["\']', content)
-        return match.group(1) if match else None
-    
-    def _extract_description(self, class_node: ast.ClassDef, content: str) -> Optional[str]:
-        """Extract description from component."""
-        # Look for description attribute or docstring
-        match = re.search(r'description\s*=\s*["\']([^"\']+)["\']', content)
-        if match:
-            return match.group(1)
-        
-        # Try docstring
-        if class_node.body and isinstance(class_node.body[0], ast.Expr):
-            if isinstance(class_node.body[0].value, ast.Constant):
-                return class_node.body[0].value.value
-        
-        return None
-    
-    def _extract_inputs(self, class_node: ast.ClassDef, content: str) -> List[Dict[str, Any]]:
-        """Extract input definitions from component."""
-        inputs = []
-        
-        # Look for inputs list
-        input_match = re.search(r'inputs\s*=\s*\[(.*?)\]', content, re.DOTALL)
-        if input_match:
-            # Parse input definitions (simplified)
-            input_text = input_match.group(1)
-            # This would need more sophisticated parsing for real implementation
-            inputs.append({"type": "parsed_input", "raw": input_text[:100]})
-        
-        return inputs
-    
-    def _extract_outputs(self, class_node: ast.ClassDef, content: str) -> List[Dict[str, Any]]:
-        """Extract output definitions from component."""
-        outputs = []
-        
-        # Look for outputs list
-        output_match = re.search(r'outputs\s*=\s*\[(.*?)\]', content, re.DOTALL)
-        if output_match:
-            # Parse output definitions (simplified)
-            output_text = output_match.group(1)
-            outputs.append({"type": "parsed_output", "raw": output_text[:100]})
-        
-        return outputs
-    
-    def _extract_template(self, class_node: ast.ClassDef, content: str) -> Dict[str, Any]:
-        """Extract template information from component."""
-        return {"extracted": True, "class_name": class_node.name}
-    
-    def _extract_metadata(self, class_node: ast.ClassDef, content: str) -> Dict[str, Any]:
-        """Extract metadata from component."""
-        return {
-            "class_name": class_node.name,
-            "has_build_method": "def build" in content,
-            "has_inputs": "inputs" in content,
-            "has_outputs": "outputs" in content
-        }
-    
-    def _extract_base_classes(self, class_node: ast.ClassDef) -> List[str]:
-        """Extract base classes from component."""
-        bases = []
-        for base in class_node.bases:
-            if isinstance(base, ast.Name):
-                bases.append(base.id)
-            elif isinstance(base, ast.Attribute):
-                bases.append(f"{base.attr}")
-        return bases
-    
-    def _get_module_path(self, file_path: Path) -> str:
+            for class_summary in module.classes:
+                component_info = self._extract_component_info(class_summary, module)
+                self.components[component_info.name] = component_info
+                logger.debug(f"Found component: {component_info.name}")
+    
+    def _extract_component_info(self, class_summary: ClassSummary, module: ModuleRecord) -> ComponentInfo:
+        """Build component information from an indexed class."""
+        name = class_summary.name
+        description = module.description or class_summary.docstring
+        
+        return ComponentInfo(
+            name=name,
+            display_name=module.display_name or name,
+            description=description or f"AxieStudio {name} component",
+            base_classes=[base.rsplit(".", 1)[-1] for base in class_summary.bases],
+            inputs=[{"type": "parsed_input", "raw": module.inputs_block[:100]}] if module.inputs_block is not None else [],
+            outputs=[{"type": "parsed_output", "raw": module.outputs_block[:100]}] if module.outputs_block is not None else [],
+            template={"extracted": True, "class_name": name},
+            metadata={
+                "class_name": name,
+                "has_build_method": module.has_build_method,
+                "has_inputs": module.has_inputs,
+                "has_outputs": module.has_outputs
+            },
+            file_path=module.path,
+            module_path=self._get_module_path(module)
+        )
+    
+    def _get_module_path(self, module: ModuleRecord) -> str:
         """Get module path for component."""
-        return str(file_path.relative_to(Path.cwd())).replace("/", ".").replace("\\", ".").replace(".py", "")
+        return "axiestudio_components." + module.relative_path[:-len(".py")].replace("/", ".")
     
     def _crawl_flows(self):
-        """Crawl real AxieStudio flow JSON files."""
+        """Collect flows from the indexed starter projects."""
         logger.info("🔍 Crawling AxieStudio flows...")
         
-        for base_path in self.axiestudio_paths:
-            if not base_path.exists():
-                continue
-                
-            # Find JSON flow files
-            for json_file in base_path.rglob("*.json"):
-                try:
-                    self._analyze_flow_file(json_file)
-                except Exception as e:
-                    logger.warning(f"Failed to analyze flow {json_file}: {e}")
-    
-    def _analyze_flow_file(self, file_path: Path):
-        """Analyze a single flow JSON file."""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                flow_data = json.load(f)
-            
-            # Extract flow information
-            flow_info = self._extract_flow_info(flow_data, file_path)
-            if flow_info:
-                self.flows[flow_info.name] = flow_info
-                logger.debug(f"Found flow: {flow_info.name}")
-                
-        except Exception as e:
-            logger.warning(f"Error analyzing flow {file_path}: {e}")
-    
-    def _extract_flow_info(self, flow_data: Dict[str, Any], file_path: Path) -> Optional[FlowInfo]:
-        """Extract flow information from JSON data."""
-        try:
-            name = flow_data.get("name", file_path.stem)
-            description = flow_data.get("description", "")
-            
-            # Extract nodes and edges
-            data = flow_data.get("data", {})
-            nodes = data.get("nodes", [])
-            edges = data.get("edges", [])
-            
-            # Extract components used
-            components_used = set()
-            for node in nodes:
-                node_data = node.get("data", {})
-                if "id" in node_data:
-                    # Extract component type from node ID
-                    node_id = node_data["id"]
-                    component_type = node_id.split("-")[0] if "-" in node_id else node_id
-                    components_used.add(component_type)
-            
-            return FlowInfo(
-                name=name,
-                description=description,
-                nodes=nodes,
-                edges=edges,
-                components_used=components_used,
-                metadata=flow_data.get("metadata", {}),
-                file_path=str(file_path)
-            )
-            
-        except Exception as e:
-            logger.warning(f"Error extracting flow info: {e}")
-            return None
+        for document in self.index.flows.values():
+            flow_info = self._extract_flow_info(document)
+            self.flows[flow_info.name] = flow_info
+            logger.debug(f"Found flow: {flow_info.name}")
+    
+    def _extract_flow_info(self, document: FlowDocument) -> FlowInfo:
+        """Extract flow information from an indexed flow document."""
+        flow_data = document.data
+        
+        # Extract nodes and edges
+        data = flow_data.get("data", {})
+        nodes = data.get("nodes", [])
+        edges = data.get("edges", [])
+        
+        # Extract components used
+        components_used = set()
+        for node in nodes:
+            node_data = node.get("data", {})
+            if "id" in node_data:
+                # Extract component type from node ID
+                node_id = node_data["id"]
+                component_type = node_id.split("-")[0] if "-" in node_id else node_id
+                components_used.add(component_type)
+        
+        return FlowInfo(
+            name=document.name,
+            description=flow_data.get("description", ""),
+            nodes=nodes,
+            edges=edges,
+            components_used=components_used,
+            metadata=flow_data.get("metadata", {}),
+            file_path=document.path
+        )
     
     def _analyze_component_relationships(self):
-        """Analyze relationships between components based on flows."""
+        """Read component co-occurrence from the shared wiring index."""
         logger.info("🔗 Analyzing component relationships...")
         
-        for flow in self.flows.values():
-            components = list(flow.components_used)
-            
-            # Create relationships between components used together
-            for i, comp1 in enumerate(components):
-                for comp2 in components[i+1:]:
-                    if comp1 not in self.component_relationships:
-                        self.component_relationships[comp1] = []
-                    if comp2 not in self.component_relationships[comp1]:
-                        self.component_relationships[comp1].append(comp2)
+        wiring = self.index.wiring()
+        for component in wiring.cooccurrence:
+            self.component_relationships[component] = wiring.related(component)
+            connectable = wiring.connectable(component)
+            if connectable:
+                self.component_wiring[component] = connectable
     
     def _get_component_categories(self) -> Dict[str, int]:
         """Get component categories and counts."""
@@ -387,5 +224,17 @@ class RealAxieStudioCrawler:
             "file_path": flow.file_path
         }
 
-# Global instance
-real_axiestudio_crawler = RealAxieStudioCrawler()
+# Global instance (built on first use, not at import)
+_real_axiestudio_crawler = LazyInstance(RealAxieStudioCrawler)
+
+
+def get_real_axiestudio_crawler() -> RealAxieStudioCrawler:
+    """Get the shared RealAxieStudioCrawler, building it on first use."""
+    return _real_axiestudio_crawler.get()
+
+
+def __getattr__(name):
+    # Keeps ``from .real_axiestudio_crawler import real_axiestudio_crawler`` working for existing callers
+    if name == "real_axiestudio_crawler":
+        return get_real_axiestudio_crawler()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,119 @@
+"""
+BM25 Search Index
+
+A small in-memory inverted index with BM25 ranking, used for component and
+flow retrieval. Documents are tokenised once at index time (camelCase
+splitting, stop-word removal and light suffix stemming); a query only touches
+the posting lists of its own terms.
+"""
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+_CAMEL_BOUNDARY = re.compile(r'(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])')
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by can create for from get has have how i in into is it its
+make me my need of on or our please so that the their them then there these this to
+use using want was we what when which will with would you your
+""".split())
+
+# Longest suffix first; a suffix is stripped only if the remaining stem is long enough
+_SUFFIXES = [
+    ("ational", "ate"), ("ization", "ize"), ("ations", "ate"), ("ation", "ate"),
+    ("ingly", ""), ("ings", ""), ("ing", ""), ("ies", "y"), ("ied", "y"),
+    ("ers", ""), ("er", ""), ("ed", ""), ("ly", ""), ("es", ""), ("s", ""),
+]
+_UNDOUBLE_AFTER = {"ings", "ing", "ers", "er", "ed"}
+_MIN_STEM = {"ed": 4}
+
+
+def stem(token: str) -> str:
+    """Light Porter-style stemmer ("chatbots" -> "chatbot", "embeddings" -> "embed")."""
+    for suffix, replacement in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM.get(suffix, 3):
+            if suffix == "s" and token.endswith(("ss", "us", "is")):
+                break
+            token = token[:-len(suffix)] + replacement
+            if suffix in _UNDOUBLE_AFTER and token[-1] == token[-2] and token[-1] not in "lsz":
+                token = token[:-1]
+            break
+    if token.endswith("e") and len(token) > 3:
+        token = token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into stemmed, stop-word-free terms (camelCase aware)."""
+    terms = []
+    for token in _TOKEN.findall(_CAMEL_BOUNDARY.sub(" ", text or "").lower()):
+        if token not in STOP_WORDS and len(token) > 1:
+            terms.append(stem(token))
+    return terms
+
+
+class BM25Index:
+    """Inverted index with Okapi BM25 scoring."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[str] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.idf: Dict[str, float] = {}
+        self.average_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def add(self, doc_id: str, text: str):
+        """Index a document. Call :meth:`finalize` once all documents are added."""
+        doc_index = len(self.doc_ids)
+        terms = tokenize(text)
+        self.doc_ids.append(doc_id)
+        self.doc_lengths.append(len(terms))
+        for term, frequency in Counter(terms).items():
+            self.postings[term].append((doc_index, frequency))
+
+    def finalize(self) -> "BM25Index":
+        """Precompute IDF weights and the average document length."""
+        total = len(self.doc_ids)
+        self.average_length = sum(self.doc_lengths) / total if total else 0.0
+        self.idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+        self.postings = dict(self.postings)
+        return self
+
+    def search(self, query: str, limit: Optional[int] = 10,
+               where: Optional[Callable[[str], bool]] = None) -> List[Tuple[str, float, int]]:
+        """Rank documents for a query.
+
+        Returns ``(doc_id, score, matched_terms)`` tuples, best first; ties keep
+        index order. ``where`` filters candidate document ids.
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        matched: Dict[int, int] = defaultdict(int)
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf[term]
+            for doc_index, frequency in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_index] / (self.average_length or 1))
+                scores[doc_index] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+                matched[doc_index] += 1
+
+        candidates = [
+            (score, -doc_index) for doc_index, score in scores.items()
+            if where is None or where(self.doc_ids[doc_index])
+        ]
+        ranked = heapq.nlargest(limit, candidates) if limit is not None else sorted(candidates, reverse=True)
+        return [(self.doc_ids[-neg_index], score, matched[-neg_index]) for score, neg_index in ranked]
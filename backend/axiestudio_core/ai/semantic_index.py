@@ -0,0 +1,217 @@
+"""
+Semantic Retrieval Index
+
+Embeds component and starter-flow descriptions into one contiguous float32
+matrix per collection (rows L2-normalised), so a top-k cosine query is a
+single matrix-vector multiply.
+
+Embeddings come from a pluggable embedding function: any callable mapping a
+list of texts to an ``(n, dim)`` array. The default ``HashingEmbedder`` is
+local and deterministic (feature hashing over stemmed terms, term bigrams
+and character trigrams), so building and testing need no network or model
+download. Matrices are written next to the knowledge index cache as ``.npy``
+files and memory-mapped on load; they are rebuilt only when the documents or
+the embedder change.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .search_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the document texts or the on-disk layout change
+SEMANTIC_FORMAT_VERSION = 1
+
+EmbeddingFunction = Callable[[Sequence[str]], np.ndarray]
+
+
+class HashingEmbedder:
+    """Local bag-of-features embedding via signed feature hashing."""
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-v1-{dim}"
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                bucket = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if bucket & 0x80000000 else -1.0
+                vectors[row, bucket % self.dim] += sign * weight
+        return vectors
+
+    @staticmethod
+    def _features(text: str):
+        terms = tokenize(text)
+        for term in terms:
+            yield term, 1.0
+            padded = f"#{term}#"
+            for i in range(len(padded) - 2):
+                yield "c:" + padded[i:i + 3], 0.25
+        for first, second in zip(terms, terms[1:]):
+            yield f"b:{first} {second}", 0.5
+
+
+class SemanticIndex:
+    """Top-k cosine retrieval over one collection of documents."""
+
+    def __init__(self, ids: List[str], matrix: np.ndarray, embedder: EmbeddingFunction):
+        self.ids = ids
+        self.matrix = matrix
+        self.embedder = embedder
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, documents: Dict[str, str], embedder: Optional[EmbeddingFunction] = None,
+              cache_path: Optional[Path] = None) -> "SemanticIndex":
+        """Embed ``{id: text}`` documents, reusing a matching matrix at ``cache_path``."""
+        embedder = embedder or HashingEmbedder()
+        ids = list(documents)
+        fingerprint = cls._fingerprint(documents, embedder)
+
+        if cache_path is not None:
+            matrix = cls._load(Path(cache_path), fingerprint, len(ids))
+            if matrix is not None:
+                return cls(ids, matrix, embedder)
+
+        matrix = _normalize(np.asarray(embedder([documents[doc_id] for doc_id in ids]), dtype=np.float32))
+        if cache_path is not None:
+            matrix = cls._save(Path(cache_path), fingerprint, ids, matrix)
+        return cls(ids, matrix, embedder)
+
+    def search(self, query: str, k: int = 5,
+               where: Optional[Callable[[str], bool]] = None) -> List[Tuple[str, float]]:
+        """Return up to ``k`` ``(id, cosine)`` pairs, best first; ``where`` filters ids."""
+        if not self.ids or k <= 0:
+            return []
+
+        query_vector = _normalize(np.asarray(self.embedder([query]), dtype=np.float32))[0]
+        if not query_vector.any():
+            return []
+        scores = self.matrix @ query_vector
+
+        if where is not None:
+            allowed = np.fromiter((where(doc_id) for doc_id in self.ids), dtype=bool, count=len(self.ids))
+            scores = np.where(allowed, scores, -np.inf)
+
+        k = min(k, len(self.ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        # Stable sort keeps ties in index order
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.ids[i], float(scores[i])) for i in top if np.isfinite(scores[i]) and scores[i] > 0]
+
+    @staticmethod
+    def _fingerprint(documents: Dict[str, str], embedder: EmbeddingFunction) -> str:
+        digest = hashlib.md5()
+        name = getattr(embedder, "name", None) or getattr(embedder, "__qualname__", type(embedder).__name__)
+        digest.update(f"{SEMANTIC_FORMAT_VERSION}:{name}".encode("utf-8"))
+        for doc_id, text in documents.items():
+            digest.update(b"\0" + doc_id.encode("utf-8") + b"\0" + text.encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _load(path: Path, fingerprint: str, count: int) -> Optional[np.ndarray]:
+        """Memory-map a cached matrix if its sidecar fingerprint matches."""
+        try:
+            meta = json.loads(path.with_suffix(".json").read_text(encoding="utf-8"))
+            if meta.get("fingerprint") != fingerprint:
+                return None
+            matrix = np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        return matrix if matrix.shape[0] == count else None
+
+    @staticmethod
+    def _save(path: Path, fingerprint: str, ids: List[str], matrix: np.ndarray) -> np.ndarray:
+        """Write the matrix and its sidecar atomically, returning the memory-mapped copy."""
+        temp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            np.save(temp_path, matrix)
+            # Drop the old sidecar first so a half-written pair never validates
+            path.with_suffix(".json").unlink(missing_ok=True)
+            os.replace(temp_path, path)
+            path.with_suffix(".json").write_text(
+                json.dumps({"fingerprint": fingerprint, "ids": ids}), encoding="utf-8"
+            )
+            return np.load(path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not write semantic index {path}: {e}")
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+            return matrix
+
+
+class SemanticCatalog:
+    """Semantic indexes over the components and starter flows of a knowledge index.
+
+    Components are keyed by their component class name, flows by flow name.
+    """
+
+    def __init__(self, index, embedder: Optional[EmbeddingFunction] = None, use_cache: bool = True):
+        embedder = embedder or HashingEmbedder()
+        cache_path = index.cache_path if use_cache else None
+        self.components = SemanticIndex.build(
+            self.component_documents(index), embedder, _sibling(cache_path, "components")
+        )
+        self.flows = SemanticIndex.build(
+            self.flow_documents(index), embedder, _sibling(cache_path, "flows")
+        )
+
+    @staticmethod
+    def component_documents(index) -> Dict[str, str]:
+        """Text to embed per active (not deactivated) component class."""
+        documents = {}
+        for module in index.modules.values():
+            if (not module.component_class or not module.category
+                    or module.category.startswith('__') or module.category == "deactivated"):
+                continue
+            documents[module.component_class] = " ".join(filter(None, [
+                module.component_class,
+                module.display_name,
+                module.description or module.class_description,
+                module.category.replace("_", " ")
+            ]))
+        return documents
+
+    @staticmethod
+    def flow_documents(index) -> Dict[str, str]:
+        """Text to embed per starter flow."""
+        documents = {}
+        for document in index.flows.values():
+            node_types = dict.fromkeys(
+                node.get("data", {}).get("type", "")
+                for node in document.data.get("data", {}).get("nodes", [])
+            )
+            node_types.pop("note", None)
+            documents[document.name] = " ".join(filter(None, [
+                document.name, document.data.get("description", ""), *node_types
+            ]))
+        return documents
+
+
+def _sibling(cache_path: Optional[Path], collection: str) -> Optional[Path]:
+    """``knowledge_index.pickle`` -> ``knowledge_index.<collection>.npy``."""
+    if cache_path is None:
+        return None
+    return cache_path.with_name(f"{cache_path.stem}.{collection}.npy")
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
@@ -0,0 +1,56 @@
+"""
+Single-Flight Request Coalescing
+
+Concurrent callers asking for the same key await one in-flight coroutine and
+share its result, so a burst of identical generations costs one set of LLM
+calls instead of one per request.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """Coalesce concurrent async calls that share a key."""
+
+    def __init__(self):
+        self._inflight: Dict[str, "asyncio.Task"] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run ``factory()`` once per key at a time.
+
+        Returns ``(result, shared)`` where ``shared`` is True for callers that
+        joined an in-flight call instead of starting it. The underlying task is
+        shielded, so a cancelled caller never cancels the work other callers
+        are waiting on.
+        """
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get(key)
+
+        if task is not None and not task.done() and task.get_loop() is loop:
+            self.coalesced += 1
+            return await asyncio.shield(task), True
+
+        task = loop.create_task(factory())
+        self._inflight[key] = task
+        self.leaders += 1
+        task.add_done_callback(lambda done, key=key: self._forget(key, done))
+
+        return await asyncio.shield(task), False
+
+    def _forget(self, key: str, task: "asyncio.Task"):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved when every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """Get coalescing counters."""
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced
+        }
@@ -0,0 +1,162 @@
+"""
+Structured Completion Output
+
+Asks the model for JSON through function calling: the request forces a
+call to a function whose parameters are the JSON schema of the expected
+output, so the model emits arguments that match it instead of free text.
+Function calling is supported by every chat model the generators use
+(unlike ``response_format`` JSON schemas).
+
+The arguments (or the message content, when structured output is off or
+the model answered in text) are parsed with :mod:`.json_repair` and
+validated against the schema, so a truncated or fenced answer is salvaged
+and a malformed one is rejected before it reaches the flow builders.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .json_repair import parse_json_partial
+
+_NODE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "string"},
+        "type": {"type": "string"},
+        "display_name": {"type": ["string", "null"]},
+        "params": {"type": "object"}
+    },
+    "required": ["id", "type"]
+}
+
+_EDGE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "source": {"type": "string"},
+        "output": {"type": ["string", "null"]},
+        "target": {"type": "string"},
+        "input": {"type": ["string", "null"]}
+    },
+    "required": ["source", "output", "target", "input"]
+}
+
+# Flow skeleton (see ai.flow_skeleton)
+FLOW_SKELETON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": ["string", "null"]},
+        "description": {"type": ["string", "null"]},
+        "nodes": {"type": "array", "items": _NODE_SCHEMA},
+        "edges": {"type": "array", "items": _EDGE_SCHEMA}
+    },
+    "required": ["name", "description", "nodes", "edges"]
+}
+
+COMPONENT_LIST_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "components": {"type": "array", "items": {"type": "string"}, "description": "Component names in execution order"}
+    },
+    "required": ["components"]
+}
+
+# RFC 6902 operations against a flow edit view (see ai.flow_patch)
+FLOW_PATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "patch": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "op": {"type": "string", "enum": ["add", "remove", "replace", "move", "copy", "test"]},
+                    "path": {"type": "string"},
+                    "from": {"type": "string"},
+                    "value": {}
+                },
+                "required": ["op", "path"]
+            }
+        }
+    },
+    "required": ["patch"]
+}
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+    "null": type(None)
+}
+
+
+class SchemaError(ValueError):
+    """Raised when completion output does not match its schema."""
+
+
+@dataclass(frozen=True)
+class StructuredOutput:
+    """A function the model is made to call, and how to read its arguments."""
+    name: str
+    description: str
+    schema: Dict[str, Any]
+
+    def request(self) -> Dict[str, Any]:
+        """Completion request parameters forcing a call to this function."""
+        return {
+            "tools": [{"type": "function", "function": {
+                "name": self.name, "description": self.description, "parameters": self.schema}}],
+            "tool_choice": {"type": "function", "function": {"name": self.name}}
+        }
+
+    def parse(self, text: Optional[str]) -> Tuple[Any, bool]:
+        """Repaired and validated output, and whether it was complete (not truncated)."""
+        value, complete = parse_json_partial(text)
+        # Truncation may have cut required keys; what is there must still be well-formed
+        validate(value, self.schema, required=complete)
+        return value, complete
+
+
+CUSTOMIZED_FLOW = StructuredOutput("customized_flow", "Return the customized flow skeleton", FLOW_SKELETON_SCHEMA)
+FLOW_PATCH = StructuredOutput("flow_patch", "Return the JSON patch that edits the flow", FLOW_PATCH_SCHEMA)
+SELECTED_COMPONENTS = StructuredOutput("selected_components", "Return the selected components", COMPONENT_LIST_SCHEMA)
+
+
+def completion_text(message: Any) -> Optional[str]:
+    """The function call arguments of a completion message, else its content."""
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        return tool_calls[0].function.arguments
+    return message.content
+
+
+def validate(value: Any, schema: Dict[str, Any], required: bool = True):
+    """Check ``value`` against the subset of JSON schema used here (type, properties, required, items)."""
+    errors = _errors(value, schema, "$", required)
+    if errors:
+        raise SchemaError("; ".join(errors[:5]))
+
+
+def _errors(value: Any, schema: Dict[str, Any], path: str, required: bool) -> List[str]:
+    expected = schema.get("type")
+    if expected and not any(_is_type(value, name) for name in ([expected] if isinstance(expected, str) else expected)):
+        return [f"{path}: expected {expected}, got {type(value).__name__}"]
+
+    errors = []
+    if isinstance(value, dict):
+        if required:
+            errors += [f"{path}: missing {key}" for key in schema.get("required", []) if key not in value]
+        for key, subschema in schema.get("properties", {}).items():
+            if key in value:
+                errors += _errors(value[key], subschema, f"{path}.{key}", required)
+    elif isinstance(value, list) and "items" in schema:
+        for index, item in enumerate(value):
+            errors += _errors(item, schema["items"], f"{path}[{index}]", required)
+    return errors
+
+
+def _is_type(value: Any, name: str) -> bool:
+    # bool is an int subclass, but not a JSON number
+    return isinstance(value, _TYPES[name]) and not (isinstance(value, bool) and name in ("number", "integer"))
@@ -8,27 +8,62 @@ for INSTANT flow generation. No processing overhead - pure AI power!
 import json
 import os
 from typing import Dict, List, Any, Optional
-from openai import OpenAI
 from dotenv import load_dotenv
 
-from .ai_knowledge_processor import ai_knowledge_processor
-from .template_flow_generator import template_generator
+from .ai_knowledge_processor import AIKnowledgeProcessor, get_ai_knowledge_processor
+from .flow_assembler import FlowAssembler, NodeCatalog
+from .generation_cache import GenerationCache, get_generation_cache, make_cache_key, mark_degraded
+from .intent_classifier import DEFAULT_THRESHOLD, get_intent_classifier
+from .json_repair import parse_json
+from .llm_client import get_async_openai_client, get_openai_client
+from .lazy_instance import LazyInstance
+from .model_policy import COMPONENT_SELECTION, INTENT, ModelPolicy
+from .structured_output import SELECTED_COMPONENTS, completion_text
+from .template_flow_generator import TemplateFlowGenerator, get_template_generator
 
 # Load environment variables
 from pathlib import Path
 config_path = Path(__file__).parent.parent.parent / "config" / ".env"
 load_dotenv(config_path)
 
+# Capabilities reported for use cases recognised by the local intent classifier
+USE_CASE_CAPABILITIES = {
+    'basic_chat': ['chat'],
+    'document_qa': ['document_processing', 'embeddings'],
+    'agent_tools': ['agents', 'search'],
+    'rag_system': ['embeddings', 'rag'],
+    'data_processing': ['document_processing'],
+}
+
 class SuperAIFlowGenerator:
     """Ultra-efficient AI flow generator with pre-processed data."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None,
+                 processor: Optional[AIKnowledgeProcessor] = None,
+                 template_generator: Optional[TemplateFlowGenerator] = None,
+                 structured_output: bool = True,
+                 intent_threshold: float = DEFAULT_THRESHOLD,
+                 model_policy: Optional[ModelPolicy] = None,
+                 generation_cache: Optional[GenerationCache] = None):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key required. Set OPENAI_API_KEY environment variable.")
         
-        self.client = OpenAI(api_key=self.api_key)
-        self.processor = ai_knowledge_processor
+        self.client = get_openai_client(self.api_key)
+        self.async_client = get_async_openai_client(self.api_key)
+        # Model, latency and token budgets per pipeline stage
+        self.models = model_policy or ModelPolicy()
+        self.cache = generation_cache or get_generation_cache()
+        self.processor = processor or get_ai_knowledge_processor()
+        self.template_generator = template_generator or get_template_generator()
+        self.semantic_catalog = self.template_generator.index.semantic()
+        # Flows for LLM-selected components are assembled locally from starter-project nodes
+        self.assembler = FlowAssembler(NodeCatalog.from_index(self.template_generator.index))
+        # Components and flows are requested through function calling (schema-shaped arguments)
+        self.structured_output = structured_output
+        # Use cases the local classifier is sure about skip the LLM round trip
+        self.intent_classifier = get_intent_classifier()
+        self.intent_threshold = intent_threshold
         
         # Pre-load optimized data for instant access
         try:
@@ -49,9 +84,18 @@ class SuperAIFlowGenerator:
 
         print(f"🚀 Super AI Generator ready: {len(self.ai_components)} components, {len(self.ai_flows)} flows")
     
-    def generate_flow_super_fast(self, user_description: str) -> Dict[str, Any]:
+    def generate_flow_super_fast(self, user_description: str, use_cache: bool = True) -> Dict[str, Any]:
         """Generate flow with MAXIMUM EFFICIENCY using pre-processed data."""
         
+        cache_key = self._cache_key(user_description) if use_cache else None
+        cached = self.cache.get(cache_key) if cache_key else None
+        if cached:
+            print("⚡ Served from generation cache")
+            return cached
+        
+        if not self.models.available:
+            return self._degraded_flow(user_description)
+        
         print("⚡ Super AI Generation Starting...")
         
         # Step 1: INSTANT intent analysis with optimized prompt
@@ -62,22 +106,126 @@ class SuperAIFlowGenerator:
         components = self._select_components_super_fast(user_description, intent)
         print(f"🔧 Selected {len(components)} components")
         
-        # Step 3: Use template-based generation for guaranteed compatibility
+        return self._store(cache_key, self._generate_flow(user_description, intent, components), intent)
+    
+    async def agenerate_flow_super_fast(self, user_description: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Async variant of :meth:`generate_flow_super_fast` for use inside the event loop."""
+        
+        cache_key = self._cache_key(user_description) if use_cache else None
+        cached = self.cache.get(cache_key) if cache_key else None
+        if cached:
+            print("⚡ Served from generation cache")
+            return cached
+        
+        if not self.models.available:
+            return self._degraded_flow(user_description)
+        
+        print("⚡ Super AI Generation Starting...")
+        
+        intent = await self._aanalyze_intent_super_fast(user_description)
+        print(f"🎯 Intent: {intent.get('primary_use_case', 'general')}")
+        
+        components = await self._aselect_components_super_fast(user_description, intent)
+        print(f"🔧 Selected {len(components)} components")
+        
+        return self._store(cache_key, self._generate_flow(user_description, intent, components), intent)
+    
+    def _cache_key(self, user_description: str) -> str:
+        return make_cache_key("super_ai", user_description, model=self.models.signature(),
+                              template_version=self.template_generator.version)
+    
+    def _store(self, cache_key: Optional[str], flow_json: Dict[str, Any], intent: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache the flow, unless a step fell back because the LLM failed (then it is marked degraded)."""
+        if intent.get("degraded"):
+            return mark_degraded(flow_json)
+        if cache_key:
+            self.cache.set(cache_key, flow_json)
+        return flow_json
+    
+    def _degraded_flow(self, user_description: str) -> Dict[str, Any]:
+        """Template flow while the LLM circuit is open (not cached, the provider will recover)."""
+        print("⚠️ LLM provider degraded, generating from templates")
+        return mark_degraded(self._generate_from_template(user_description, self._fallback_intent_analysis(user_description)))
+    
+    def _generate_from_template(self, user_description: str, intent: Dict[str, Any]) -> Dict[str, Any]:
+        """Use template-based generation for guaranteed compatibility."""
         use_case = intent.get('primary_use_case', 'basic_chat')
-        flow_json = template_generator.generate_flow(user_description, use_case)
+        flow_json = self.template_generator.generate_flow(user_description, use_case)
         print(f"✅ Generated flow using {use_case} template")
         
         return flow_json
     
+    def _complete(self, stage: str, prompt: str, **params: Any) -> str:
+        """Run a single-message chat completion on the stage's model and return the content (or function call arguments)."""
+        response = self.models.complete(
+            self.client, stage,
+            messages=[{"role": "user", "content": prompt}],
+            **params
+        )
+        return completion_text(response.choices[0].message)
+    
+    async def _acomplete(self, stage: str, prompt: str, **params: Any) -> str:
+        """Async variant of :meth:`_complete` on the shared pooled client."""
+        response = await self.models.acomplete(
+            self.async_client, stage,
+            messages=[{"role": "user", "content": prompt}],
+            **params
+        )
+        return completion_text(response.choices[0].message)
+    
+    def _structured(self, output) -> Dict[str, Any]:
+        """Function-calling request parameters for ``output``, if structured output is on."""
+        return output.request() if self.structured_output else {}
+    
     def _analyze_intent_super_fast(self, user_description: str) -> Dict[str, Any]:
-        """Ultra-fast intent analysis using optimized prompts."""
+        """Ultra-fast intent analysis: the local classifier, else the LLM with an optimized prompt."""
+        
+        intent = self._local_intent(user_description)
+        if intent:
+            return intent
+        
+        try:
+            content = self._complete(INTENT, self._intent_prompt(user_description), temperature=0.1, max_tokens=500)
+            return parse_json(content)
+            
+        except Exception:
+            # Ultra-fast fallback using keyword matching
+            return dict(self._fallback_intent_analysis(user_description), degraded=True)
+    
+    async def _aanalyze_intent_super_fast(self, user_description: str) -> Dict[str, Any]:
+        """Async variant of :meth:`_analyze_intent_super_fast`."""
+        
+        intent = self._local_intent(user_description)
+        if intent:
+            return intent
+        
+        try:
+            content = await self._acomplete(INTENT, self._intent_prompt(user_description), temperature=0.1, max_tokens=500)
+            return parse_json(content)
+            
+        except Exception:
+            return dict(self._fallback_intent_analysis(user_description), degraded=True)
+    
+    def _local_intent(self, user_description: str) -> Optional[Dict[str, Any]]:
+        """Use case from the local classifier, or None if it is not confident enough."""
+        
+        if self.intent_classifier is None:
+            return None
+        use_case = self.intent_classifier.classify(user_description, self.intent_threshold,
+                                                   labels=list(self.processor.component_selection_rules))
+        if use_case is None:
+            return None
+        return {"primary_use_case": use_case, "capabilities": USE_CASE_CAPABILITIES.get(use_case, []),
+                "complexity": "simple", "source": "local"}
+    
+    def _intent_prompt(self, user_description: str) -> str:
+        """Create simple prompt for intent analysis."""
         
         # Pre-defined use cases for instant matching
         use_cases = list(self.processor.component_selection_rules.keys())
         capabilities = ['chat', 'document_processing', 'search', 'embeddings', 'agents', 'rag']
         
-        # Create simple prompt for intent analysis
-        prompt = f"""
+        return f"""
 You are an expert AxieStudio flow architect. Analyze this user request:
 
 User request: "{user_description}"
@@ -92,24 +240,51 @@ Respond with JSON containing:
     "complexity": "simple/medium/complex"
 }}
 """
+    
+    def _select_components_super_fast(self, user_description: str, intent: Dict[str, Any]) -> List[str]:
+        """Ultra-fast component selection using pre-processed rules."""
+        
+        rule_components = self._rule_components(intent)
+        if rule_components is not None:
+            return rule_components
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.1,
-                max_tokens=500
-            )
+            content = self._complete(COMPONENT_SELECTION, self._component_selection_prompt(user_description, intent), temperature=0.2,
+                                     max_tokens=800, **self._structured(SELECTED_COMPONENTS))
+            return self._parse_components(content)
             
-            content = response.choices[0].message.content
-            return json.loads(content)
+        except Exception:
+            # Fallback to basic chat
+            intent["degraded"] = True
+            return self.component_selection_rules['basic_chat']
+    
+    async def _aselect_components_super_fast(self, user_description: str, intent: Dict[str, Any]) -> List[str]:
+        """Async variant of :meth:`_select_components_super_fast`."""
+        
+        rule_components = self._rule_components(intent)
+        if rule_components is not None:
+            return rule_components
+        
+        try:
+            content = await self._acomplete(COMPONENT_SELECTION, self._component_selection_prompt(user_description, intent), temperature=0.2,
+                                            max_tokens=800, **self._structured(SELECTED_COMPONENTS))
+            return self._parse_components(content)
             
         except Exception:
-            # Ultra-fast fallback using keyword matching
-            return self._fallback_intent_analysis(user_description)
+            intent["degraded"] = True
+            return self.component_selection_rules['basic_chat']
     
-    def _select_components_super_fast(self, user_description: str, intent: Dict[str, Any]) -> List[str]:
-        """Ultra-fast component selection using pre-processed rules."""
+    def _parse_components(self, content: str) -> List[str]:
+        """Component names from function call arguments or a JSON array answer."""
+        
+        if self.structured_output:
+            components, _ = SELECTED_COMPONENTS.parse(content)
+            return components.get("components", [])
+        components = parse_json(content)
+        return components if isinstance(components, list) else []
+    
+    def _rule_components(self, intent: Dict[str, Any]) -> Optional[List[str]]:
+        """Return the pre-defined component rule for the intent, if any."""
         
         primary_use_case = intent.get('primary_use_case', 'basic_chat')
         
@@ -119,12 +294,16 @@ Respond with JSON containing:
             print(f"📋 Using pre-defined rule for {primary_use_case}")
             return components
         
-        # Use AI for custom component selection with optimized data
-        prompt = f"""
+        return None
+    
+    def _component_selection_prompt(self, user_description: str, intent: Dict[str, Any]) -> str:
+        """Create prompt for AI component selection with optimized data."""
+        
+        return f"""
 You are selecting optimal AxieStudio components based on this analysis:
 
 Intent: {json.dumps(intent)}
-Available components: {list(self.ai_components.keys())[:20]}
+Available components: {self._relevant_components(user_description, intent)}
 
 Select components in execution order. Rules:
 1. Always start with input component (ChatInput, TextInput, etc.)
@@ -134,71 +313,33 @@ Select components in execution order. Rules:
 
 Respond with JSON array of component names in order.
 """
+    
+    def _relevant_components(self, user_description: str, intent: Dict[str, Any], limit: int = 20) -> List[str]:
+        """The components closest to the request, always including chat input/output."""
         
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.2,
-                max_tokens=800
-            )
-            
-            content = response.choices[0].message.content
-            components = json.loads(content)
-            return components if isinstance(components, list) else []
-            
-        except Exception:
-            # Fallback to basic chat
-            return self.component_selection_rules['basic_chat']
+        query = " ".join([user_description, *map(str, intent.get('capabilities') or [])])
+        matches = self.semantic_catalog.components.search(query, k=limit, where=lambda name: name in self.ai_components)
+        names = [name for name in ('ChatInput', 'ChatOutput') if name in self.ai_components]
+        names += [name for name, _ in matches if name not in names]
+        return names[:limit]
+    
+    def _generate_flow(self, user_description: str, intent: Dict[str, Any], components: List[str]) -> Dict[str, Any]:
+        """Template flow for use cases with a pre-defined rule, otherwise a flow assembled from the components."""
+        
+        if intent.get('primary_use_case', 'basic_chat') in self.component_selection_rules:
+            return self._generate_from_template(user_description, intent)
+        return self._generate_flow_super_fast(user_description, components)
     
     def _generate_flow_super_fast(self, user_description: str, components: List[str]) -> Dict[str, Any]:
-        """Ultra-fast flow generation using optimized templates."""
-        
-        # Get component details for AI
-        component_details = []
-        for comp_name in components:
-            if comp_name in self.ai_components:
-                comp_data = self.ai_components[comp_name]
-                component_details.append({
-                    "name": comp_name,
-                    "description": comp_data["description"],
-                    "category": comp_data["category"],
-                    "connections": comp_data["connections"]
-                })
-        
-        # Create flow generation prompt
-        prompt = f"""
-Create complete AxieStudio flow JSON with these components: {components}
-
-Requirements:
-- Each component needs unique ID and proper positioning
-- Create edges connecting compatible outputs to inputs
-- Follow AxieStudio JSON format exactly
-- Include all necessary template fields
-
-Component details: {json.dumps(component_details)}
-
-Generate complete flow JSON structure with "data" containing "nodes" and "edges".
-"""
+        """Assemble the flow locally: real node templates, type-matched edges and layout, no LLM call."""
         
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.1,
-                max_tokens=2000
-            )
-            
-            content = response.choices[0].message.content
-            flow_structure = json.loads(content)
-            
-            # Create final AxieStudio-compatible JSON
-            return self._create_final_flow_json(flow_structure, user_description)
-            
-        except Exception as e:
-            print(f"⚠️ AI generation failed: {e}")
-            # Ultra-fast fallback using templates
+        flow_structure = self.assembler.assemble(components, seed=user_description)
+        if len(flow_structure["nodes"]) < 2:
+            print(f"⚠️ Could not assemble a flow from {components}")
             return self._fallback_flow_generation(components, user_description)
+        
+        print(f"✅ Assembled {len(flow_structure['nodes'])} nodes, {len(flow_structure['edges'])} edges")
+        return self._create_final_flow_json(flow_structure, user_description)
     
     def _create_final_flow_json(self, flow_structure: Dict[str, Any], user_description: str) -> Dict[str, Any]:
         """Create final AxieStudio-compatible flow JSON."""
@@ -214,7 +355,7 @@ Generate complete flow JSON structure with "data" containing "nodes" and "edges"
             "last_tested_version": "1.0.0",
             "metadata": {
                 "generated_by": "Super AI Flow Generator",
-                "generation_method": "OpenAI GPT-4 + Optimized Data",
+                "generation_method": f"OpenAI {self.models.model(COMPONENT_SELECTION)} component selection + local assembly",
                 "user_description": user_description,
                 "optimization_level": "MAXIMUM"
             }
@@ -246,7 +387,7 @@ Generate complete flow JSON structure with "data" containing "nodes" and "edges"
             use_case = "document_qa"
 
         # Use template generator
-        return template_generator.generate_flow(user_description, use_case)
+        return self.template_generator.generate_flow(user_description, use_case)
 
     def _create_minimal_flow(self, user_description: str) -> Dict[str, Any]:
         """Create minimal working AxieStudio flow."""
@@ -268,7 +409,7 @@ Generate complete flow JSON structure with "data" containing "nodes" and "edges"
             "flow_templates": len(self.ai_flows),
             "pre_defined_rules": len(self.processor.component_selection_rules),
             "optimization_level": "MAXIMUM",
-            "ai_model": "OpenAI GPT-4",
+            "ai_model": f"OpenAI {self.models.model(COMPONENT_SELECTION)}",
             "processing_mode": "PRE-OPTIMIZED",
             "capabilities": [
                 "instant_intent_analysis",
@@ -279,5 +420,17 @@ Generate complete flow JSON structure with "data" containing "nodes" and "edges"
             ]
         }
 
-# Global instance
-super_ai_generator = SuperAIFlowGenerator()
+# Global instance (built on first use, not at import)
+_super_ai_generator = LazyInstance(SuperAIFlowGenerator)
+
+
+def get_super_ai_generator() -> SuperAIFlowGenerator:
+    """Get the shared SuperAIFlowGenerator, building it on first use."""
+    return _super_ai_generator.get()
+
+
+def __getattr__(name):
+    # Keeps ``from .super_ai_generator import super_ai_generator`` working for existing callers
+    if name == "super_ai_generator":
+        return get_super_ai_generator()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,42 +3,39 @@ Template-based AxieStudio Flow Generator
 Uses real AxieStudio JSON templates to generate compatible flows.
 """
 
-import json
-import os
-from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import uuid
 import random
 
+from .knowledge_index import KnowledgeIndex, get_knowledge_index
+from .lazy_instance import LazyInstance
+
 class TemplateFlowGenerator:
     """Generate AxieStudio flows using real templates."""
     
-    def __init__(self):
-        self.templates_dir = Path("data/axiestudio/axiestudio_initial_setup/starter_projects")
+    def __init__(self, index: Optional[KnowledgeIndex] = None):
+        self.index = index or get_knowledge_index()
+        self.templates_dir = self.index.starter_projects_dir
         self.templates = self._load_templates()
+        self.version = self.index.flows_version
         
     def _load_templates(self) -> Dict[str, Dict[str, Any]]:
-        """Load all available AxieStudio templates."""
-        templates = {}
+        """Load all available AxieStudio templates (shared with the knowledge index, read-only)."""
+        templates = {stem: document.data for stem, document in self.index.flows.items()}
         
-        if not self.templates_dir.exists():
-            print(f"⚠️ Templates directory not found: {self.templates_dir}")
-            return templates
-            
-        for json_file in self.templates_dir.glob("*.json"):
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    template = json.load(f)
-                    templates[json_file.stem] = template
-                    print(f"✅ Loaded template: {json_file.stem}")
-            except Exception as e:
-                print(f"⚠️ Failed to load {json_file}: {e}")
+        if not templates:
+            print(f"⚠️ No templates found in {self.templates_dir}")
                 
         print(f"📁 Loaded {len(templates)} AxieStudio templates")
         return templates
     
     def generate_flow(self, user_description: str, use_case: str = "basic_chat") -> Dict[str, Any]:
-        """Generate flow using appropriate template."""
+        """Generate flow using appropriate template.
+        
+        Copy-on-write: only the overlaid top-level fields are new; ``data``
+        and every other subtree is shared with the read-only template, so
+        copy before mutating anything nested.
+        """
         
         # Select best template based on use case
         template_name = self._select_template(use_case)
@@ -51,25 +48,26 @@ class TemplateFlowGenerator:
             print("❌ No templates available, creating minimal flow")
             return self._create_minimal_flow(user_description)
             
-        # Clone and customize template
-        template = json.loads(json.dumps(self.templates[template_name]))
+        # Overlay the customized fields on a shallow copy of the template
+        template = self.templates[template_name]
+        flow = dict(template)
         
-        # Customize template
-        template["description"] = f"AI generated flow: {user_description}"
-        template["name"] = f"AI Flow - {user_description[:50]}..."
+        flow["description"] = f"AI generated flow: {user_description}"
+        flow["name"] = f"AI Flow - {user_description[:50]}..."
         
         # Update metadata if present
         if "metadata" in template:
-            template["metadata"]["generated_by"] = "AxieStudio AI Flow Generator"
-            template["metadata"]["user_description"] = user_description
+            flow["metadata"] = dict(template["metadata"],
+                                    generated_by="AxieStudio AI Flow Generator",
+                                    user_description=user_description)
         else:
-            template["metadata"] = {
+            flow["metadata"] = {
                 "generated_by": "AxieStudio AI Flow Generator",
                 "user_description": user_description,
                 "template_used": template_name
             }
             
-        return template
+        return flow
     
     def _select_template(self, use_case: str) -> str:
         """Select appropriate template based on use case."""
@@ -124,5 +122,17 @@ class TemplateFlowGenerator:
                           for node in template.get("data", {}).get("nodes", [])]
         }
 
-# Global instance
-template_generator = TemplateFlowGenerator()
+# Global instance (built on first use, not at import)
+_template_generator = LazyInstance(TemplateFlowGenerator)
+
+
+def get_template_generator() -> TemplateFlowGenerator:
+    """Get the shared TemplateFlowGenerator, building it on first use."""
+    return _template_generator.get()
+
+
+def __getattr__(name):
+    # Keeps ``from .template_flow_generator import template_generator`` working for existing callers
+    if name == "template_generator":
+        return get_template_generator()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,228 @@
+"""
+Component Wiring Index
+
+Precomputed answers to "what can connect to X", built in one pass over the
+starter projects:
+
+- A typed bipartite index between output handles and input handles. Each
+  type maps to the output handles that produce it and to the input handles
+  (``input_types``) that accept it. Every component's compatible targets
+  and sources are resolved when the index is built. A lookup is then a
+  dict access.
+- Co-occurrence counts as a sparse symmetric matrix in dict-of-keys form.
+  Only component pairs that share a flow are stored.
+- How often each concrete connection (source output -> target field)
+  appears in the starter projects. Connections are ranked by this count,
+  then by co-occurrence, then by name.
+
+Components are identified by their starter-project node type
+(``ChatInput``, ``LanguageModelComponent`` ...). Types and fields come from
+real node templates; the regex-extracted metadata of the component modules
+is too coarse for wiring. Like the flow assembler, only visible,
+non-advanced input fields are wiring targets.
+"""
+
+import logging
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SUGGESTIONS = 10
+
+
+@dataclass(frozen=True)
+class Connection:
+    """One possible edge: ``source.output`` -> ``target.field``."""
+    source: str
+    output: str
+    target: str
+    field: str
+    types: Tuple[str, ...]  # Types the output and the input have in common
+    observed: int = 0  # Times this edge appears in the starter projects
+
+
+def node_templates(flows: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+    """One real node per component type from flow documents (first occurrence wins)."""
+    templates = {}
+    for document in flows:
+        for node in document.data.get("data", {}).get("nodes", []):
+            node_type = node.get("data", {}).get("type")
+            if node.get("type") == "genericNode" and node_type and "node" in node["data"]:
+                templates.setdefault(node_type, node)
+    return templates
+
+
+def _node_type(node: Dict[str, Any]) -> Optional[str]:
+    """The node's component type, else the prefix of its id (``ChatInput-SzjnT``)."""
+    data = node.get("data", {})
+    if data.get("type"):
+        return data["type"]
+    node_id = data.get("id") or node.get("id") or ""
+    return node_id.split("-")[0] or None
+
+
+class WiringIndex:
+    """Type-compatibility graph and co-occurrence counts over the starter-project components."""
+
+    def __init__(self, templates: Dict[str, Dict[str, Any]], flows: Iterable[Dict[str, Any]] = ()):
+        # component -> [(output name, types)] and [(field name, input types)]
+        self.outputs: Dict[str, List[Tuple[str, Tuple[str, ...]]]] = {}
+        self.inputs: Dict[str, List[Tuple[str, Tuple[str, ...]]]] = {}
+        self.list_inputs: Dict[str, Set[str]] = {}  # Fields that take several connections
+        # type -> handles producing / accepting it (the bipartite index)
+        self.producers: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+        self.acceptors: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+        # Sparse symmetric co-occurrence matrix: component -> {component: flows sharing both}
+        self.cooccurrence: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.flow_counts: Counter = Counter()
+        self.edge_counts: Counter = Counter()  # (source, output, target, field) -> count
+
+        for node_type, node in sorted(templates.items()):
+            self._add_template(node_type, node["data"]["node"])
+        for flow in flows:
+            self._add_flow(flow)
+
+        self._targets = {component: self._resolve(component, outgoing=True) for component in self.outputs}
+        self._sources = {component: self._resolve(component, outgoing=False) for component in self.inputs}
+        self._related = {
+            component: [other for other, _ in sorted(row.items(), key=lambda item: (-item[1], item[0]))]
+            for component, row in self.cooccurrence.items()
+        }
+
+        logger.info(
+            f"🔗 Wiring index ready: {len(self.outputs)} components, {len(self.producers)} types, "
+            f"{sum(len(row) for row in self.cooccurrence.values()) // 2} co-occurring pairs"
+        )
+
+    @classmethod
+    def from_index(cls, index) -> "WiringIndex":
+        documents = list(index.flows.values())
+        return cls(node_templates(documents), (document.data for document in documents))
+
+    def _add_template(self, node_type: str, node: Dict[str, Any]):
+        outputs = []
+        for output in node.get("outputs", []):
+            if output.get("name") and output.get("types"):
+                types = tuple(output["types"])
+                outputs.append((output["name"], types))
+                for type_name in types:
+                    self.producers[type_name].append((node_type, output["name"]))
+
+        inputs = []
+        list_inputs = set()
+        for field_name, field in node.get("template", {}).items():
+            if (isinstance(field, dict) and field.get("input_types") and field.get("show", True)
+                    and not field.get("advanced")):
+                types = tuple(field["input_types"])
+                inputs.append((field_name, types))
+                if field.get("list"):
+                    list_inputs.add(field_name)
+                for type_name in types:
+                    self.acceptors[type_name].append((node_type, field_name))
+
+        self.outputs[node_type] = outputs
+        self.inputs[node_type] = inputs
+        self.list_inputs[node_type] = list_inputs
+
+    def _add_flow(self, flow: Dict[str, Any]):
+        data = flow.get("data", {})
+        # Notes and other canvas decorations are not components
+        node_types = {node.get("id"): _node_type(node) for node in data.get("nodes", [])
+                      if node.get("type", "genericNode") == "genericNode"}
+
+        used = sorted({node_type for node_type in node_types.values() if node_type})
+        for position, first in enumerate(used):
+            self.flow_counts[first] += 1
+            for second in used[position + 1:]:
+                count = self.cooccurrence[first].get(second, 0) + 1
+                self.cooccurrence[first][second] = count
+                self.cooccurrence[second][first] = count
+
+        for edge in data.get("edges", []):
+            handles = edge.get("data", {})
+            source, target = node_types.get(edge.get("source")), node_types.get(edge.get("target"))
+            output = handles.get("sourceHandle", {}).get("name")
+            field = handles.get("targetHandle", {}).get("fieldName")
+            if source and target and output and field:
+                self.edge_counts[(source, output, target, field)] += 1
+
+    def _resolve(self, component: str, outgoing: bool) -> List[Connection]:
+        """Every connection out of (or into) ``component``, best first."""
+        found: Dict[Tuple[str, str, str, str], Set[str]] = defaultdict(set)
+        if outgoing:
+            for output, types in self.outputs[component]:
+                for type_name in types:
+                    for target, field in self.acceptors.get(type_name, ()):
+                        found[(component, output, target, field)].add(type_name)
+        else:
+            for field, types in self.inputs[component]:
+                for type_name in types:
+                    for source, output in self.producers.get(type_name, ()):
+                        found[(source, output, component, field)].add(type_name)
+
+        connections = [Connection(*key, types=tuple(sorted(types)), observed=self.edge_counts[key])
+                       for key, types in found.items()]
+        connections.sort(key=lambda connection: (
+            -connection.observed,
+            -self.cooccurrence_count(connection.source, connection.target),
+            connection.target if outgoing else connection.source,
+            connection.output,
+            connection.field,
+        ))
+        return connections
+
+    def __contains__(self, component: str) -> bool:
+        return component in self.outputs
+
+    def __len__(self) -> int:
+        return len(self.outputs)
+
+    def targets(self, component: str) -> List[Connection]:
+        """Inputs ``component``'s outputs can feed, best first."""
+        return self._targets.get(component, [])
+
+    def sources(self, component: str) -> List[Connection]:
+        """Outputs that can feed ``component``'s inputs, best first."""
+        return self._sources.get(component, [])
+
+    def cooccurrence_count(self, first: str, second: str) -> int:
+        """Number of starter projects using both components."""
+        return self.cooccurrence.get(first, {}).get(second, 0)
+
+    def related(self, component: str, limit: Optional[int] = None) -> List[str]:
+        """Components used in the same flows as ``component``, most frequent first."""
+        related = self._related.get(component, [])
+        return related if limit is None else related[:limit]
+
+    def connectable(self, component: str, limit: int = DEFAULT_SUGGESTIONS) -> List[str]:
+        """Distinct components ``component`` can be wired to in either direction, best first."""
+        names: Dict[str, None] = {}
+        for connection in self.targets(component):
+            names.setdefault(connection.target)
+        for connection in self.sources(component):
+            names.setdefault(connection.source)
+        names.pop(component, None)
+        return list(names)[:limit]
+
+    def suggest(self, component: str, limit: int = DEFAULT_SUGGESTIONS) -> Dict[str, Any]:
+        """Wiring suggestions for ``component``: what it feeds, what feeds it, what it is used with."""
+        return {
+            "component": component,
+            "known": component in self,
+            "feeds": [asdict(connection) for connection in self.targets(component)[:limit]],
+            "fed_by": [asdict(connection) for connection in self.sources(component)[:limit]],
+            "used_with": [
+                {"component": other, "flows": self.cooccurrence_count(component, other)}
+                for other in self.related(component, limit)
+            ],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "components": len(self.outputs),
+            "types": len(set(self.producers) | set(self.acceptors)),
+            "cooccurring_pairs": sum(len(row) for row in self.cooccurrence.values()) // 2,
+            "observed_edges": len(self.edge_counts),
+        }
@@ -0,0 +1,3 @@
+"""
+Flow generation benchmarks (``python -m benchmarks.run --help``)
+"""
@@ -0,0 +1,183 @@
+"""
+Local OpenAI stand-in for benchmarks
+
+Serves ``POST /v1/chat/completions`` (plain, streamed and function
+calling) with canned but well-formed answers for every prompt the
+generators send, after a configurable latency with Gaussian jitter. Each
+request is classified by pipeline stage and its prompt tokens are
+recorded:
+
+    GET  /stats        {"chat_intent": {"requests": 12, "prompt_tokens": [...]}, ...}
+    POST /stats/reset
+
+Run standalone with ``python -m benchmarks.fake_openai --port 8765`` and
+point a generator at it with ``OPENAI_BASE_URL=http://127.0.0.1:8765/v1``.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+# Add axiestudio_core to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "axiestudio_core"))
+
+from ai.prompt_builder import count_tokens
+
+# Prompt markers -> stage, first match wins
+STAGES = [
+    ("TEMPLATE FLOW (skeleton", "chat_customize"),
+    ("CURRENT FLOW (edit view", "chat_edit"),
+    ("Analyze the user's message to understand their intent", "chat_intent"),
+    ("friendly AxieStudio AI assistant", "chat_reply"),
+    ('"primary_use_case"', "super_intent"),
+    ("JSON array of component names", "super_components"),
+]
+
+FLOW_TYPES = {"rag": ("document", "pdf", "rag", "knowledge"), "agent": ("agent", "tool", "search", "research")}
+
+
+def classify(prompt: str) -> str:
+    for marker, stage in STAGES:
+        if marker in prompt:
+            return stage
+    return "other"
+
+
+def _user_request(prompt: str) -> str:
+    match = re.search(r'(?:User request|User message|USER REQUEST): "(.*)"', prompt)
+    return (match.group(1) if match else prompt).lower()
+
+
+def _flow_type(prompt: str) -> str:
+    request = _user_request(prompt)
+    for flow_type, keywords in FLOW_TYPES.items():
+        if any(keyword in request for keyword in keywords):
+            return flow_type
+    return "chat"
+
+
+def answer(stage: str, prompt: str, structured: bool = False) -> str:
+    """A plausible completion (or function call arguments, if ``structured``) for the stage."""
+    if stage == "chat_intent":
+        return json.dumps({"wants_flow": True, "flow_type": _flow_type(prompt), "complexity": "simple",
+                           "specific_components": [], "clarification_needed": False,
+                           "clarification_questions": []})
+    if stage == "chat_customize":
+        # Echo the template skeleton back, renamed
+        lines = prompt.split("\n")
+        header = next(i for i, line in enumerate(lines) if line.startswith("TEMPLATE FLOW"))
+        skeleton = json.loads(lines[header + 1])
+        skeleton["name"] = f"Custom {skeleton.get('name')}"
+        return json.dumps(skeleton)
+    if stage == "chat_edit":
+        return json.dumps({"patch": [{"op": "replace", "path": "/name", "value": "Edited flow"}]})
+    if stage == "super_intent":
+        use_cases = re.search(r"Available use cases: (.*)", prompt)
+        request = _user_request(prompt)
+        candidates = use_cases.group(1).split(", ") if use_cases else []
+        use_case = next((case for case in candidates if case.split("_")[0] in request), "basic_chat")
+        return json.dumps({"primary_use_case": use_case, "capabilities": ["chat"], "complexity": "simple"})
+    if stage == "super_components":
+        components = ["ChatInput", "OpenAIModel", "ChatOutput"]
+        return json.dumps({"components": components} if structured else components)
+    return "Sure! I'll build that flow for you with a chat input, a language model and a chat output."
+
+
+class FakeOpenAI:
+    """The fake API and its per-stage statistics."""
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.1, chunk_delay: float = 0.01, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_delay = chunk_delay
+        self.random = random.Random(seed)
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self.app = self._create_app()
+
+    def delay(self) -> float:
+        return max(0.0, self.random.gauss(self.latency, self.jitter))
+
+    def record(self, stage: str, prompt_tokens: int):
+        stage_stats = self.stats.setdefault(stage, {"requests": 0, "prompt_tokens": []})
+        stage_stats["requests"] += 1
+        stage_stats["prompt_tokens"].append(prompt_tokens)
+
+    def _create_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/v1/chat/completions")
+        async def chat_completions(request: Request):
+            body = await request.json()
+            prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+            stage = classify(prompt)
+            prompt_tokens = count_tokens(prompt)
+            self.record(stage, prompt_tokens)
+
+            tools = body.get("tools")
+            content = answer(stage, prompt, structured=bool(tools))
+            await asyncio.sleep(self.delay())
+
+            if body.get("stream"):
+                return StreamingResponse(self._stream(body["model"], content), media_type="text/event-stream")
+            message = {"role": "assistant", "content": content}
+            if tools:
+                message = {"role": "assistant", "content": None, "tool_calls": [{
+                    "id": "call-fake", "type": "function",
+                    "function": {"name": tools[0]["function"]["name"], "arguments": content}}]}
+            return {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [{"index": 0, "message": message,
+                             "finish_reason": "tool_calls" if tools else "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": count_tokens(content),
+                          "total_tokens": prompt_tokens + count_tokens(content)}
+            }
+
+        @app.get("/stats")
+        async def get_stats():
+            return self.stats
+
+        @app.post("/stats/reset")
+        async def reset_stats():
+            self.stats.clear()
+            return {"success": True}
+
+        return app
+
+    async def _stream(self, model: str, content: str):
+        for word in content.split(" "):
+            chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(self.chunk_delay)
+        yield "data: [DONE]\n\n"
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Local OpenAI stand-in for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="mean completion latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="latency standard deviation in seconds")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="delay between streamed chunks")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    fake = FakeOpenAI(args.latency, args.jitter, args.chunk_delay, args.seed)
+    uvicorn.run(fake.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
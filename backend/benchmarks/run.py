@@ -0,0 +1,292 @@
+"""
+Flow generation benchmark
+
+Runs the generation pipelines against the local OpenAI stand-in
+(``benchmarks.fake_openai``) and reports, per target and concurrency:
+p50/p95/p99 latency, requests/sec and errors; per pipeline stage: prompt
+tokens; and the peak RSS of the process.
+
+    cd backend
+    python -m benchmarks.run --latency 0.2 --jitter 0.05 --concurrency 1,8,32 --requests 64
+    python -m benchmarks.run --output baseline.json
+    python -m benchmarks.run --baseline baseline.json --tolerance 0.2   # exit 1 on regression
+
+Targets: ``template`` (FlowGenerationService without AI), ``service``
+(FlowGenerationService with AI), ``super`` (SuperAIFlowGenerator) and
+``chat`` (RealAxieStudioAIChat). Generation caches are bypassed so every
+request runs the full pipeline.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.core.config import Settings
+from app.core.container import ServiceContainer
+
+TARGETS = ["template", "service", "super", "chat"]
+
+DESCRIPTIONS = [
+    "Create a simple chatbot that answers questions",
+    "Build a document Q&A system for my PDF files",
+    "Make a research agent that can search the web",
+    "Create a RAG pipeline over my knowledge base",
+    "Build a customer support assistant with memory",
+    "Summarize long documents into bullet points",
+    "Create an agent that uses a calculator tool",
+    "Translate user messages into French",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def target_runner(container: ServiceContainer, target: str) -> Callable[[str], Any]:
+    """The coroutine function that generates one flow for a target."""
+    if target == "template":
+        return lambda description: container.flow_service.generate_flow(description, use_ai=False, use_cache=False)
+    if target == "service":
+        return lambda description: container.flow_service.generate_flow(description, use_ai=True, use_cache=False)
+    if target == "super":
+        return lambda description: container.super_ai_generator.agenerate_flow_super_fast(description, use_cache=False)
+    if target == "chat":
+        return lambda description: container.chat.achat(description, use_cache=False)
+    raise ValueError(f"Unknown target: {target}")
+
+
+def _succeeded(result: Any) -> bool:
+    return not (isinstance(result, dict) and result.get("success") is False)
+
+
+async def run_level(run: Callable[[str], Any], concurrency: int, requests: int) -> Dict[str, Any]:
+    """Run ``requests`` generations, at most ``concurrency`` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(index: int):
+        nonlocal errors
+        # Unique descriptions so nothing is coalesced or cached
+        description = f"{DESCRIPTIONS[index % len(DESCRIPTIONS)]} (request {index})"
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                if not _succeeded(await run(description)):
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "rps": requests / elapsed if elapsed else 0.0,
+    }
+
+
+def summarize_tokens(stats: Dict[str, Any]) -> Dict[str, Any]:
+    summary = {}
+    for stage, stage_stats in sorted(stats.items()):
+        tokens = stage_stats["prompt_tokens"]
+        summary[stage] = {
+            "requests": stage_stats["requests"],
+            "mean": sum(tokens) / len(tokens) if tokens else 0,
+            "p95": percentile(tokens, 95),
+            "max": max(tokens, default=0),
+        }
+    return summary
+
+
+async def run_benchmark(args: argparse.Namespace, openai_url: str) -> Dict[str, Any]:
+    os.environ["OPENAI_BASE_URL"] = openai_url
+    container = ServiceContainer(Settings(OPENAI_API_KEY="sk-benchmark", CONVERSATION_STORE_URL="memory",
+                                          GENERATION_CACHE_PATH=""))
+    warmup_start = time.perf_counter()
+    container.start()
+    if not await container.wait_ready(timeout=600):
+        raise RuntimeError("Services did not warm up")
+
+    results = {
+        "config": {"latency": args.latency, "jitter": args.jitter, "requests": args.requests,
+                   "concurrency": args.concurrency},
+        "warmup_seconds": time.perf_counter() - warmup_start,
+        "rss_after_warmup_mb": peak_rss_mb(),
+        "targets": {},
+    }
+
+    async with httpx.AsyncClient(base_url=openai_url.removesuffix("/v1")) as stats_client:
+        for target in args.targets:
+            run = target_runner(container, target)
+            await stats_client.post("/stats/reset")
+            levels = []
+            for concurrency in args.concurrency:
+                levels.append(await run_level(run, concurrency, args.requests))
+            stats = (await stats_client.get("/stats")).json()
+            results["targets"][target] = {"levels": levels, "prompt_tokens": summarize_tokens(stats)}
+
+    await container.stop()
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def print_report(results: Dict[str, Any]):
+    print(f"\nWarm-up {results['warmup_seconds']:.1f}s, "
+          f"RSS after warm-up {results['rss_after_warmup_mb']:.0f} MB, peak RSS {results['peak_rss_mb']:.0f} MB")
+    print(f"\n{'target':<10}{'conc':>6}{'reqs':>6}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+    for target, target_results in results["targets"].items():
+        for level in target_results["levels"]:
+            print(f"{target:<10}{level['concurrency']:>6}{level['requests']:>6}{level['errors']:>8}"
+                  f"{level['p50'] * 1000:>10.1f}{level['p95'] * 1000:>10.1f}{level['p99'] * 1000:>10.1f}"
+                  f"{level['rps']:>9.1f}")
+
+    print(f"\n{'target':<10}{'stage':<18}{'calls':>7}{'mean tok':>10}{'p95 tok':>9}{'max tok':>9}")
+    for target, target_results in results["targets"].items():
+        for stage, tokens in target_results["prompt_tokens"].items():
+            print(f"{target:<10}{stage:<18}{tokens['requests']:>7}{tokens['mean']:>10.0f}"
+                  f"{tokens['p95']:>9}{tokens['max']:>9}")
+
+
+def find_regressions(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """p95 latencies, mean prompt tokens and peak RSS that grew by more than ``tolerance``."""
+    regressions = []
+
+    def check(name: str, current: float, previous: float):
+        if previous and current > previous * (1 + tolerance):
+            regressions.append(f"{name}: {previous:.4g} -> {current:.4g}")
+
+    for target, target_results in results["targets"].items():
+        previous = baseline.get("targets", {}).get(target)
+        if not previous:
+            continue
+        previous_levels = {level["concurrency"]: level for level in previous["levels"]}
+        for level in target_results["levels"]:
+            if level["concurrency"] in previous_levels:
+                check(f"{target} p95 @{level['concurrency']}", level["p95"],
+                      previous_levels[level["concurrency"]]["p95"])
+        for stage, tokens in target_results["prompt_tokens"].items():
+            if stage in previous["prompt_tokens"]:
+                check(f"{target} {stage} prompt tokens", tokens["mean"], previous["prompt_tokens"][stage]["mean"])
+    check("peak RSS MB", results["peak_rss_mb"], baseline.get("peak_rss_mb", 0))
+    return regressions
+
+
+@contextlib.contextmanager
+def fake_openai_server(args: argparse.Namespace):
+    """Start ``benchmarks.fake_openai`` in a subprocess, so it does not compete for the benchmarked event loop."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_openai", "--port", str(port), "--latency", str(args.latency),
+         "--jitter", str(args.jitter), "--seed", str(args.seed)],
+        cwd=BACKEND_DIR
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 30
+        while True:
+            try:
+                httpx.get(f"{url}/stats").raise_for_status()
+                break
+            except httpx.HTTPError:
+                if process.poll() is not None or time.time() > deadline:
+                    raise RuntimeError("Fake OpenAI server did not start")
+                time.sleep(0.1)
+        yield f"{url}/v1"
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark flow generation against a local OpenAI stand-in")
+    parser.add_argument("--targets", default=",".join(TARGETS),
+                        help=f"comma-separated targets ({', '.join(TARGETS)})")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=64, help="requests per concurrency level")
+    parser.add_argument("--latency", type=float, default=0.5, help="mean fake completion latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="latency standard deviation in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--openai-url", help="use an already running fake server (e.g. http://127.0.0.1:8765/v1)")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (0.2 = 20%%)")
+    parser.add_argument("--verbose", action="store_true", help="keep the generators' console output")
+    args = parser.parse_args(argv)
+
+    args.targets = [target.strip() for target in args.targets.split(",") if target.strip()]
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    with contextlib.ExitStack() as stack:
+        openai_url = args.openai_url or stack.enter_context(fake_openai_server(args))
+        if not args.verbose:
+            # The generators print progress for every request
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        results = asyncio.run(run_benchmark(args, openai_url))
+
+    print_report(results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline:
+        regressions = find_regressions(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) over {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            return 1
+        print(f"\n✅ No regressions over {args.tolerance:.0%} against {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+"""
+Tests for the benchmark harness helpers
+"""
+
+import json
+
+from benchmarks.fake_openai import answer, classify
+from benchmarks.run import find_regressions, percentile
+
+
+def test_fake_openai_answers_each_stage():
+    intent_prompt = 'Analyze the user\'s message to understand their intent.\nUser message: "Build a PDF Q&A bot"\nRespond with JSON:'
+    assert classify(intent_prompt) == "chat_intent"
+    assert json.loads(answer("chat_intent", intent_prompt))["flow_type"] == "rag"
+
+    skeleton = {"name": "Basic Prompting", "nodes": [], "edges": []}
+    customize_prompt = f"TEMPLATE FLOW (skeleton: ...):\n{json.dumps(skeleton)}\n\nUSER REQUEST: \"x\""
+    assert classify(customize_prompt) == "chat_customize"
+    assert json.loads(answer("chat_customize", customize_prompt))["name"] == "Custom Basic Prompting"
+
+
+def test_percentiles_and_regressions():
+    assert percentile(list(range(1, 101)), 95) == 95
+    assert percentile([], 50) == 0.0
+
+    def results(p95, tokens):
+        return {"peak_rss_mb": 100, "targets": {"chat": {
+            "levels": [{"concurrency": 8, "p95": p95}],
+            "prompt_tokens": {"chat_intent": {"mean": tokens}}}}}
+
+    assert find_regressions(results(0.5, 500), results(0.5, 500), 0.2) == []
+    regressions = find_regressions(results(0.7, 500), results(0.5, 500), 0.2)
+    assert len(regressions) == 1 and regressions[0].startswith("chat p95 @8")
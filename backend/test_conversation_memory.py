@@ -0,0 +1,62 @@
+"""
+Tests for token-capped conversation memory
+"""
+
+import sys
+from pathlib import Path
+
+# Add the axiestudio_core to path
+sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
+
+from ai.conversation_memory import ConversationMemory
+from ai.conversation_store import InMemoryConversationStore, create_conversation_store
+from ai.prompt_builder import count_tokens
+
+
+def big_flow(name):
+    return {"name": name, "data": {"nodes": [{"id": f"n{i}", "code": "x" * 2000} for i in range(20)], "edges": []}}
+
+
+def test_flows_are_stored_by_reference():
+    memory = ConversationMemory(InMemoryConversationStore())
+    memory.record("a", "user", "build a chatbot")
+    message = memory.record("a", "assistant", "Here it is", flow=big_flow("Chatbot"), flow_generated=True)
+
+    stored = memory.store.get_history("a")[-1]
+    assert "flow_data" not in stored and stored["flow_ref"] == message["flow_ref"]
+    assert memory.current_flow("a")["name"] == "Chatbot"
+    assert memory.history("a")[-1]["flow_data"]["name"] == "Chatbot"
+
+    context = memory.context("a")
+    assert f'flow {message["flow_ref"]} "Chatbot" (20 nodes)' in context
+    assert "xxxx" not in context
+
+
+def test_long_sessions_are_summarised_within_the_token_cap():
+    memory = ConversationMemory(InMemoryConversationStore(), max_tokens=200, recent_turns=4)
+    memory.record("a", "user", "build a support bot for my shop")
+    for turn in range(30):
+        memory.record("a", "user", f"now change step {turn} " + "please " * 10)
+        memory.record("a", "assistant", f"Updated step {turn}", flow=big_flow(f"Flow {turn}"))
+
+    context = memory.context("a")
+    assert count_tokens(context) <= 200
+    # The opening request survives in the summary, the latest turns verbatim
+    assert "User asked: build a support bot for my shop" in context
+    assert "Updated step 29" in context and "Updated step 10" not in context
+    # Only the newest flows are kept
+    assert memory.current_flow("a")["name"] == "Flow 29"
+    assert sum(1 for message in memory.history("a") if message.get("flow_data")) == 5
+
+
+def test_memory_persists_in_sqlite_store(tmp_path):
+    store = create_conversation_store(f"sqlite:///{tmp_path / 'conversations.db'}")
+    memory = ConversationMemory(store, max_tokens=100, recent_turns=2)
+    for turn in range(5):
+        memory.record("a", "user", f"request {turn}")
+
+    reopened = ConversationMemory(create_conversation_store(f"sqlite:///{tmp_path / 'conversations.db'}"),
+                                  max_tokens=100, recent_turns=2)
+    context = reopened.context("a")
+    assert context.startswith("Summary of earlier conversation:\nUser asked: request 0")
+    assert context.endswith("user: request 3\nuser: request 4")
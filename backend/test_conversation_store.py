@@ -0,0 +1,92 @@
+"""
+Tests for the session-keyed conversation store
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the axiestudio_core to path
+sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
+
+from ai.conversation_store import (
+    ConversationStore,
+    InMemoryConversationStore,
+    SQLiteConversationStore,
+    create_conversation_store,
+)
+
+
+def test_sessions_are_isolated():
+    store = InMemoryConversationStore()
+    store.append("a", {"role": "user", "content": "hello"})
+    store.append("b", {"role": "user", "content": "other"})
+
+    assert [m["content"] for m in store.get_history("a")] == ["hello"]
+    assert [m["content"] for m in store.get_history("b")] == ["other"]
+    assert store.get_history("missing") == []
+
+
+def test_message_window_is_bounded():
+    store = InMemoryConversationStore(max_messages=3)
+    for i in range(10):
+        store.append("a", {"role": "user", "content": str(i)})
+
+    assert [m["content"] for m in store.get_history("a")] == ["7", "8", "9"]
+
+
+def test_least_recently_used_session_is_evicted():
+    store = InMemoryConversationStore(max_sessions=2)
+    store.append("a", {"content": "a"})
+    store.append("b", {"content": "b"})
+    store.get_history("a")
+    store.append("c", {"content": "c"})
+
+    assert len(store) == 2
+    assert store.get_history("b") == []
+    assert store.get_history("a")
+
+
+def test_idle_sessions_expire():
+    store = InMemoryConversationStore(ttl_seconds=-1)
+    store.append("a", {"content": "a"})
+
+    assert store.get_history("a") == []
+
+
+def test_sqlite_store_round_trip(tmp_path):
+    store = create_conversation_store(f"sqlite:///{tmp_path / 'conversations.db'}", max_messages=2)
+    assert isinstance(store, SQLiteConversationStore)
+
+    for i in range(3):
+        store.append("a", {"role": "user", "content": str(i)})
+    store.append("b", {"role": "user", "content": "b"})
+
+    assert [m["content"] for m in store.get_history("a")] == ["1", "2"]
+    store.clear("a")
+    assert store.get_history("a") == []
+    assert len(store) == 1
+
+
+def test_artifacts_live_and_die_with_the_session(tmp_path):
+    for store in (InMemoryConversationStore(), create_conversation_store(f"sqlite:///{tmp_path / 'c.db'}")):
+        store.put_artifact("a", "flow:1", {"name": "Flow"})
+        assert store.get_artifact("a", "flow:1") == {"name": "Flow"}
+        assert store.get_artifact("b", "flow:1") is None
+
+        store.delete_artifact("a", "flow:1")
+        assert store.get_artifact("a", "flow:1") is None
+
+        store.put_artifact("a", "summary", ["line"])
+        store.clear("a")
+        assert store.get_artifact("a", "summary") is None
+
+
+def test_incomplete_backends_fail_when_created():
+    class HistoryOnlyStore(ConversationStore):
+        def get_history(self, conversation_id):
+            return []
+
+    with pytest.raises(TypeError):
+        HistoryOnlyStore()
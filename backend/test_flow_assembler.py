@@ -0,0 +1,56 @@
+"""
+Tests for the deterministic flow assembler
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add the axiestudio_core to path
+sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
+
+from ai.flow_assembler import FlowAssembler, NodeCatalog
+
+STARTER_PROJECTS = Path(__file__).parent / "axiestudio_core" / "axiestudio" / "axiestudio_initial_setup" / "starter_projects"
+
+
+@pytest.fixture(scope="module")
+def assembler():
+    flows = {path.stem: SimpleNamespace(data=json.loads(path.read_text(encoding="utf-8")))
+             for path in STARTER_PROJECTS.glob("*.json")}
+    return FlowAssembler(NodeCatalog.from_index(SimpleNamespace(flows=flows)))
+
+
+def _wiring(flow):
+    names = {node["id"]: node["data"]["type"] for node in flow["nodes"]}
+    return {(names[edge["source"]], edge["data"]["sourceHandle"]["name"],
+             names[edge["target"]], edge["data"]["targetHandle"]["fieldName"]) for edge in flow["edges"]}
+
+
+def test_chat_flow_is_wired_by_type_and_deterministic(assembler):
+    flow = assembler.assemble(["ChatInput", "OpenAIModel", "ChatOutput"], seed="a chatbot")
+
+    assert _wiring(flow) == {
+        ("ChatInput", "message", "LanguageModelComponent", "input_value"),
+        ("LanguageModelComponent", "text_output", "ChatOutput", "input_value"),
+    }
+    assert [node["position"]["x"] for node in flow["nodes"]] == [0, 450, 900]
+    # Same input, same ids; the component template is shared with the catalog
+    assert flow == assembler.assemble(["ChatInput", "OpenAIModel", "ChatOutput"], seed="a chatbot")
+    model = flow["nodes"][1]
+    assert model["data"]["node"] is assembler.catalog.templates["LanguageModelComponent"]["data"]["node"]
+    assert model["id"] != assembler.catalog.templates["LanguageModelComponent"]["id"]
+
+
+def test_tools_listed_after_the_agent_are_wired_into_it(assembler):
+    flow = assembler.assemble(["ChatInput", "Agent", "WebSearchTool", "ChatOutput", "NoSuchComponent"])
+
+    assert len(flow["nodes"]) == 4
+    assert _wiring(flow) == {
+        ("ChatInput", "message", "Agent", "input_value"),
+        ("TavilySearchComponent", "component_as_tool", "Agent", "tools"),
+        ("Agent", "response", "ChatOutput", "input_value"),
+    }
@@ -0,0 +1,52 @@
+"""
+Tests for the flow generation endpoints
+"""
+
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.flow_generator import router
+from app.core.container import ready_services
+from app.core.responses import ORJSONResponse
+from app.services.flow_service import FlowGenerationService
+
+
+class EditingChat:
+    """Answers every follow-up with an edit of the conversation's flow, like edit mode does."""
+
+    def __init__(self):
+        self.flows = {"flow-1": {"name": "Chat", "data": {"nodes": [{"id": "ChatInput-1", "type": "genericNode"}]}},
+                      "flow-2": {"name": "Chat", "data": {"nodes": [{"id": "ChatInput-1", "type": "genericNode"},
+                                                                    {"id": "Memory-1", "type": "genericNode"}]}}}
+        self.calls = []
+
+    async def achat(self, message, conversation_id=None, use_cache=True):
+        self.calls.append((message, conversation_id))
+        return {"success": True, "message": "Added memory.", "flow": None,
+                "patch": [{"op": "add", "path": "/data/nodes/1", "value": {"id": "Memory-1", "type": "genericNode"}}],
+                "base_flow_ref": "flow-1", "flow_ref": "flow-2", "intent": {"wants_flow": True},
+                "conversation_id": conversation_id}
+
+    def get_flow(self, conversation_id, flow_ref):
+        return self.flows.get(flow_ref)
+
+
+def test_generate_returns_the_edited_flow_of_a_follow_up(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    chat = EditingChat()
+    app = FastAPI(default_response_class=ORJSONResponse)
+    app.include_router(router)
+    app.dependency_overrides[ready_services] = lambda: SimpleNamespace(chat=chat, flow_service=FlowGenerationService())
+
+    response = TestClient(app).post("/generate", json={"description": "add memory", "conversation_id": "c-1"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert chat.calls == [("add memory", "c-1")]
+    assert body["flow_data"] == chat.flows["flow-2"]
+    assert len(body["components"]) == 2
+    assert body["metadata"]["flow_ref"] == "flow-2"
+    assert body["metadata"]["base_flow_ref"] == "flow-1"
+    assert body["metadata"]["patch"][0]["op"] == "add"
@@ -0,0 +1,138 @@
+"""
+Tests for JSON patches and incremental flow edits
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add the axiestudio_core to path
+sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
+
+from ai.flow_patch import PatchError, apply_edit, apply_patch, diff, edit_view, validate_flow
+from ai.wiring_index import WiringIndex, node_templates
+
+STARTER_PROJECTS = Path(__file__).parent / "axiestudio_core" / "axiestudio" / "axiestudio_initial_setup" / "starter_projects"
+
+
+@pytest.fixture(scope="module")
+def documents():
+    return [SimpleNamespace(data=json.loads(path.read_text(encoding="utf-8")))
+            for path in sorted(STARTER_PROJECTS.glob("*.json"))]
+
+
+def load_flow(name):
+    return json.loads((STARTER_PROJECTS / f"{name}.json").read_text(encoding="utf-8"))
+
+
+def test_apply_patch_operations_never_mutate_the_document():
+    document = {"a": {"b": [1, 2, 3]}, "c": "x"}
+    original = json.dumps(document)
+
+    patched = apply_patch(document, [
+        {"op": "add", "path": "/a/b/1", "value": 9},
+        {"op": "remove", "path": "/a/b/3"},
+        {"op": "replace", "path": "/c", "value": "y"},
+        {"op": "copy", "from": "/c", "path": "/d~1e"},
+        {"op": "move", "from": "/a/b", "path": "/b"},
+        {"op": "test", "path": "/b/2", "value": 2},
+    ])
+
+    assert patched == {"a": {}, "b": [1, 9, 2], "c": "y", "d/e": "y"}
+    assert json.dumps(document) == original
+
+    for patch in ([{"op": "replace", "path": "/missing", "value": 1}],
+                  [{"op": "test", "path": "/c", "value": "y"}],
+                  [{"op": "add", "path": "/a/b/7", "value": 1}],
+                  [{"op": "move", "from": "/a", "path": "/a/b/x"}],
+                  [{"op": "frobnicate", "path": "/c"}]):
+        with pytest.raises(PatchError):
+            apply_patch(document, patch)
+
+
+def test_diff_round_trips_and_matches_nodes_by_id():
+    old = {"nodes": [{"id": "a", "x": 1}, {"id": "b", "x": 2}, {"id": "c", "x": 3}], "name": "n"}
+    new = {"nodes": [{"id": "a", "x": 1}, {"id": "d", "x": 4}, {"id": "c", "x": 5}], "tag": True}
+
+    patch = diff(old, new)
+    assert apply_patch(old, patch) == new
+    # Unchanged nodes are not touched; changed ones are patched in place
+    assert {"op": "replace", "path": "/nodes/2/x", "value": 5} in patch
+    assert not any(operation["path"].startswith("/nodes/0") for operation in patch)
+
+
+def test_edit_adds_a_wired_node_and_returns_a_small_patch(documents):
+    flow = load_flow("Simple Agent")
+    original = json.dumps(flow, sort_keys=True)
+    agent_id = next(node_id for node_id, node in edit_view(flow)["nodes"].items() if node["type"] == "Agent")
+
+    edited = apply_edit(flow, [
+        {"op": "add", "path": "/nodes/TavilySearchComponent-AbCdE",
+         "value": {"type": "TavilySearchComponent", "params": {"max_results": 3}}},
+        {"op": "replace", "path": "/name", "value": "Search Agent"},
+    ], node_templates(documents), WiringIndex.from_index(SimpleNamespace(flows=dict(enumerate(documents)))))
+
+    nodes = {node["id"]: node for node in edited["data"]["nodes"]}
+    assert nodes["TavilySearchComponent-AbCdE"]["data"]["node"]["template"]["max_results"]["value"] == 3
+    # The new tool was wired into the agent automatically
+    assert any(edge["source"] == "TavilySearchComponent-AbCdE" and edge["target"] == agent_id
+               and edge["data"]["targetHandle"]["fieldName"] == "tools" for edge in edited["data"]["edges"])
+    assert edited["name"] == "Search Agent"
+
+    patch = diff(flow, edited)
+    assert apply_patch(flow, patch) == edited
+    assert len(json.dumps(patch)) * 3 < len(json.dumps(edited))
+    assert json.dumps(flow, sort_keys=True) == original
+
+
+def test_edit_rejects_unknown_types_and_incompatible_edges(documents):
+    flow = load_flow("Basic Prompting")
+    templates = node_templates(documents)
+
+    with pytest.raises(PatchError):
+        apply_edit(flow, [{"op": "add", "path": "/nodes/NoSuchThing-AbCdE", "value": {"type": "NoSuchThing"}}],
+                   templates)
+
+    with pytest.raises(PatchError):
+        apply_edit(flow, [{"op": "replace", "path": "/edges/0/output", "value": "no_such_output"}])
+
+    validate_flow(flow)
+
+
+def test_removing_a_node_drops_its_edges():
+    flow = load_flow("Basic Prompting")
+    prompt_id = next(node_id for node_id, node in edit_view(flow)["nodes"].items() if node["type"] == "Prompt")
+
+    edited = apply_edit(flow, [{"op": "remove", "path": f"/nodes/{prompt_id}"}])
+
+    assert prompt_id not in {node["id"] for node in edited["data"]["nodes"]}
+    assert all(prompt_id not in (edge["source"], edge["target"]) for edge in edited["data"]["edges"])
+    assert apply_patch(flow, diff(flow, edited)) == edited
+
+
+def test_new_nodes_are_only_wired_through_handles_they_have(documents):
+    # Simple Agent's URLComponent is in tool mode: its only output is component_as_tool
+    flow = load_flow("Simple Agent")
+    wiring = WiringIndex.from_index(SimpleNamespace(flows=dict(enumerate(documents))))
+
+    edited = apply_edit(flow, [{"op": "add", "path": "/nodes/URLComponent-AbCdE", "value": {"type": "URLComponent"}}],
+                        node_templates(documents), wiring)
+
+    nodes = {node["id"]: node for node in edited["data"]["nodes"]}
+    outputs = {output["name"] for output in nodes["URLComponent-AbCdE"]["data"]["node"]["outputs"]}
+    assert all(edge["data"]["sourceHandle"]["name"] in outputs
+               for edge in edited["data"]["edges"] if edge["source"] == "URLComponent-AbCdE")
+
+
+def test_edits_only_validate_the_edges_they_touch():
+    # One of this template's own edges has no target field name
+    flow = load_flow("Research Translation Loop")
+    with pytest.raises(PatchError):
+        validate_flow(flow)
+
+    edited = apply_edit(flow, [{"op": "replace", "path": "/name", "value": "Translation Loop"}])
+    assert edited["name"] == "Translation Loop"
+    assert edited["data"]["edges"] == flow["data"]["edges"]
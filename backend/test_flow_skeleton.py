@@ -0,0 +1,66 @@
+"""
+Tests for compact flow skeletons and their re-hydration
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add the axiestudio_core to path
+sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
+
+from ai.flow_skeleton import extract_skeleton, fit_skeleton, rehydrate
+
+STARTER_PROJECTS = Path(__file__).parent / "axiestudio_core" / "axiestudio" / "axiestudio_initial_setup" / "starter_projects"
+
+
+def load_basic_prompting():
+    return json.loads((STARTER_PROJECTS / "Basic Prompting.json").read_text(encoding="utf-8"))
+
+
+def test_skeleton_round_trip_is_lossless():
+    flow = load_basic_prompting()
+    original = json.dumps(flow, sort_keys=True)
+
+    skeleton = extract_skeleton(flow)
+    assert [node["type"] for node in skeleton["nodes"]] == ["ChatInput", "Prompt", "ChatOutput", "LanguageModelComponent"]
+    assert {"source": "ChatInput-SzjnT", "output": "message",
+            "target": "LanguageModelComponent-kBOja", "input": "input_value"} in skeleton["edges"]
+    assert len(json.dumps(skeleton)) * 10 < len(original)
+
+    assert rehydrate(flow, json.loads(json.dumps(skeleton))) == flow
+    # Shortened params come back unchanged too
+    assert rehydrate(flow, json.loads(fit_skeleton(flow, budget=50))) == flow
+    assert json.dumps(flow, sort_keys=True) == original
+
+
+def test_rehydrate_applies_edits_without_touching_the_template():
+    flow = load_basic_prompting()
+    original = json.dumps(flow, sort_keys=True)
+
+    skeleton = extract_skeleton(flow)
+    skeleton["name"] = "Pirate Chat"
+    chat_input = skeleton["nodes"][0]
+    chat_input["params"]["input_value"] = "Ahoy"
+    # Drop the prompt node, add a second chat output fed by the model
+    skeleton["nodes"] = [node for node in skeleton["nodes"] if node["type"] != "Prompt"]
+    skeleton["nodes"].append({"id": "ChatOutput-extra", "type": "ChatOutput", "params": {}})
+    skeleton["edges"].append({"source": "LanguageModelComponent-kBOja", "output": "text_output",
+                              "target": "ChatOutput-extra", "input": "input_value"})
+
+    result = rehydrate(flow, skeleton)
+    nodes = {node["id"]: node for node in result["data"]["nodes"]}
+
+    assert result["name"] == "Pirate Chat"
+    assert nodes["ChatInput-SzjnT"]["data"]["node"]["template"]["input_value"]["value"] == "Ahoy"
+    assert "Prompt-tOH5D" not in nodes
+    assert all("Prompt-tOH5D" not in (edge["source"], edge["target"]) for edge in result["data"]["edges"])
+    assert nodes["ChatOutput-extra"]["data"]["id"] == "ChatOutput-extra"
+    new_edge = result["data"]["edges"][-1]
+    assert new_edge["target"] == "ChatOutput-extra"
+    assert new_edge["data"]["sourceHandle"]["output_types"] == ["Message"]
+
+    # Unchanged nodes are shared with the template, and the template is untouched
+    template_nodes = {node["id"]: node for node in flow["data"]["nodes"]}
+    assert nodes["ChatOutput-8ZWWB"] is template_nodes["ChatOutput-8ZWWB"]
+    assert json.dumps(flow, sort_keys=True) == original
@@ -0,0 +1,65 @@
+"""
+Tests for the content-addressed generation cache
+"""
+
+import sys
+from pathlib import Path
+
+# Add the axiestudio_core to path
+sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
+
+from ai.generation_cache import GenerationCache, is_degraded, make_cache_key, mark_degraded
+
+
+def test_key_ignores_case_whitespace_and_edge_punctuation():
+    a = make_cache_key("super_ai", "Simple chatbot  with GPT-4!", model="gpt-4")
+    b = make_cache_key("super_ai", "simple chatbot with gpt-4", model="gpt-4")
+
+    assert a == b
+    assert a != make_cache_key("super_ai", "simple chatbot with gpt-4", model="gpt-3.5-turbo")
+    assert a != make_cache_key("super_ai", "simple chatbot with gpt-4", model="gpt-4", template_version="v2")
+
+
+def test_memory_tier_lru_and_stats():
+    cache = GenerationCache(max_entries=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.get("a")
+    cache.set("c", {"v": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+
+    stats = cache.stats()
+    assert stats["memory_hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_expired_entries_miss():
+    cache = GenerationCache()
+    cache.set("a", {"v": 1}, ttl_seconds=-1)
+
+    assert cache.get("a") is None
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    path = str(tmp_path / "cache.db")
+    GenerationCache(disk_path=path).set("a", {"flow": [1, 2]})
+
+    cache = GenerationCache(disk_path=path)
+    assert cache.get("a") == {"flow": [1, 2]}
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.get("a") == {"flow": [1, 2]}
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_degraded_flows_are_marked_on_a_copy():
+    template = {"name": "Basic Prompting", "metadata": {"template_used": "Basic Prompting"}}
+    flow = mark_degraded(template)
+
+    assert is_degraded(flow)
+    assert flow["metadata"]["template_used"] == "Basic Prompting"
+    # The shared template itself is left untouched
+    assert not is_degraded(template)
+    assert not is_degraded(None)
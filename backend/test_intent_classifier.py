@@ -0,0 +1,63 @@
+"""
+Tests for the local intent classifier
+"""
+
+import sys
+from pathlib import Path
+
+# Add the axiestudio_core to path
+sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
+
+from ai.conversation_store import create_conversation_store
+from ai.intent_classifier import USE_CASES, IntentClassifier, get_intent_classifier
+from ai.knowledge_index import configure_knowledge_index
+from ai.real_axiestudio_ai_chat import RealAxieStudioAIChat
+
+
+def test_shipped_model_answers_plain_requests_locally():
+    classifier = get_intent_classifier()
+    assert classifier is not None
+
+    assert classifier.classify("Create a chatbot that answers questions about uploaded PDF documents") == "document_qa"
+    assert classifier.classify("build an agent that can search the web") == "agent_tools"
+    assert classifier.classify("make me a simple chatbot") == "basic_chat"
+    assert classifier.classify("what is a vector store?") == "conversation"
+
+    # Vague or unfamiliar requests are escalated to the LLM
+    assert classifier.classify("build me something cool") is None
+    assert classifier.classify("xyzzy quux") is None
+    assert classifier.classify("make me a simple chatbot", threshold=1.01) is None
+    assert classifier.stats()["escalated"] >= 3
+
+    prediction = classifier.predict("hello", labels=USE_CASES)
+    assert prediction.label in USE_CASES and set(prediction.probabilities) == set(USE_CASES)
+
+
+def test_train_save_and_load_round_trip(tmp_path):
+    examples = [("build a pdf bot", "document_qa"), ("read my pdf files", "document_qa"),
+                ("an agent with web search", "agent_tools"), ("search the web with an agent", "agent_tools")]
+    classifier = IntentClassifier.train(examples, dim=1 << 12, epochs=20)
+    classifier.save(tmp_path / "model.json")
+
+    loaded = IntentClassifier.load(tmp_path / "model.json")
+    assert loaded.labels == ["agent_tools", "document_qa"]
+    assert loaded.predict("pdf bot").label == "document_qa"
+    assert abs(loaded.predict("web agent").confidence - classifier.predict("web agent").confidence) < 1e-3
+
+
+def test_follow_up_edits_want_a_flow(tmp_path):
+    classifier = get_intent_classifier()
+    for edit in ("remove the memory node", "rename the agent to Researcher", "connect the search tool to the agent"):
+        assert classifier.classify(edit) in USE_CASES
+
+    configure_knowledge_index(cache_path=str(tmp_path / "knowledge_index.pickle"))
+    chat = RealAxieStudioAIChat(api_key="sk-test", conversation_store=create_conversation_store("memory"))
+    conversation_id = chat.conversation_store.new_conversation_id()
+    chat.memory.record(conversation_id, "assistant", "Here is your chatbot.", flow={"name": "Chat", "data": {}},
+                       flow_generated=True)
+
+    assert chat._local_user_intent("remove the memory node", conversation_id)["wants_flow"]
+    # With a flow to edit, what looks like a question is left to the LLM, which is told about the flow
+    assert chat._local_user_intent("what does the memory node do?") is not None
+    assert chat._local_user_intent("what does the memory node do?", conversation_id) is None
+    assert "already built a flow" in chat._intent_request("drop memory", conversation_id)["messages"][0]["content"]
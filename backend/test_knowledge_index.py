@@ -0,0 +1,141 @@
+"""
+Tests for the unified single-pass knowledge index
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add the axiestudio_core to path
+sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
+
+from ai.flow_indexer import FlowIndexer
+from ai import knowledge_index
+from ai.knowledge_index import KnowledgeIndex
+from ai.real_axiestudio_crawler import RealAxieStudioCrawler
+from ai.template_flow_generator import TemplateFlowGenerator
+
+COMPONENT_SOURCE = '''
+from axiestudio.custom import Component
+from axiestudio.io import MessageTextInput
+
+
+class ChatGreeter(Component):
+    """Greets the user."""
+    display_name = "Chat Greeter"
+    description = "Greets people in a chat."
+    name_input = MessageTextInput(name="name")
+
+    def build(self):
+        return Message(text="hi")
+'''
+
+
+def make_data_root(tmp_path: Path) -> Path:
+    components = tmp_path / "axiestudio_components" / "input_output"
+    components.mkdir(parents=True)
+    (components / "greeter.py").write_text(COMPONENT_SOURCE, encoding="utf-8")
+    (components / "__init__.py").write_text("", encoding="utf-8")
+
+    starters = tmp_path / "axiestudio_initial_setup" / "starter_projects"
+    starters.mkdir(parents=True)
+    flow = {
+        "name": "Greeting Chat",
+        "description": "A chat that greets",
+        "data": {
+            "nodes": [{"type": "genericNode", "data": {"id": "ChatGreeter-abc12"}}],
+            "edges": []
+        }
+    }
+    (starters / "Basic Prompting.json").write_text(json.dumps(flow), encoding="utf-8")
+    return tmp_path
+
+
+def test_module_record_keeps_summaries_not_source(tmp_path):
+    index = KnowledgeIndex(make_data_root(tmp_path))
+
+    assert list(index.modules) == ["input_output/greeter.py"]
+    module = index.modules["input_output/greeter.py"]
+    assert module.category == "input_output"
+    assert module.component_class == "ChatGreeter"
+    assert module.classes[0].bases == ["Component"]
+    assert module.classes[0].docstring == "Greets the user."
+    assert module.typed_inputs == [{"name": "name_input", "type": "MessageTextInput", "required": False}]
+    assert not hasattr(module, "content")
+
+
+def test_views_share_one_index(tmp_path):
+    index = KnowledgeIndex(make_data_root(tmp_path))
+
+    crawled = RealAxieStudioCrawler(index).crawl_all()
+    indexer = FlowIndexer(index)
+    templates = TemplateFlowGenerator(index)
+
+    assert crawled["components"]["ChatGreeter"]["display_name"] == "Chat Greeter"
+    assert crawled["flows"]["Greeting Chat"]["components_used"] == ["ChatGreeter"]
+
+    component = indexer.components["ChatGreeter"]
+    assert component.category == "INPUT_OUTPUT"
+    assert "chat" in component.use_cases
+    assert indexer.search_components("greeting chat", category="input_output") == [component]
+    assert indexer.find_similar_flows("a chat that greets people")[0]["flow"].name == "Greeting Chat"
+    assert index.semantic().components.search("greeting people", k=1)[0][0] == "ChatGreeter"
+
+    # One parsed document, shared by reference across views
+    document = index.flows["Basic Prompting"].data
+    assert templates.templates["Basic Prompting"] is document
+    assert indexer.flows["Greeting Chat"].json_structure is document
+    assert templates.version == index.flows_version
+
+    # Generating from a template never mutates the shared document; only the
+    # overlaid top-level fields are new, the graph is shared copy-on-write
+    flow = templates.generate_flow("say hi", "basic_chat")
+    assert flow["metadata"]["user_description"] == "say hi"
+    assert "metadata" not in document
+    assert flow["data"] is document["data"]
+    assert templates.generate_flow("say bye", "basic_chat")["name"] != flow["name"]
+
+
+def test_cache_reparses_only_changed_files(tmp_path):
+    data_root = make_data_root(tmp_path / "data")
+    cache_path = str(tmp_path / "index.pickle")
+
+    first = KnowledgeIndex(data_root, cache_path=cache_path)
+    assert first.build_stats["parsed"] == 2
+
+    warm = KnowledgeIndex(data_root, cache_path=cache_path)
+    assert warm.build_stats == dict(warm.build_stats, parsed=0, reused=2, cache_loaded=True)
+    assert warm.modules["input_output/greeter.py"] == first.modules["input_output/greeter.py"]
+
+    greeter = data_root / "axiestudio_components" / "input_output" / "greeter.py"
+    greeter.write_text(COMPONENT_SOURCE.replace("Chat Greeter", "Chat Welcomer"), encoding="utf-8")
+    changed = KnowledgeIndex(data_root, cache_path=cache_path)
+    assert changed.build_stats["parsed"] == 1
+    assert changed.modules["input_output/greeter.py"].display_name == "Chat Welcomer"
+
+
+def test_outdated_cache_format_is_rebuilt(tmp_path):
+    data_root = make_data_root(tmp_path / "data")
+    cache_path = tmp_path / "index.pickle"
+    cache_path.write_bytes(b"not a pickle")
+
+    index = KnowledgeIndex(data_root, cache_path=str(cache_path))
+    assert index.build_stats["parsed"] == 2
+    assert KnowledgeIndex(data_root, cache_path=str(cache_path)).build_stats["parsed"] == 0
+
+
+def test_parallel_build_matches_sequential(tmp_path, monkeypatch):
+    data_root = make_data_root(tmp_path)
+    components = data_root / "axiestudio_components" / "input_output"
+    for i in range(5):
+        (components / f"greeter_{i}.py").write_text(
+            COMPONENT_SOURCE.replace("ChatGreeter", f"ChatGreeter{i}"), encoding="utf-8"
+        )
+    monkeypatch.setattr(knowledge_index, "PARALLEL_MIN_FILES", 0)
+
+    sequential = KnowledgeIndex(data_root, use_cache=False, workers=1)
+    parallel = KnowledgeIndex(data_root, use_cache=False, workers=2)
+
+    assert parallel.build_stats["parallel"]
+    assert list(parallel.modules) == list(sequential.modules)
+    assert parallel.modules == sequential.modules
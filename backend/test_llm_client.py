@@ -0,0 +1,118 @@
+"""
+Tests for LLM call deadlines, concurrency limits, hedging and circuit breaking
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add the axiestudio_core to path
+sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
+
+from ai.llm_client import CircuitBreaker, CircuitOpenError, DeadlineExceeded, LatencyTracker, ResilientLLM
+
+
+class ProviderError(Exception):
+    status_code = 503
+
+
+def test_circuit_opens_after_failures_and_probes_after_reset():
+    llm = ResilientLLM(failure_threshold=2, reset_timeout=0.05)
+
+    def failing(timeout):
+        raise ProviderError("overloaded")
+
+    for _ in range(2):
+        with pytest.raises(ProviderError):
+            llm.call("gpt-4", failing, timeout=1.0)
+    assert not llm.is_available("gpt-4")
+    with pytest.raises(CircuitOpenError):
+        llm.call("gpt-4", lambda timeout: "never sent", timeout=1.0)
+    # Other models keep their own circuits
+    assert llm.call("gpt-4o-mini", lambda timeout: "ok", timeout=1.0) == "ok"
+
+    time.sleep(0.06)
+    assert llm.call("gpt-4", lambda timeout: "ok", timeout=1.0) == "ok"
+    assert llm.breaker("gpt-4").state == CircuitBreaker.CLOSED
+    assert llm.stats()["rejected"] == 1
+
+    # Rejected requests (4xx) say nothing about the provider's health
+    class BadRequest(Exception):
+        status_code = 400
+
+    def rejected(timeout):
+        raise BadRequest()
+    for _ in range(3):
+        with pytest.raises(BadRequest):
+            llm.call("gpt-4", rejected, timeout=1.0)
+    assert llm.is_available("gpt-4")
+
+
+def test_slow_calls_are_hedged_and_the_first_answer_wins():
+    latency = LatencyTracker(min_samples=5)
+    for _ in range(5):
+        latency.record("gpt-4", 0.01)
+    llm = ResilientLLM(latency=latency)
+    attempts = []
+
+    async def request(timeout):
+        attempts.append(timeout)
+        # The first attempt hangs, the hedge answers quickly
+        await asyncio.sleep(10 if len(attempts) == 1 else 0.01)
+        return f"attempt {len(attempts)}"
+
+    assert asyncio.run(llm.acall("gpt-4", request, timeout=5.0)) == "attempt 2"
+    assert llm.stats()["hedges"] == 1
+    assert llm.stats()["hedge_wins"] == 1
+
+
+def test_deadline_and_concurrency_limit():
+    llm = ResilientLLM(deadline=2.0, max_concurrency=1, hedge_percentile=None)
+    running = []
+
+    async def request(timeout):
+        running.append(1)
+        assert len(running) == 1
+        await asyncio.sleep(0.01)
+        running.pop()
+        return timeout
+
+    async def run():
+        return await asyncio.gather(*[llm.acall("gpt-4", request, timeout=5.0) for _ in range(3)])
+
+    # Timeouts handed to the SDK never exceed what is left of the deadline
+    assert all(timeout <= 2.0 for timeout in asyncio.run(run()))
+
+    async def hang(timeout):
+        await asyncio.sleep(10)
+    llm = ResilientLLM(deadline=0.05)
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(llm.acall("gpt-4", hang, timeout=5.0))
+    assert llm.breaker("gpt-4").failures == 1
+
+
+def test_streams_hold_their_slot_until_closed_and_are_not_timed():
+    llm = ResilientLLM(deadline=0.2, max_concurrency=1)
+
+    async def chunks():
+        for chunk in ("a", "b"):
+            yield chunk
+
+    async def request(timeout):
+        return chunks()
+
+    async def run():
+        stream = await llm.astream("gpt-4", request, timeout=5.0)
+        assert await stream.__anext__() == "a"
+        # The open stream still holds the only gpt-4 slot
+        with pytest.raises(DeadlineExceeded):
+            await llm.astream("gpt-4", request, timeout=5.0)
+        await stream.aclose()
+        return [chunk async for chunk in await llm.astream("gpt-4", request, timeout=5.0)]
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert llm.latency.percentile("gpt-4", 0.95) is None
+    assert llm.stats()["p95_seconds"] == {"gpt-4": None}
@@ -0,0 +1,122 @@
+"""
+Tests for per-stage model routing, latency budgets and token caps
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import APITimeoutError
+
+# Add the axiestudio_core to path
+sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
+
+from ai.llm_client import CircuitOpenError, ResilientLLM
+from ai.model_policy import CHAT_REPLY, COMPONENT_SELECTION, INTENT, ModelPolicy, StagePolicy
+
+
+class FakeClient:
+    """Records requests; models listed in ``slow`` time out."""
+
+    def __init__(self, slow=(), is_async=False):
+        self.slow = set(slow)
+        self.is_async = is_async
+        self.requests = []
+        self.options = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def with_options(self, **options):
+        self.options.append(options)
+        return self
+
+    def _respond(self, request):
+        self.requests.append(request)
+        if request["model"] in self.slow:
+            raise APITimeoutError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+        return SimpleNamespace(usage=SimpleNamespace(completion_tokens=7), model=request["model"])
+
+    def _create(self, **request):
+        if not self.is_async:
+            return self._respond(request)
+
+        async def respond():
+            return self._respond(request)
+        return respond()
+
+
+def test_stages_use_their_model_and_token_cap():
+    policy = ModelPolicy({COMPONENT_SELECTION: StagePolicy("gpt-4", latency_budget=15.0, max_tokens=1500)},
+                         llm=ResilientLLM())
+    client = FakeClient()
+
+    response = policy.complete(client, INTENT, messages=[], max_tokens=2000)
+    assert response.model == "gpt-4o-mini"
+    assert client.requests[-1]["max_tokens"] == 500
+    assert client.options[-1] == {"timeout": 5.0, "max_retries": 0}
+
+    policy.complete(client, COMPONENT_SELECTION, messages=[], max_tokens=800)
+    assert client.requests[-1]["model"] == "gpt-4"
+    assert client.requests[-1]["max_tokens"] == 800
+
+    assert "intent=gpt-4o-mini" in policy.signature()
+    assert policy.stats()[INTENT]["completion_tokens"] == 7
+
+
+def test_timeouts_fall_back_once_to_the_fast_model():
+    policy = ModelPolicy({CHAT_REPLY: StagePolicy("gpt-4", latency_budget=1.0, max_tokens=300)}, llm=ResilientLLM())
+    client = FakeClient(slow={"gpt-4"}, is_async=True)
+
+    response = asyncio.run(policy.acomplete(client, CHAT_REPLY, messages=[]))
+    assert response.model == "gpt-4o-mini"
+    assert [request["model"] for request in client.requests] == ["gpt-4", "gpt-4o-mini"]
+    assert policy.stats()[CHAT_REPLY]["fallbacks"] == 1
+    # The slow model's timeout counts against its own circuit only
+    assert policy.llm.breaker("gpt-4").failures == 1
+    assert policy.llm.breaker("gpt-4o-mini").failures == 0
+
+    # Without a distinct fallback the timeout surfaces
+    strict = ModelPolicy({CHAT_REPLY: StagePolicy("gpt-4", latency_budget=1.0, max_tokens=300, fallback=None)},
+                         llm=ResilientLLM())
+    with pytest.raises(APITimeoutError):
+        strict.complete(FakeClient(slow={"gpt-4"}), CHAT_REPLY, messages=[])
+
+
+def test_stages_skip_models_whose_circuit_is_open():
+    llm = ResilientLLM(failure_threshold=1)
+    llm.breaker("gpt-4").record_failure()
+    policy = ModelPolicy({COMPONENT_SELECTION: StagePolicy("gpt-4", latency_budget=15.0, max_tokens=1500)}, llm=llm)
+    client = FakeClient()
+
+    assert policy.available
+    assert policy.complete(client, COMPONENT_SELECTION, messages=[]).model == "gpt-4o-mini"
+    assert [request["model"] for request in client.requests] == ["gpt-4o-mini"]
+
+
+class HangingClient(FakeClient):
+    """Never answers; raises the SDK's timeout once the request's timeout has passed."""
+
+    def _create(self, **request):
+        async def hang():
+            self.requests.append(request)
+            await asyncio.sleep(self.options[-1]["timeout"])
+            raise APITimeoutError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+        return hang()
+
+
+def test_stage_budget_timeouts_open_the_circuit():
+    policy = ModelPolicy({INTENT: StagePolicy("gpt-4", latency_budget=0.02, max_tokens=500, fallback=None)},
+                         llm=ResilientLLM(failure_threshold=2))
+    client = HangingClient()
+
+    for _ in range(2):
+        with pytest.raises(APITimeoutError):
+            asyncio.run(policy.acomplete(client, INTENT, messages=[]))
+
+    # A brown-out no longer costs every call its full budget
+    assert not policy.available
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(policy.acomplete(client, INTENT, messages=[]))
+    assert len(client.requests) == 2
@@ -0,0 +1,59 @@
+"""
+Tests for the token-budgeted prompt builder
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the axiestudio_core to path
+sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
+
+from ai.prompt_builder import KnowledgeShards, count_tokens
+from ai.semantic_index import SemanticIndex
+
+
+def component(display_name, description):
+    return {"display_name": display_name, "description": description, "base_classes": ["Component"],
+            "inputs": [], "outputs": [], "module_path": "axiestudio_components.test"}
+
+
+AXIESTUDIO_DATA = {
+    "components": {
+        "FileComponent": component("File", "Load PDF and text files"),
+        "WebSearch": component("Web Search", "Search the web for pages"),
+        "ChatInput": component("Chat Input", "Chat messages from the user"),
+    },
+    "flows": {
+        "Document Q&A": {"description": "Answer questions about PDF documents",
+                         "components_used": ["ChatInput", "FileComponent"], "nodes": [], "edges": []},
+    },
+    "relationships": {"FileComponent": ["ChatInput"]},
+    "wiring": {"FileComponent": ["SplitText", "ParserComponent"]},
+}
+
+
+def make_shards():
+    catalog = SimpleNamespace(
+        components=SemanticIndex.build({name: f"{name} {info['description']}"
+                                        for name, info in AXIESTUDIO_DATA["components"].items()}),
+        flows=SemanticIndex.build({name: f"{name} {info['description']}"
+                                   for name, info in AXIESTUDIO_DATA["flows"].items()}),
+    )
+    return KnowledgeShards.from_crawl(AXIESTUDIO_DATA, catalog)
+
+
+def test_pack_prefers_relevant_shards_within_budget():
+    shards = make_shards()
+    assert len(shards) == 4
+
+    packed = shards.pack("questions about my pdf files", budget=1000)
+    assert "COMPONENT: FileComponent" in packed and "FLOW: Document Q&A" in packed
+    assert "- Commonly used with: ChatInput" in packed
+    assert "- Connects to: SplitText, ParserComponent" in packed
+    assert "WebSearch" not in packed
+
+    small = shards.pack("questions about my pdf files", budget=80)
+    assert 0 < count_tokens(small) <= 80
+    assert small.count("FLOW:") + small.count("COMPONENT:") == 1
+
@@ -5,9 +5,20 @@ Test script for Real AxieStudio AI system
 import sys
 from pathlib import Path
 
+import pytest
+
 # Add the axiestudio_core to path
 sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
 
+from ai.knowledge_index import configure_knowledge_index
+
+
+@pytest.fixture(autouse=True)
+def index_cache_in_tmp_path(tmp_path):
+    """Keep the shared index's cache out of the source tree."""
+    configure_knowledge_index(cache_path=str(tmp_path / "knowledge_index.pickle"))
+
+
 def test_crawler():
     """Test the Real AxieStudio Crawler."""
     print("🔍 Testing Real AxieStudio Crawler...")
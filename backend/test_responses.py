@@ -0,0 +1,57 @@
+"""
+Tests for pre-encoded, pre-compressed JSON responses
+"""
+
+import json
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.responses import FlowEncoder, ORJSONResponse, RawJSON, ResponseCache, dumps
+
+
+def make_client():
+    app = FastAPI(default_response_class=ORJSONResponse)
+    cache = ResponseCache()
+    builds = []
+
+    @app.get("/templates")
+    async def templates(request: Request):
+        def build():
+            builds.append(1)
+            return {"success": True, "templates": {f"t{i}": {"description": "x" * 50} for i in range(100)}}
+        return cache.get("templates", build).response(request)
+
+    return TestClient(app), builds
+
+
+def test_cached_payload_is_compressed_and_revalidated():
+    client, builds = make_client()
+
+    first = client.get("/templates", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.json()["templates"]["t0"]["description"] == "x" * 50
+    etag = first.headers["etag"]
+
+    plain = client.get("/templates", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] == etag
+
+    revalidated = client.get("/templates", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert len(builds) == 1
+
+
+def test_flow_encoder_splices_cached_subtrees():
+    encoder = FlowEncoder(min_size=100)
+    graph = {"nodes": [{"id": f"node-{i}", "code": "x" * 50} for i in range(10)], "edges": []}
+
+    first = encoder.encode({"name": "One", "data": graph, "tags": {"a"}})
+    second = encoder.encode({"name": "Two", "data": graph})
+    assert encoder.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+    body = dumps({"success": True, "flow_data": second, "raw": RawJSON(b"[1,2]")})
+    assert json.loads(body) == {"success": True, "flow_data": {"name": "Two", "data": graph}, "raw": [1, 2]}
+    assert json.loads(first.data)["tags"] == ["a"]
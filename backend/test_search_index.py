@@ -0,0 +1,32 @@
+"""
+Tests for the BM25 search index behind flow and component retrieval
+"""
+
+import sys
+from pathlib import Path
+
+# Add the axiestudio_core to path
+sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
+
+from ai.search_index import BM25Index, tokenize
+
+
+def test_tokenize_splits_camel_case_and_stems():
+    assert tokenize("OpenAIEmbeddings for PDF files") == ["open", "ai", "embed", "pdf", "fil"]
+    assert tokenize("chatbots") == tokenize("chatbot")
+    assert tokenize("the and of") == []
+
+
+def test_bm25_ranks_by_relevance():
+    index = BM25Index()
+    index.add("memory", "Memory Chatbot: a chatbot that remembers the conversation")
+    index.add("document_qa", "Document Q&A: answer questions about PDF documents")
+    index.add("blog", "Blog Writer: write blog posts from URLs")
+    index.finalize()
+
+    results = index.search("chatbot answering questions about my PDF documents")
+    assert [doc_id for doc_id, _, _ in results] == ["document_qa", "memory"]
+    assert results[0][2] == 4
+
+    assert index.search("blog", where=lambda doc_id: doc_id != "blog") == []
+    assert index.search("nothing relevant") == []
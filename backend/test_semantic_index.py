@@ -0,0 +1,62 @@
+"""
+Tests for the vectorised semantic retrieval index
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add the axiestudio_core to path
+sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
+
+from ai.semantic_index import HashingEmbedder, SemanticIndex
+
+DOCUMENTS = {
+    "memory": "Memory Chatbot: a chatbot that remembers the conversation",
+    "document_qa": "Document Q&A: answer questions about PDF documents",
+    "blog": "Blog Writer: write blog posts from URLs",
+}
+
+
+class KeywordEmbedder:
+    """One dimension per keyword, so expected scores are easy to reason about."""
+    name = "keywords"
+    keywords = ["chatbot", "pdf", "blog"]
+
+    def __call__(self, texts):
+        return np.array([[text.lower().count(word) for word in self.keywords] for text in texts], dtype=float)
+
+
+def test_pluggable_embedder_ranks_by_cosine():
+    index = SemanticIndex.build(DOCUMENTS, KeywordEmbedder())
+
+    assert index.matrix.dtype == np.float32 and index.matrix.flags["C_CONTIGUOUS"]
+    results = index.search("a pdf chatbot", k=2)
+    # Equal cosines keep index order
+    assert [doc_id for doc_id, _ in results] == ["memory", "document_qa"]
+    assert [score for _, score in results] == [pytest.approx(0.5 ** 0.5)] * 2
+    assert index.search("pdf", where=lambda doc_id: doc_id != "document_qa") == []
+    assert index.search("nothing relevant") == []
+
+
+def test_hashing_embedder_finds_related_wording():
+    index = SemanticIndex.build(DOCUMENTS, HashingEmbedder())
+
+    assert index.search("bot that remembers what we talked about", k=1)[0][0] == "memory"
+    assert index.search("questions on my pdfs", k=1)[0][0] == "document_qa"
+
+
+def test_matrix_is_cached_and_memory_mapped(tmp_path):
+    cache_path = tmp_path / "index.components.npy"
+    built = SemanticIndex.build(DOCUMENTS, KeywordEmbedder(), cache_path)
+    assert cache_path.exists()
+
+    loaded = SemanticIndex.build(DOCUMENTS, KeywordEmbedder(), cache_path)
+    assert isinstance(loaded.matrix, np.memmap)
+    assert np.array_equal(loaded.matrix, built.matrix)
+
+    # Changed documents invalidate the cached matrix
+    changed = SemanticIndex.build(dict(DOCUMENTS, blog="Blog about PDF tools"), KeywordEmbedder(), cache_path)
+    assert changed.search("pdf", k=3)[1][0] == "blog"
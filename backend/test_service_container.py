@@ -0,0 +1,28 @@
+"""
+Tests for the lazy, lifespan-managed service container
+"""
+
+import asyncio
+
+from app.core.config import Settings
+from app.core.container import ServiceContainer
+
+
+def test_container_warms_in_background_without_api_key(tmp_path):
+    # Keep the index cache out of the source tree
+    container = ServiceContainer(Settings(OPENAI_API_KEY="", KNOWLEDGE_INDEX_PATH=str(tmp_path / "knowledge_index.pickle")))
+    assert not container.ready
+    assert container.flow_service is None
+
+    async def warm():
+        assert await container.wait_ready(timeout=60)
+        await container.stop()
+
+    asyncio.run(warm())
+
+    status = container.status()
+    assert status["ready"]
+    assert status["services"]["template_generator"]
+    assert not status["services"]["chat"]
+    assert "ai" in status["errors"]
+    assert container.flow_service.get_status()["ai_available"] is False
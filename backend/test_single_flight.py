@@ -0,0 +1,50 @@
+"""
+Tests for single-flight request coalescing
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the axiestudio_core to path
+sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
+
+from ai.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"flow": "shared"}
+
+    async def run():
+        return await asyncio.gather(*[flight.do("key", work) for _ in range(10)])
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert all(result == {"flow": "shared"} for result, _ in results)
+    assert [shared for _, shared in results].count(False) == 1
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 9}
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        leader = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == ("done", True)
@@ -0,0 +1,51 @@
+"""
+Tests for JSON repair and schema-validated structured output
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the axiestudio_core to path
+sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
+
+from ai.flow_skeleton import extract_skeleton, rehydrate
+from ai.json_repair import JSONRepairError, parse_json, parse_json_partial
+from ai.structured_output import CUSTOMIZED_FLOW, SchemaError
+
+STARTER_PROJECTS = Path(__file__).parent / "axiestudio_core" / "axiestudio" / "axiestudio_initial_setup" / "starter_projects"
+
+
+def test_parse_json_repairs_fences_commas_and_truncation():
+    assert parse_json('Sure!\n```json\n{"a": [1, 2,],}\n```') == {"a": [1, 2]}
+    assert parse_json('{"a": 1} Let me know if you need anything else.') == {"a": 1}
+    assert parse_json_partial('["ChatInput", "OpenAIModel", "Chat') == (["ChatInput", "OpenAIModel"], False)
+    # Truncated array elements are dropped whole, half-written values are never kept
+    assert parse_json('{"name": "x", "nodes": [{"id": "a"}, {"id": "b", "ty') == {"name": "x", "nodes": [{"id": "a"}]}
+    assert parse_json('{"name": "x", "description": "Answers ques') == {"name": "x"}
+
+    with pytest.raises(JSONRepairError):
+        parse_json("I can't help with that.")
+
+
+def test_truncated_customization_keeps_the_rest_of_the_template():
+    flow = json.loads((STARTER_PROJECTS / "Basic Prompting.json").read_text(encoding="utf-8"))
+    skeleton = extract_skeleton(flow)
+    skeleton["name"] = "Pirate Chat"
+    skeleton["nodes"][0]["params"]["input_value"] = "Ahoy"
+    text = json.dumps(skeleton)
+    truncated = text[:text.index('"display_name"', text.index('"id"', text.index('"Ahoy"')))]
+
+    customized, complete = CUSTOMIZED_FLOW.parse(truncated)
+    assert not complete and len(customized["nodes"]) == 1 and "edges" not in customized
+
+    result = rehydrate(flow, customized, partial=not complete)
+    assert result["name"] == "Pirate Chat"
+    assert [node["id"] for node in result["data"]["nodes"]] == [node["id"] for node in flow["data"]["nodes"]]
+    assert result["data"]["nodes"][0]["data"]["node"]["template"]["input_value"]["value"] == "Ahoy"
+    assert result["data"]["edges"] == flow["data"]["edges"]
+
+    with pytest.raises(SchemaError):
+        CUSTOMIZED_FLOW.parse('{"name": "x", "description": "y", "nodes": [{"id": 1}], "edges": []}')
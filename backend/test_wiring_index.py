@@ -0,0 +1,57 @@
+"""
+Tests for the component wiring index
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add the axiestudio_core to path
+sys.path.append(str(Path(__file__).parent / "axiestudio_core"))
+
+from ai.wiring_index import WiringIndex
+
+STARTER_PROJECTS = Path(__file__).parent / "axiestudio_core" / "axiestudio" / "axiestudio_initial_setup" / "starter_projects"
+
+
+@pytest.fixture(scope="module")
+def wiring():
+    flows = {path.stem: SimpleNamespace(data=json.loads(path.read_text(encoding="utf-8")))
+             for path in STARTER_PROJECTS.glob("*.json")}
+    return WiringIndex.from_index(SimpleNamespace(flows=flows))
+
+
+def test_connections_are_typed_and_ranked_by_real_usage(wiring):
+    feeds = wiring.targets("ChatInput")
+    assert (feeds[0].target, feeds[0].field) == ("Agent", "input_value")
+    assert all("Message" in connection.types for connection in feeds)
+
+    tools = {(connection.source, connection.field) for connection in wiring.sources("Agent") if "Tool" in connection.types}
+    assert ("TavilySearchComponent", "tools") in tools
+    # Advanced fields are not offered as wiring targets
+    assert all(connection.field != "session_id" for connection in wiring.sources("ChatInput"))
+
+    assert wiring.connectable("ChatInput", limit=2) == ["Agent", "LanguageModelComponent"]
+
+
+def test_cooccurrence_is_a_symmetric_sparse_matrix():
+    def node(node_type):
+        return {"id": f"{node_type}-x", "type": "genericNode", "data": {"type": node_type}}
+
+    flows = [
+        {"data": {"nodes": [node("ChatInput"), node("Agent"), node("ChatOutput")], "edges": []}},
+        {"data": {"nodes": [node("ChatInput"), node("ChatOutput"), {"id": "note-1", "type": "noteNode",
+                                                                    "data": {"type": "note"}}], "edges": []}},
+    ]
+    wiring = WiringIndex({}, flows)
+
+    assert wiring.cooccurrence_count("ChatInput", "ChatOutput") == wiring.cooccurrence_count("ChatOutput", "ChatInput") == 2
+    assert wiring.cooccurrence_count("Agent", "note") == 0
+    assert wiring.related("ChatInput") == ["ChatOutput", "Agent"]
+    assert wiring.stats()["cooccurring_pairs"] == 3
+
+    unknown = wiring.suggest("NoSuchComponent")
+    assert unknown["known"] is False and unknown["feeds"] == [] and unknown["used_with"] == []
@@ -11,12 +11,19 @@ import {
   Zap
 } from 'lucide-react';
 import { chatAPI } from '../services/api';
+import { applyPatch } from '../services/jsonPatch';
+
+const CONVERSATION_ID_KEY = 'axiestudio_conversation_id';
 
 const RealChatInterface = () => {
   const [messages, setMessages] = useState([]);
+  const [conversationId, setConversationId] = useState(
+    () => localStorage.getItem(CONVERSATION_ID_KEY)
+  );
   const [inputMessage, setInputMessage] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [generatedFlow, setGeneratedFlow] = useState(null);
+  const [flowRef, setFlowRef] = useState(null);
   const messagesEndRef = useRef(null);
 
   const scrollToBottom = () => {
@@ -33,8 +40,10 @@ const RealChatInterface = () => {
   }, []);
 
   const loadChatHistory = async () => {
+    if (!conversationId) return;
+
     try {
-      const response = await chatAPI.getHistory();
+      const response = await chatAPI.getHistory(conversationId);
       if (response.success && response.history) {
         const formattedMessages = response.history.map(msg => ({
           id: Date.now() + Math.random(),
@@ -44,12 +53,32 @@ const RealChatInterface = () => {
           flow: msg.flow_data || null
         }));
         setMessages(formattedMessages);
+
+        const lastFlow = [...response.history].reverse().find(msg => msg.flow_data);
+        if (lastFlow) {
+          setGeneratedFlow(lastFlow.flow_data);
+          setFlowRef(lastFlow.flow_ref);
+        }
       }
     } catch (error) {
       console.error('Failed to load chat history:', error);
     }
   };
 
+  // Follow-up edits come back as a patch to the previous flow; fetch the flow if we don't hold that one
+  const resolveFlow = async (response, currentConversationId) => {
+    if (!response.patch) return response.flow;
+    if (generatedFlow && flowRef === response.base_flow_ref) {
+      try {
+        return applyPatch(generatedFlow, response.patch);
+      } catch (error) {
+        console.error('Failed to apply flow patch:', error);
+      }
+    }
+    const stored = await chatAPI.getFlow(currentConversationId, response.flow_ref);
+    return stored.flow;
+  };
+
   const handleSendMessage = async () => {
     if (!inputMessage.trim() || isLoading) return;
 
@@ -65,24 +94,31 @@ const RealChatInterface = () => {
     setIsLoading(true);
 
     try {
-      const response = await chatAPI.sendMessage(userMessage.content);
+      const response = await chatAPI.sendMessage(userMessage.content, conversationId);
+
+      if (response.conversation_id && response.conversation_id !== conversationId) {
+        setConversationId(response.conversation_id);
+        localStorage.setItem(CONVERSATION_ID_KEY, response.conversation_id);
+      }
       
       if (response.success) {
+        const flow = await resolveFlow(response, response.conversation_id || conversationId);
         const assistantMessage = {
           id: Date.now() + 1,
           role: 'assistant',
           content: response.message,
           timestamp: new Date().toISOString(),
-          flow: response.flow,
+          flow,
           intent: response.intent
         };
 
         setMessages(prev => [...prev, assistantMessage]);
 
         // If a flow was generated, store it
-        if (response.flow) {
-          setGeneratedFlow(response.flow);
-          toast.success('Flow generated! You can download it below.');
+        if (flow) {
+          setGeneratedFlow(flow);
+          setFlowRef(response.flow_ref);
+          toast.success(response.patch ? 'Flow updated! You can download it below.' : 'Flow generated! You can download it below.');
         }
       } else {
         throw new Error(response.message || 'Chat failed');
@@ -114,9 +150,14 @@ const RealChatInterface = () => {
 
   const clearChat = async () => {
     try {
-      await chatAPI.clearHistory();
+      if (conversationId) {
+        await chatAPI.clearHistory(conversationId);
+      }
+      localStorage.removeItem(CONVERSATION_ID_KEY);
+      setConversationId(null);
       setMessages([]);
       setGeneratedFlow(null);
+      setFlowRef(null);
       toast.success('Chat cleared successfully!');
     } catch (error) {
       console.error('Failed to clear chat:', error);
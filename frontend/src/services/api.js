@@ -39,6 +39,41 @@ export const flowAPI = {
     return response.data;
   },
 
+  // Generate a flow, streaming progress events (intent, template, token, node, flow, done, error)
+  generateFlowStream: async (data, onEvent) => {
+    const response = await fetch(`${api.defaults.baseURL}/generate/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(data),
+    });
+
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({}));
+      throw new Error(error.detail || `Request failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+
+      buffer += decoder.decode(value, { stream: true });
+      const events = buffer.split('\n\n');
+      buffer = events.pop();
+
+      for (const rawEvent of events) {
+        const event = rawEvent.match(/^event: (.*)$/m)?.[1];
+        const payload = rawEvent.match(/^data: (.*)$/m)?.[1];
+        if (event && payload) {
+          onEvent(event, JSON.parse(payload));
+        }
+      }
+    }
+  },
+
   // Get available templates
   getTemplates: async () => {
     const response = await api.get('/templates');
@@ -73,20 +108,26 @@ export const healthCheck = async () => {
 // Chat API endpoints for Real AxieStudio AI Chat
 export const chatAPI = {
   // Send a message to the AI chat system
-  sendMessage: async (message) => {
-    const response = await api.post('/chat', { message });
+  sendMessage: async (message, conversationId) => {
+    const response = await api.post('/chat', { message, conversation_id: conversationId });
     return response.data;
   },
 
   // Get chat conversation history
-  getHistory: async () => {
-    const response = await api.get('/chat/history');
+  getHistory: async (conversationId) => {
+    const response = await api.get('/chat/history', { params: { conversation_id: conversationId } });
+    return response.data;
+  },
+
+  // Get a flow generated in a conversation
+  getFlow: async (conversationId, flowRef) => {
+    const response = await api.get('/chat/flow', { params: { conversation_id: conversationId, flow_ref: flowRef } });
     return response.data;
   },
 
   // Clear chat conversation history
-  clearHistory: async () => {
-    const response = await api.post('/chat/clear');
+  clearHistory: async (conversationId) => {
+    const response = await api.post('/chat/clear', null, { params: { conversation_id: conversationId } });
     return response.data;
   }
 };
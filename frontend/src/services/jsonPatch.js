@@ -0,0 +1,63 @@
+// Minimal RFC 6902 JSON Patch, for flow edits returned by the chat API
+
+const parsePointer = (pointer) => {
+  if (pointer === '') return [];
+  return pointer.slice(1).split('/').map(token => token.replace(/~1/g, '/').replace(/~0/g, '~'));
+};
+
+const getValue = (document, tokens) =>
+  tokens.reduce((value, token) => {
+    if (value === null || typeof value !== 'object' || !(token in value)) {
+      throw new Error(`Invalid patch path: /${tokens.join('/')}`);
+    }
+    return value[token];
+  }, document);
+
+// Returns a copy of the document along the path with the operation applied
+const update = (document, tokens, op, value) => {
+  if (tokens.length === 0) return value;
+
+  const [token, ...rest] = tokens;
+  if (Array.isArray(document)) {
+    const result = [...document];
+    const index = token === '-' ? result.length : Number(token);
+    if (rest.length) result[index] = update(result[index], rest, op, value);
+    else if (op === 'add') result.splice(index, 0, value);
+    else if (op === 'remove') result.splice(index, 1);
+    else result[index] = value;
+    return result;
+  }
+
+  const result = { ...document };
+  if (rest.length) result[token] = update(getValue(document, [token]), rest, op, value);
+  else if (op === 'remove') delete result[token];
+  else result[token] = value;
+  return result;
+};
+
+// Apply a patch without mutating the document; unchanged subtrees are shared
+export const applyPatch = (document, patch) =>
+  patch.reduce((current, operation) => {
+    const path = parsePointer(operation.path);
+    switch (operation.op) {
+      case 'add':
+      case 'replace':
+        return update(current, path, operation.op, operation.value);
+      case 'remove':
+        return update(current, path, 'remove');
+      case 'move': {
+        const from = parsePointer(operation.from);
+        const value = getValue(current, from);
+        return update(update(current, from, 'remove'), path, 'add', value);
+      }
+      case 'copy':
+        return update(current, path, 'add', getValue(current, parsePointer(operation.from)));
+      case 'test':
+        if (JSON.stringify(getValue(current, path)) !== JSON.stringify(operation.value)) {
+          throw new Error(`Patch test failed at ${operation.path}`);
+        }
+        return current;
+      default:
+        throw new Error(`Unknown patch operation: ${operation.op}`);
+    }
+  }, document);